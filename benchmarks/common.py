@@ -0,0 +1,166 @@
+"""
+Helpers shared by the benchmarks in this directory
+"""
+import json
+import platform
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+#: A minimal spec with a single operation returning a small JSON object
+SPEC = {
+    "openapi": "3.0.0",
+    "info": {"title": "Benchmark API", "version": "1.0.0"},
+    "servers": [{"url": "http://127.0.0.1"}],
+    "paths": {
+        "/regions/{id}": {
+            "get": {
+                "operationId": "getRegion",
+                "parameters": [{"name": "id", "in": "path", "required": True, "schema": {"type": "string"}}],
+                "responses": {
+                    "200": {
+                        "description": "A region",
+                        "content": {"application/json": {"schema": {"$ref": "#/components/schemas/Region"}}},
+                    }
+                },
+            }
+        }
+    },
+    "components": {
+        "schemas": {
+            "Region": {
+                "type": "object",
+                "properties": {
+                    "id": {"type": "string"},
+                    "country": {"type": "string"},
+                    "status": {"type": "string"},
+                },
+            }
+        }
+    },
+}
+
+REGION = json.dumps({"id": "us-east", "country": "us", "status": "ok"}).encode()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # write each response in a single segment; otherwise delayed ACKs stall
+    # every keep-alive request for tens of milliseconds
+    wbufsize = -1
+    disable_nagle_algorithm = True
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        body = self.server.bodies.get(self.path.split("?", 1)[0], REGION)
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self.do_GET()
+
+
+def wsgi_app(environ, start_response):
+    """
+    A WSGI application answering every request with the same small region
+    """
+    start_response("200 OK", [("Content-Type", "application/json"), ("Content-Length", str(len(REGION)))])
+    return [REGION]
+
+
+async def asgi_app(scope, receive, send):
+    """
+    An ASGI application answering every request with the same small region
+    """
+    await receive()
+    await send(
+        {
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(REGION)).encode())],
+        }
+    )
+    await send({"type": "http.response.body", "body": REGION})
+
+
+def serve(bodies=None):
+    """
+    Starts a keep-alive HTTP server answering every GET with the same small
+    region in a background thread, and returns its base URL and the server.
+
+    :param bodies: JSON bodies to answer requests to particular paths with,
+                   instead of the region, by path.  POST requests to the same
+                   paths are answered the same way.
+    :type bodies: dict[str, bytes]
+    """
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    server.bodies = bodies or {}
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return "http://127.0.0.1:{}".format(server.server_port), server
+
+
+def measure(func, duration):
+    """
+    Calls ``func`` repeatedly for ``duration`` seconds and returns the number of
+    calls made per second.
+    """
+    calls = 0
+    end = time.perf_counter() + duration
+    start = time.perf_counter()
+    while time.perf_counter() < end:
+        func()
+        calls += 1
+    return calls / (time.perf_counter() - start)
+
+
+def save_results(path, results, **details):
+    """
+    Saves a benchmark's results as JSON, with the date and platform they were
+    measured on, for comparing later runs against with :any:`compare_results`.
+
+    :param results: Each measurement, by name, as a dict of figures
+    :type results: dict[str, dict[str, float]]
+    :param details: Anything else worth recording with the results
+    """
+    with open(path, "w") as f:
+        json.dump(
+            dict(
+                details,
+                date=time.strftime("%Y-%m-%dT%H:%M:%S"),
+                python=platform.python_version(),
+                platform=platform.platform(),
+                results=results,
+            ),
+            f,
+            indent=2,
+        )
+
+
+def compare_results(path, results, skip=()):
+    """
+    Prints how each figure changed from results saved earlier with
+    :any:`save_results`
+
+    :param skip: Figures not to compare, such as differences that may be near
+                 zero
+    :type skip: tuple[str]
+    """
+    with open(path) as f:
+        baseline = json.load(f)
+
+    print()
+    print("change from baseline ({})".format(baseline["date"]))
+    for name, figures in results.items():
+        changes = []
+        for figure, value in figures.items():
+            before = baseline["results"].get(name, {}).get(figure)
+            if before and figure not in skip:
+                changes.append("{} {:+.0%}".format(figure, value / before - 1))
+        print("{:<12} {}".format(name, ", ".join(changes)))
@@ -0,0 +1,79 @@
+"""
+Measures how quickly Schema.generate produces values for flat and nested
+schemas, and how quickly those values are made into models.  Run from the
+root of the project with::
+
+   python -m benchmarks.generation [--count COUNT]
+"""
+import argparse
+import time
+
+from openapi3 import OpenAPI
+
+from .common import SPEC
+
+#: Schemas of increasing size, added to the benchmark spec's components
+SCHEMAS = {
+    "Tag": {
+        "type": "object",
+        "required": ["id", "label"],
+        "properties": {
+            "id": {"type": "integer", "minimum": 1},
+            "label": {"type": "string", "pattern": "^[a-z]{3,8}$"},
+        },
+    },
+    "Pet": {
+        "type": "object",
+        "required": ["id", "name", "status"],
+        "properties": {
+            "id": {"type": "integer", "minimum": 1},
+            "name": {"type": "string", "minLength": 1, "maxLength": 20},
+            "status": {"type": "string", "enum": ["available", "pending", "sold"]},
+            "born": {"type": "string", "format": "date"},
+            "weight": {"type": "number", "minimum": 0, "maximum": 100},
+            "tags": {"type": "array", "items": {"$ref": "#/components/schemas/Tag"}},
+        },
+    },
+    "Owner": {
+        "type": "object",
+        "required": ["id", "email", "pets"],
+        "properties": {
+            "id": {"type": "string", "format": "uuid"},
+            "email": {"type": "string", "format": "email"},
+            "pets": {"type": "array", "items": {"$ref": "#/components/schemas/Pet"}, "minItems": 1},
+        },
+    },
+}
+
+
+def _rate(func, count):
+    """
+    Returns how many values per second ``func`` produces when asked for ``count``
+    """
+    start = time.perf_counter()
+    func(count)
+    return count / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--count", type=int, default=100000, help="the number of values to generate per schema")
+    args = parser.parse_args()
+
+    spec = dict(SPEC, components={"schemas": dict(SPEC["components"]["schemas"], **SCHEMAS)})
+    api = OpenAPI(spec)
+
+    print("{:<10} {:>16} {:>16}".format("schema", "generated/s", "models/s"))
+    for name in ["Region"] + list(SCHEMAS):
+        schema = api.components.schemas[name]
+        # compile the schema first, so that only generation is measured
+        schema.generate(1)
+
+        generated = _rate(lambda n: schema.generate(n, seed=1), args.count)
+        values = schema.generate(args.count, seed=1)
+        models = _rate(lambda n: [schema.model(c) for c in values[:n]], args.count)
+        print("{:<10} {:>16.0f} {:>16.0f}".format(name, generated, models))
+
+
+if __name__ == "__main__":
+    main()
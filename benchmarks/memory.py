@@ -0,0 +1,123 @@
+"""
+Measures the memory taken to parse specs of increasing size, and to build
+models from responses, with tracemalloc.  Run from the root of the project
+with::
+
+   python -m benchmarks.memory [--models COUNT] [--output FILE] [--baseline FILE]
+
+For each spec, the memory retained once it's parsed is compared with what
+``OpenAPI.memory_report`` accounts for.  ``--output`` saves the results as
+JSON, and ``--baseline`` compares them to results saved earlier, to track
+the footprint across releases.
+"""
+import argparse
+import copy
+import gc
+import os
+import tracemalloc
+
+import yaml
+
+from openapi3 import OpenAPI
+
+from .common import SPEC, compare_results, save_results
+
+SIZES = [10, 100, 1000]
+
+PETSTORE = os.path.join(os.path.dirname(__file__), "..", "tests", "fixtures", "petstore-expanded.yaml")
+
+
+def _spec(size):
+    """
+    Returns a spec with ``size`` copies of the benchmark spec's operation, each
+    returning its own schema
+    """
+    operation = SPEC["paths"]["/regions/{id}"]["get"]
+    region = SPEC["components"]["schemas"]["Region"]
+    paths = {}
+    schemas = {}
+    for i in range(size):
+        operation = copy.deepcopy(operation)
+        operation["operationId"] = "getRegion{}".format(i)
+        content = operation["responses"]["200"]["content"]["application/json"]
+        content["schema"] = {"$ref": "#/components/schemas/Region{}".format(i)}
+        paths["/regions{}/{{id}}".format(i)] = {"get": operation}
+        schemas["Region{}".format(i)] = copy.deepcopy(region)
+    return dict(SPEC, paths=paths, components={"schemas": schemas})
+
+
+def _measure(func):
+    """
+    Calls ``func``, returning what it returned, and the memory it retained and
+    its peak, in bytes
+    """
+    gc.collect()
+    tracemalloc.start()
+    try:
+        result = func()
+        gc.collect()
+        retained, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, retained, peak
+
+
+def _parse(raw):
+    """
+    Measures parsing a spec, and compares what's retained with its memory report
+    """
+    # the raw spec is retained by the parsed spec, so it's copied in the
+    # measurement; the copy is also measured on its own, to show its share
+    _, raw_size, _ = _measure(lambda: copy.deepcopy(raw))
+    api, retained, peak = _measure(lambda: OpenAPI(copy.deepcopy(raw)))
+    return {
+        "retained": retained,
+        "raw": raw_size,
+        "peak": peak,
+        "reported": api.memory_report()["total"],
+    }
+
+
+def _models(count):
+    """
+    Measures building models from generated responses
+    """
+    api = OpenAPI(_spec(1))
+    schema = api.components.schemas["Region0"]
+    values = schema.generate(count, seed=1)
+    schema.model(values[0])
+
+    models, retained, peak = _measure(lambda: [schema.model(c) for c in values])
+    return {"retained": retained / len(models), "peak": peak / len(models)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--models", type=int, default=10000, help="the number of models to build")
+    parser.add_argument("--output", help="a file to save the results to, as JSON")
+    parser.add_argument("--baseline", help="results saved earlier, to compare against")
+    args = parser.parse_args()
+
+    with open(PETSTORE) as f:
+        specs = [("petstore", yaml.safe_load(f.read()))]
+    specs += [("{} paths".format(c), _spec(c)) for c in SIZES]
+
+    results = {}
+    print("{:<16} {:>14} {:>14} {:>14} {:>14}".format("spec (KiB)", "retained", "raw", "peak", "reported"))
+    for name, raw in specs:
+        results[name] = _parse(raw)
+        print("{:<16}".format(name) + "".join("{:>15.1f}".format(c / 1024) for c in results[name].values()))
+
+    results["models"] = _models(args.models)
+    print()
+    print("{:<16} {:>14} {:>14}".format("bytes/model", "retained", "peak"))
+    print("{:<16}".format("Region") + "".join("{:>15.1f}".format(c) for c in results["models"].values()))
+
+    if args.output:
+        save_results(args.output, results, models=args.models)
+    if args.baseline:
+        compare_results(args.baseline, results)
+
+
+if __name__ == "__main__":
+    main()
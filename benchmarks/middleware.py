@@ -0,0 +1,114 @@
+"""
+Measures the time the validation middleware adds to each request, calling the
+FastAPI app in tests/api in-process with and without it, and calling a
+trivial app to show the middleware's own cost.  Run from the root of the
+project with::
+
+   python -m benchmarks.middleware [--requests COUNT] [--rounds COUNT]
+
+Each figure is the best of several rounds, as the FastAPI app's own times vary
+from round to round.
+"""
+import argparse
+import asyncio
+import copy
+import json
+import os
+import sys
+import time
+
+from openapi3 import OpenAPI
+from openapi3.middleware import ASGIValidationMiddleware
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "tests"))
+
+from api.main import app  # noqa: E402  pylint: disable=wrong-import-position
+
+PET = json.dumps({"pet": {"name": "benchmark", "tag": "dog"}}).encode()
+
+#: The requests measured, as method, path, query string and body
+REQUESTS = [
+    ("GET", "/pets/1", b"", None),
+    ("GET", "/pet", b"limit=10", None),
+    ("POST", "/pet", b"", PET),
+]
+
+
+def _scope(method, path, query_string, body):
+    headers = [(b"host", b"testserver")]
+    if body is not None:
+        headers += [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())]
+    return {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": query_string,
+        "root_path": "",
+        "headers": headers,
+        "server": ("testserver", 80),
+        "client": ("127.0.0.1", 0),
+    }
+
+
+async def _empty_app(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"application/json")]})
+    await send({"type": "http.response.body", "body": b'{"id":1,"name":"benchmark"}'})
+
+
+async def _measure(target, count, method, path, query_string, body):
+    """
+    Returns the mean time, in microseconds, taken to call an ASGI app
+    """
+    scope = _scope(method, path, query_string, body)
+    message = {"type": "http.request", "body": body or b"", "more_body": False}
+
+    async def receive():
+        return message
+
+    async def send(message):
+        pass
+
+    start = time.perf_counter()
+    for _ in range(count):
+        await target(scope, receive, send)
+    return (time.perf_counter() - start) / count * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=2000, help="the number of requests to measure per round")
+    parser.add_argument("--rounds", type=int, default=5, help="the number of rounds to take the best of")
+    args = parser.parse_args()
+
+    spec = copy.deepcopy(app.openapi())
+    api = OpenAPI(spec)
+
+    targets = [
+        ("fastapi", app),
+        ("fastapi + middleware", ASGIValidationMiddleware(app, api)),
+        ("fastapi + middleware, responses", ASGIValidationMiddleware(app, api, response_sample_rate=1)),
+        ("empty app", _empty_app),
+        ("empty app + middleware", ASGIValidationMiddleware(_empty_app, api)),
+    ]
+
+    loop = asyncio.new_event_loop()
+    # create the pet first, so that every app lists the same pets
+    for c in REQUESTS:
+        loop.run_until_complete(_measure(app, 1, *c))
+
+    print("{:<34}".format("app (µs/request)") + "".join("{:>16}".format(c[0] + " " + c[1]) for c in REQUESTS))
+    for name, target in targets:
+        times = [
+            min(loop.run_until_complete(_measure(target, args.requests, *c)) for _ in range(args.rounds))
+            for c in REQUESTS
+        ]
+        print("{:<34}".format(name) + "".join("{:>16.1f}".format(c) for c in times))
+    loop.close()
+
+
+if __name__ == "__main__":
+    main()
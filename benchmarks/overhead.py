@@ -0,0 +1,241 @@
+"""
+Measures what each call costs in this library, with the network taken out.
+Each phase of a call (creating the callable, security, parameters, body
+serialization, preparing the request, finding the response's media type,
+decoding and building the model) is timed on its own for small, large and
+deeply nested payloads, then whole calls are timed in-process and against a
+local server, alongside the same requests made with requests directly.  Run
+from the root of the project with::
+
+   python -m benchmarks.overhead [--duration SECONDS] [--output FILE] [--baseline FILE]
+
+``--output`` saves the results as JSON, and ``--baseline`` compares them to
+results saved earlier, to track regressions.
+"""
+import argparse
+import requests
+
+from openapi3 import OpenAPI
+from openapi3.codec import DEFAULT_CODEC
+from openapi3.transports import RequestsTransport, TransportResponse, WSGITransport
+
+from .common import compare_results, measure, save_results, serve
+
+#: How many items the large payload holds, and how deep the nested one goes
+LARGE_ITEMS = 1000
+NESTED_DEPTH = 10
+
+#: The phases timed on their own, and the whole calls timed, in order
+PHASES = ("dispatch", "security", "parameters", "body", "prepare", "media", "decode", "model")
+CALLS = ("call in-process", "call local", "requests local", "overhead local")
+
+ITEM_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "id": {"type": "integer"},
+        "name": {"type": "string"},
+        "price": {"type": "number"},
+        "tags": {"type": "array", "items": {"type": "string"}},
+    },
+}
+
+
+def _item(i):
+    return {"id": i, "name": "item {}".format(i), "price": i * 1.5, "tags": ["a", "b"]}
+
+
+def _nested(depth):
+    value = _item(depth)
+    if depth:
+        value["child"] = _nested(depth - 1)
+    return value
+
+
+def _schemas():
+    """
+    Returns the schemas of the small, large and nested payloads.  The levels
+    of the nested payload are distinct schemas, as a schema nested in itself
+    can't be parsed.
+    """
+    schemas = {
+        "Item": ITEM_SCHEMA,
+        "Items": {"type": "array", "items": {"$ref": "#/components/schemas/Item"}},
+    }
+    for depth in range(NESTED_DEPTH + 1):
+        level = {"type": "object", "properties": dict(ITEM_SCHEMA["properties"])}
+        if depth:
+            level["properties"]["child"] = {"$ref": "#/components/schemas/Level{}".format(depth - 1)}
+        schemas["Level{}".format(depth)] = level
+    return schemas
+
+
+#: The payloads, by name, with the schema describing each
+PAYLOADS = {
+    "small": (_item(1), "Item"),
+    "large": ([_item(i) for i in range(LARGE_ITEMS)], "Items"),
+    "nested": (_nested(NESTED_DEPTH), "Level{}".format(NESTED_DEPTH)),
+}
+
+
+def _spec():
+    """
+    Returns a spec getting and putting each payload, with path, query and
+    header parameters and an API key
+    """
+    paths = {}
+    for name, (_, schema) in PAYLOADS.items():
+        content = {"application/json": {"schema": {"$ref": "#/components/schemas/" + schema}}}
+        responses = {"200": {"description": "The payload", "content": content}}
+        paths["/{}/{{id}}".format(name)] = {
+            "parameters": [
+                {"name": "id", "in": "path", "required": True, "schema": {"type": "integer"}},
+                {"name": "X-Request-Id", "in": "header", "schema": {"type": "string"}},
+            ],
+            "get": {
+                "operationId": "get_" + name,
+                "security": [{"apiKey": []}],
+                "parameters": [
+                    {"name": "fields", "in": "query", "schema": {"type": "array", "items": {"type": "string"}}},
+                    {"name": "limit", "in": "query", "schema": {"type": "integer"}},
+                ],
+                "responses": responses,
+            },
+            "put": {
+                "operationId": "put_" + name,
+                "security": [{"apiKey": []}],
+                "requestBody": {"required": True, "content": content},
+                "responses": responses,
+            },
+        }
+    return {
+        "openapi": "3.0.0",
+        "info": {"title": "Overhead Benchmark API", "version": "1.0.0"},
+        "servers": [{"url": "http://127.0.0.1"}],
+        "paths": paths,
+        "components": {
+            "schemas": _schemas(),
+            "securitySchemes": {"apiKey": {"type": "apiKey", "in": "header", "name": "X-API-Key"}},
+        },
+    }
+
+
+PARAMETERS = {"id": 1, "fields": ["id", "name", "tags"], "limit": 10, "X-Request-Id": "abc123"}
+
+BODIES = {"/{}/1".format(name): DEFAULT_CODEC.dumps(value) for name, (value, _) in PAYLOADS.items()}
+
+
+def _wsgi_app(environ, start_response):
+    """
+    Answers each request with its payload, as the local server does
+    """
+    body = BODIES[environ["PATH_INFO"]]
+    start_response("200 OK", [("Content-Type", "application/json"), ("Content-Length", str(len(body)))])
+    return [body]
+
+
+def _time(func, duration):
+    """
+    Returns the time taken by each call to ``func``, in microseconds
+    """
+    func()
+    return 1e6 / measure(func, duration)
+
+
+def _phases(api, name, duration):
+    """
+    Times each phase of calling the operations for a payload on its own
+    """
+    value, schema_name = PAYLOADS[name]
+    get = api._operation_map["get_" + name]  # pylint: disable=protected-access
+    put = api._operation_map["put_" + name]  # pylint: disable=protected-access
+    requirement = get.security[0]
+    body = BODIES["/{}/1".format(name)]
+    response = TransportResponse(200, {"Content-Type": "application/json"}, body)
+    data = DEFAULT_CODEC.loads(body)
+    schema = api.components.schemas[schema_name]
+
+    def request():
+        return requests.Request("GET", "http://127.0.0.1/{}/{{id}}".format(name))
+
+    def prepare(operation):
+        r = request()
+        operation._request_handle_parameters(r, PARAMETERS)  # pylint: disable=protected-access
+        return r
+
+    prepared = prepare(get)
+    # building the request is timed with each phase, so it's subtracted
+    empty = _time(request, duration)
+    return {
+        "dispatch": _time(lambda: getattr(api, "call_get_" + name), duration),
+        "security": _time(
+            lambda: get._request_handle_secschemes(request(), requirement, "key"),  # pylint: disable=protected-access
+            duration,
+        )
+        - empty,
+        "parameters": _time(lambda: prepare(get), duration) - empty,
+        "body": _time(
+            lambda: put._request_handle_body(request(), value, DEFAULT_CODEC),  # pylint: disable=protected-access
+            duration,
+        )
+        - empty,
+        "prepare": _time(prepared.prepare, duration),
+        "media": _time(lambda: get._request_find_media(response), duration),  # pylint: disable=protected-access
+        "decode": _time(lambda: DEFAULT_CODEC.loads(body), duration),
+        "model": _time(lambda: schema.model(data), duration),
+    }
+
+
+def _calls(spec, base_url, name, duration):
+    """
+    Times whole calls for a payload, through this library in-process and
+    against the local server, and through requests against the local server
+    """
+    in_process = OpenAPI(spec, transport=WSGITransport(_wsgi_app))
+    in_process.authenticate("apiKey", "key")
+    local = OpenAPI(spec, transport=RequestsTransport())
+    local.servers[0].url = base_url
+    local.authenticate("apiKey", "key")
+
+    session = requests.Session()
+    url = "{}/{}/1".format(base_url, name)
+    query = {"fields": PARAMETERS["fields"], "limit": PARAMETERS["limit"]}
+    headers = {"X-Request-Id": PARAMETERS["X-Request-Id"], "X-API-Key": "key"}
+
+    times = {
+        "call in-process": _time(lambda: getattr(in_process, "call_get_" + name)(parameters=PARAMETERS), duration),
+        "call local": _time(lambda: getattr(local, "call_get_" + name)(parameters=PARAMETERS), duration),
+        "requests local": _time(lambda: session.get(url, params=query, headers=headers).json(), duration),
+    }
+    times["overhead local"] = times["call local"] - times["requests local"]
+    session.close()
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--duration", type=float, default=0.5, help="seconds to run each measurement for")
+    parser.add_argument("--output", help="a file to save the results to, as JSON")
+    parser.add_argument("--baseline", help="results saved earlier, to compare against")
+    args = parser.parse_args()
+
+    spec = _spec()
+    api = OpenAPI(spec)
+    base_url, server = serve(BODIES)
+
+    results = {}
+    columns = PHASES + CALLS
+    print("{:<8}".format("µs/call") + "".join("{:>16}".format(c) for c in columns))
+    for name in PAYLOADS:
+        results[name] = _phases(api, name, args.duration)
+        results[name].update(_calls(spec, base_url, name, args.duration))
+        print("{:<8}".format(name) + "".join("{:>16.1f}".format(results[name][c]) for c in columns))
+    server.shutdown()
+
+    if args.output:
+        save_results(args.output, results, codec=type(DEFAULT_CODEC).__name__, duration=args.duration)
+    if args.baseline:
+        compare_results(args.baseline, results, skip=("overhead local",))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Measures how quickly large array parameters are serialized by each style, and
+deserialized again, compared to letting requests encode the same array.  Run
+from the root of the project with::
+
+   python -m benchmarks.parameters [--duration SECONDS] [--size ITEMS]
+"""
+import argparse
+from urllib.parse import urlencode
+
+from openapi3.parameters import ParameterCodec, parse_query
+
+from .common import measure
+
+STYLES = [
+    ("query", "form", True),
+    ("query", "form", False),
+    ("query", "pipeDelimited", False),
+    ("query", "spaceDelimited", False),
+    ("path", "simple", False),
+    ("path", "label", True),
+    ("path", "matrix", True),
+]
+
+
+class _Schema:
+    """
+    An array of integers, as a parsed Schema would describe it
+    """
+
+    type = "array"
+    properties = None
+
+    class items:
+        type = "integer"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--duration", type=float, default=1.0, help="seconds to run each measurement for")
+    parser.add_argument("--size", type=int, default=1000, help="the number of items in the array")
+    args = parser.parse_args()
+
+    value = list(range(args.size))
+
+    print("{:<40} {:>14} {:>14}".format("style", "serialize/s", "deserialize/s"))
+
+    rps = measure(lambda: urlencode({"ids": value}, doseq=True), args.duration)
+    print("{:<40} {:>14.0f} {:>14}".format("requests (urlencode, doseq)", rps, "-"))
+
+    for location, style, explode in STYLES:
+        codec = ParameterCodec("ids", location, style, explode, schema=_Schema)
+        serialized = codec.serialize(value)
+        if location == "query":
+            serialized = parse_query("&".join("{}={}".format(k, v) for k, v in serialized))
+
+        serialize = measure(lambda: codec.serialize(value), args.duration)
+        deserialize = measure(lambda: codec.deserialize(serialized), args.duration)
+        name = "{} {} (explode={})".format(location, style, explode)
+        print("{:<40} {:>14.0f} {:>14.0f}".format(name, serialize, deserialize))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Measures how quickly requests are matched to operations as the number of paths
+in a spec grows, compared to trying a regular expression for each path in
+turn.  Run from the root of the project with::
+
+   python -m benchmarks.routing [--duration SECONDS]
+"""
+import argparse
+import re
+
+from openapi3 import OpenAPI
+
+from .common import SPEC, measure
+
+SIZES = [10, 100, 1000]
+
+
+def _spec(size):
+    """
+    Returns a spec with ``size`` paths like ``/resources12/{id}/items/{itemId}``
+    """
+    operation = SPEC["paths"]["/regions/{id}"]["get"]
+    paths = {}
+    for i in range(size):
+        paths["/resources{}/{{id}}/items/{{itemId}}".format(i)] = {
+            "get": dict(
+                operation,
+                operationId="get{}".format(i),
+                parameters=[
+                    {"name": c, "in": "path", "required": True, "schema": {"type": "string"}} for c in ("id", "itemId")
+                ],
+            )
+        }
+    return dict(SPEC, paths=paths)
+
+
+def _linear(api):
+    """
+    Returns a function matching paths by trying each path's pattern in turn
+    """
+    patterns = [
+        (re.compile("^{}$".format(re.sub(r"{([^}]+)}", r"(?P<\1>[^/]+)", template))), path.get)
+        for template, path in api.paths.items()
+    ]
+
+    def match(path):
+        for pattern, operation in patterns:
+            m = pattern.match(path)
+            if m is not None:
+                return operation, m.groupdict()
+
+    return match
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--duration", type=float, default=1.0, help="seconds to run each measurement for")
+    args = parser.parse_args()
+
+    print("{:<10} {:>14} {:>14}".format("paths", "match/s", "linear/s"))
+    for size in SIZES:
+        api = OpenAPI(_spec(size))
+        # match the last path declared, the worst case for a linear scan
+        path = "/resources{}/1/items/2".format(size - 1)
+        linear = _linear(api)
+        assert api.match("GET", path) == linear(path)
+
+        trie = measure(lambda: api.match("GET", path), args.duration)
+        scan = measure(lambda: linear(path), args.duration)
+        print("{:<10} {:>14.0f} {:>14.0f}".format(size, trie, scan))
+
+
+if __name__ == "__main__":
+    main()
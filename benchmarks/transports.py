@@ -0,0 +1,52 @@
+"""
+Compares the requests per second each transport achieves calling a single
+operation against a local server.  The in-process transports call an
+equivalent application directly, measuring the overhead of the library alone.
+Run from the root of the project with::
+
+   python -m benchmarks.transports [--duration SECONDS]
+"""
+import argparse
+
+from openapi3 import OpenAPI
+from openapi3.transports import (
+    ASGITransport,
+    HTTPClientTransport,
+    RequestsTransport,
+    Urllib3Transport,
+    WSGITransport,
+)
+
+from .common import SPEC, asgi_app, measure, serve, wsgi_app
+
+TRANSPORTS = [
+    ("default (requests, one session per operation)", lambda: None),
+    ("RequestsTransport", RequestsTransport),
+    ("Urllib3Transport", Urllib3Transport),
+    ("HTTPClientTransport", HTTPClientTransport),
+    ("WSGITransport (in-process)", lambda: WSGITransport(wsgi_app)),
+    ("ASGITransport (in-process)", lambda: ASGITransport(asgi_app)),
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--duration", type=float, default=3.0, help="seconds to run each transport for")
+    args = parser.parse_args()
+
+    base_url, server = serve()
+
+    print("{:<50} {:>10}".format("transport", "req/s"))
+    for name, factory in TRANSPORTS:
+        api = OpenAPI(SPEC, transport=factory())
+        api.servers[0].url = base_url
+
+        call = api.call_getRegion
+        rps = measure(lambda: call(parameters={"id": "us-east"}), args.duration)
+        print("{:<50} {:>10.0f}".format(name, rps))
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -3,6 +3,21 @@ from .openapi import OpenAPI
 # these imports appear unused, but in fact load up the subclasses ObjectBase so
 # that they may be referenced throughout the schema without issue
 from . import info, servers, paths, general, schemas, components, security, tag, example
-from .errors import SpecError, ReferenceResolutionError, UnexpectedResponseError
+from .errors import (
+    SpecError,
+    ReferenceResolutionError,
+    RequestValidationError,
+    ResponseValidationError,
+    UnexpectedResponseError,
+    TransportError,
+)
 
-__all__ = ["OpenAPI", "SpecError", "ReferenceResolutionError", "UnexpectedResponseError"]
+__all__ = [
+    "OpenAPI",
+    "SpecError",
+    "ReferenceResolutionError",
+    "RequestValidationError",
+    "ResponseValidationError",
+    "UnexpectedResponseError",
+    "TransportError",
+]
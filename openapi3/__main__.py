@@ -4,9 +4,7 @@ import yaml
 from .openapi import OpenAPI
 
 
-def main():
-    specfile = sys.argv[1]
-
+def validate(specfile):
     with open(specfile) as f:
         spec = yaml.safe_load(f.read())
 
@@ -25,5 +23,18 @@ def main():
         print("OK")
 
 
+def main():
+    if sys.argv[1] == "mock":
+        from .mock import main as mock  # pylint: disable=import-outside-toplevel
+
+        mock(sys.argv[2:])
+    elif sys.argv[1] == "loadtest":
+        from .loadtest import main as loadtest  # pylint: disable=import-outside-toplevel
+
+        loadtest(sys.argv[2:])
+    else:
+        validate(sys.argv[1])
+
+
 if __name__ == "__main__":
     main()
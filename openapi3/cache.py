@@ -0,0 +1,272 @@
+import threading
+import time
+from collections import OrderedDict
+from email.utils import parsedate_to_datetime
+
+
+def _parse_cache_control(value):
+    """
+    Parses a Cache-Control header into a dict of directives.  Directives without
+    values map to True.
+    """
+    directives = {}
+    for part in (value or "").split(","):
+        name, _, arg = part.strip().partition("=")
+        if name:
+            directives[name.lower()] = arg.strip('"') if arg else True
+    return directives
+
+
+def _parse_http_date(value):
+    """
+    Returns the POSIX timestamp of an HTTP date, or None if it can't be parsed
+    """
+    try:
+        return parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError, IndexError):
+        return None
+
+
+class CacheEntry:
+    """
+    A cached response.  The model built from the response is kept, not the
+    response itself, so that hits skip decoding entirely.
+    """
+
+    __slots__ = ["model", "etag", "last_modified", "expires", "size"]
+
+    def __init__(self, model, etag, last_modified, expires, size):
+        self.model = model
+        self.etag = etag
+        self.last_modified = last_modified
+        self.expires = expires
+        self.size = size
+
+
+class ResponseCache:
+    """
+    An opt-in cache of the models returned by GET operations, configured per
+    :any:`OpenAPI` instance with the ``cache`` argument.
+
+    Responses are cached by method, URL and the request headers named in their
+    Vary header, according to their Cache-Control and Expires headers.  Stale
+    entries with an ETag or Last-Modified header are revalidated with a
+    conditional request, and a 304 response returns the cached model.  The
+    least recently used entries are evicted once either ``max_entries`` or
+    ``max_bytes`` is exceeded.
+
+    Cached models are shared between every caller that receives them, and
+    should not be modified.
+    """
+
+    def __init__(self, max_entries=1024, max_bytes=64 * 1024 * 1024, default_ttl=None):
+        """
+        :param max_entries: The most responses to keep
+        :type max_entries: int
+        :param max_bytes: The most response bytes to keep, measured by the size
+                          of the response bodies the models were built from
+        :type max_bytes: int
+        :param default_ttl: How long, in seconds, to cache responses that don't
+                            say how long they may be cached.  If None, these
+                            are only cached if they can be revalidated.
+        :type default_ttl: float
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+
+        self._entries = OrderedDict()
+        self._vary = {}
+        self._bytes = 0
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def size(self):
+        """
+        The number of response bytes currently cached
+        """
+        return self._bytes
+
+    def _count(self, operation, stat):
+        """
+        Increments a statistic for the given operation.  Must be called with
+        the lock held.
+        """
+        stats = self._stats.get(operation.operationId)
+        if stats is None:
+            stats = self._stats[operation.operationId] = {"hits": 0, "misses": 0, "revalidated": 0}
+        stats[stat] += 1
+
+    def _key(self, request, vary):
+        """
+        Returns the key a request is cached under
+        """
+        headers = request.headers
+        # credentials always vary the response, whether the server says so or not
+        varied = tuple(headers.get(c) for c in vary) + (headers.get("Authorization"), headers.get("Cookie"))
+        return request.method, request.url, varied
+
+    def lookup(self, operation, request):
+        """
+        Looks up the cached model for a request.  If a stale entry is found, the
+        request is updated with the headers needed to revalidate it.
+
+        :param operation: The operation making the request
+        :type operation: Operation
+        :param request: The request about to be sent
+        :type request: requests.PreparedRequest
+
+        :returns: The entry found, if any, and whether it is fresh
+        :rtype: tuple[CacheEntry, bool]
+        """
+        with self._lock:
+            vary = self._vary.get((request.method, request.url), ())
+            key = self._key(request, vary)
+            entry = self._entries.get(key)
+
+            if entry is not None and entry.expires > time.time():
+                self._entries.move_to_end(key)
+                self._count(operation, "hits")
+                return entry, True
+
+            self._count(operation, "misses")
+
+        if entry is None or (entry.etag is None and entry.last_modified is None):
+            # nothing cached, or nothing to revalidate a stale entry with
+            return None, False
+
+        if entry.etag is not None:
+            request.headers["If-None-Match"] = entry.etag
+        if entry.last_modified is not None:
+            request.headers["If-Modified-Since"] = entry.last_modified
+
+        return entry, False
+
+    def _expires(self, response):
+        """
+        Returns when a response expires, or None if it must not be stored
+        """
+        cache_control = _parse_cache_control(response.headers.get("Cache-Control"))
+
+        if "no-store" in cache_control:
+            return None
+        if "no-cache" in cache_control:
+            return 0
+
+        now = time.time()
+        if "max-age" in cache_control:
+            try:
+                age = int(response.headers.get("Age", 0))
+                return now + int(cache_control["max-age"]) - age
+            except ValueError:
+                return 0
+
+        if "Expires" in response.headers:
+            expires = _parse_http_date(response.headers["Expires"])
+            if expires is None:
+                # invalid dates (like "0") mean "already expired"
+                return 0
+            # allow for the server's clock being off from ours
+            date = _parse_http_date(response.headers.get("Date"))
+            return expires - (date or now) + now
+
+        if self.default_ttl is not None:
+            return now + self.default_ttl
+        return 0
+
+    def store(self, operation, request, response, model):
+        """
+        Stores the model built from a response, if the response allows it
+
+        :param operation: The operation that made the request
+        :type operation: Operation
+        :param request: The request sent
+        :type request: requests.PreparedRequest
+        :param response: The response received
+        :type response: requests.Response
+        :param model: The model built from the response
+        :type model: Model
+        """
+        vary = tuple(c.strip() for c in response.headers.get("Vary", "").split(",") if c.strip())
+        if "*" in vary:
+            return
+
+        expires = self._expires(response)
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+        if expires is None or (expires <= time.time() and etag is None and last_modified is None):
+            # this can't be stored, or would be useless as soon as it was
+            return
+
+        size = len(response.content or b"")
+        if size > self.max_bytes:
+            return
+
+        entry = CacheEntry(model, etag, last_modified, expires, size)
+        with self._lock:
+            self._vary[(request.method, request.url)] = vary
+            key = self._key(request, vary)
+
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old.size
+
+            self._entries[key] = entry
+            self._bytes += size
+
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted.size
+
+    def revalidated(self, operation, request, entry, response):
+        """
+        Refreshes an entry after the server responded 304 Not Modified to a
+        conditional request, and returns its model.
+
+        :param operation: The operation that made the request
+        :type operation: Operation
+        :param request: The request sent
+        :type request: requests.PreparedRequest
+        :param entry: The entry that was revalidated
+        :type entry: CacheEntry
+        :param response: The 304 response received
+        :type response: requests.Response
+
+        :returns: The cached model
+        :rtype: Model
+        """
+        expires = self._expires(response)
+        with self._lock:
+            self._count(operation, "revalidated")
+            if expires is not None:
+                entry.expires = expires
+            entry.etag = response.headers.get("ETag", entry.etag)
+            entry.last_modified = response.headers.get("Last-Modified", entry.last_modified)
+
+        return entry.model
+
+    def stats(self):
+        """
+        Returns the number of hits and misses seen by each operation using this
+        cache.  Hits were answered without a request; misses needed one, and
+        those that were answered with a 304 Not Modified are also counted as
+        revalidated.
+
+        :returns: A dict of operationId to a dict of statistics
+        :rtype: dict[str, dict[str, int]]
+        """
+        with self._lock:
+            return {k: dict(v) for k, v in self._stats.items()}
+
+    def clear(self):
+        """
+        Removes all entries from the cache
+        """
+        with self._lock:
+            self._entries.clear()
+            self._vary.clear()
+            self._bytes = 0
@@ -0,0 +1,270 @@
+import json
+import math
+from json.encoder import encode_basestring
+from operator import attrgetter
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+try:
+    import ujson
+except ImportError:  # pragma: no cover
+    ujson = None
+
+from .schemas import Model
+
+
+def model_to_dict(model):
+    """
+    Returns the plain data a model holds, converting the models nested in it
+    too, for encodings that need plain data throughout, like forms and
+    parameters.  Properties that are None are omitted from the model itself,
+    but kept in nested models.  The codecs don't need this copy; they write
+    models straight to JSON.
+
+    :param model: The model to convert
+    :type model: Model
+
+    :rtype: dict
+    """
+    return {k: _plain(v) for k, v in model if v is not None}
+
+
+def _plain(value):
+    """
+    Converts any models found in a value into plain data
+    """
+    if isinstance(value, Model):
+        return {k: _plain(v) for k, v in value}
+    if isinstance(value, list):
+        return [_plain(c) for c in value]
+    return value
+
+
+#: Values that are always encoded by the JSON library, without looking inside
+_PLAIN = (str, int, float, bool, type(None))
+
+#: Arrays and objects this small are written item by item, which is quicker
+#: than calling the JSON library for them; larger ones without models in them
+#: are handed to the library
+_INLINE_ITEMS = 16
+
+# how each property is written by a model type's writer; its own fields are
+# written inline, and anything else is left to _encode
+_WRITE_PROPERTY = """
+    c = v{i}.__class__
+    if c is str:
+        p.append(K{i} + esc(v{i}))
+    elif c is int:
+        p.append(K{i} + int_repr(v{i}))
+    elif v{i} is None:
+        if not top:
+            p.append(K{i} + "null")
+    else:
+        p.append(K{i} + encode(v{i}, text))"""
+
+
+def _compile_writer(model_type):
+    """
+    Compiles a function writing the models of a type straight to JSON text,
+    much as :any:`collections.namedtuple` compiles its methods.  Its properties
+    are read in one go, and strings and integers, the most common, are written
+    without calling anything else.  Properties that are None are left out of a
+    model encoded on its own, but kept in nested models.
+    """
+    names = [c for c in model_type.__slots__ if not c.startswith("_")]
+    if not names:
+        return lambda model, top, text: "{}"
+
+    namespace = {
+        "get": attrgetter(*names) if len(names) > 1 else lambda model: (getattr(model, names[0]),),
+        "esc": encode_basestring,
+        "int_repr": int.__repr__,
+        "encode": _encode,
+    }
+    lines = ["def write(model, top, text):"]
+    lines.append("    {}, = get(model)".format(", ".join("v{}".format(i) for i in range(len(names)))))
+    lines.append("    p = []")
+    for i, name in enumerate(names):
+        namespace["K{}".format(i)] = encode_basestring(name) + ":"
+        lines.append(_WRITE_PROPERTY.format(i=i))
+    lines.append('    return "{" + ",".join(p) + "}"')
+
+    exec("\n".join(lines), namespace)  # pylint: disable=exec-used
+    return namespace["write"]
+
+
+def _writer(model_type):
+    """
+    Returns the writer for a model type, compiling it the first time one of its
+    models is encoded.  It's cached on the generated type.
+    """
+    writer = model_type.__dict__.get("_json_writer")
+    if writer is None:
+        writer = model_type._json_writer = _compile_writer(model_type)
+    return writer
+
+
+def _key(key):
+    """
+    Encodes the key of an object as the JSON libraries do
+    """
+    if isinstance(key, str):
+        return encode_basestring(key)
+    if isinstance(key, bool) or key is None:
+        return '"{}"'.format(json.dumps(key))
+    return encode_basestring(str(key))
+
+
+def _encode(value, text):
+    """
+    Encodes a value that may hold models as JSON text.  Models are written by
+    their type's writer; large arrays and objects without models in them, and
+    anything else, are handed to the JSON library, through ``text``.
+    """
+    kind = value.__class__
+    if kind is str:
+        return encode_basestring(value)
+    if kind is int:
+        return int.__repr__(value)
+    if value is None:
+        return "null"
+    if kind is bool:
+        return "true" if value else "false"
+    if kind is float and math.isfinite(value):
+        return float.__repr__(value)
+    if isinstance(value, Model):
+        return _writer(kind)(value, False, text)
+    if isinstance(value, (list, tuple)):
+        if len(value) <= _INLINE_ITEMS or any(c.__class__ not in _PLAIN for c in value):
+            return "[" + ",".join([_encode(c, text) for c in value]) + "]"
+    elif isinstance(value, dict):
+        if len(value) <= _INLINE_ITEMS or any(c.__class__ not in _PLAIN for c in value.values()):
+            return "{" + ",".join([_key(k) + ":" + _encode(v, text) for k, v in value.items()]) + "}"
+    return text(value)
+
+
+class JSONCodec:
+    """
+    Encodes request bodies and decodes response bodies with the json module in
+    the standard library.  Subclasses use faster libraries when they're
+    installed; see :any:`get_codec`.
+    """
+
+    #: The name this codec is selected by
+    name = "json"
+
+    def dumps(self, value):
+        """
+        Encodes a value, which may be or contain models
+
+        :param value: The value to encode
+        :type value: any
+
+        :returns: The encoded JSON
+        :rtype: bytes
+        """
+        if isinstance(value, Model):
+            return _writer(type(value))(value, True, self._text).encode("utf-8")
+        try:
+            return self._dumps(value)
+        except TypeError:
+            # models inside other data are written with the data around them
+            return _encode(value, self._text).encode("utf-8")
+
+    def _dumps(self, value):
+        """
+        Encodes data without models in it with the JSON library
+        """
+        return self._text(value).encode("utf-8")
+
+    def _text(self, value):
+        """
+        Encodes data without models in it with the JSON library, as text
+        """
+        return json.dumps(value, separators=(",", ":"), ensure_ascii=False)
+
+    def loads(self, data):
+        """
+        Decodes a JSON document
+
+        :param data: The encoded document
+        :type data: bytes
+
+        :rtype: any
+        :raises ValueError: If the document is not valid JSON
+        """
+        return json.loads(data)
+
+    def decode(self, response):
+        """
+        Decodes the body of a response from its raw bytes, which skips the
+        charset detection requests.Response.json does.  Response objects without
+        a raw body are decoded with their own ``json`` method.
+
+        :param response: The response to decode
+        :type response: requests.Response, openapi3.transports.TransportResponse
+
+        :rtype: any
+        """
+        content = response.content
+        if isinstance(content, (bytes, bytearray, memoryview, str)):
+            return self.loads(content)
+        return response.json()
+
+
+class OrjsonCodec(JSONCodec):
+    """
+    Encodes and decodes JSON with `orjson <https://pypi.org/project/orjson/>`_
+    """
+
+    name = "orjson"
+
+    def _dumps(self, value):
+        return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS)
+
+    def _text(self, value):
+        return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS).decode("utf-8")
+
+    def loads(self, data):
+        return orjson.loads(data)
+
+
+class UjsonCodec(JSONCodec):
+    """
+    Encodes and decodes JSON with `ujson <https://pypi.org/project/ujson/>`_
+    """
+
+    name = "ujson"
+
+    def _text(self, value):
+        return ujson.dumps(value, ensure_ascii=False, escape_forward_slashes=False)
+
+    def loads(self, data):
+        return ujson.loads(data)
+
+
+#: The codecs available in this environment, fastest first
+CODECS = [c for c, module in ((OrjsonCodec, orjson), (UjsonCodec, ujson), (JSONCodec, json)) if module is not None]
+
+
+def get_codec(name=None):
+    """
+    Returns a codec by name, or the fastest available if no name is given
+
+    :param name: One of "orjson", "ujson" or "json"
+    :type name: str
+
+    :rtype: JSONCodec
+    :raises ValueError: If the named codec's library isn't installed
+    """
+    for codec in CODECS:
+        if name is None or codec.name == name:
+            return codec()
+    raise ValueError("JSON codec {} is not available (available: {})".format(name, ", ".join(c.name for c in CODECS)))
+
+
+#: The codec used when none is configured
+DEFAULT_CODEC = get_codec()
@@ -0,0 +1,171 @@
+import time
+import zlib
+
+from .forms import _file_size
+from .streaming import CHUNK_SIZE
+
+#: The content encodings request bodies may be compressed with, and the zlib
+#: window bits that produce them
+ENCODINGS = {"gzip": 16 + zlib.MAX_WBITS, "deflate": zlib.MAX_WBITS}
+
+
+def _body_size(body):
+    """
+    Returns the size of a request body, or None if it isn't known before it's
+    sent
+    """
+    if isinstance(body, str):
+        # close enough for comparing against a threshold
+        return len(body)
+    if isinstance(body, (bytes, bytearray)):
+        return len(body)
+    if isinstance(body, memoryview):
+        return body.nbytes
+    if hasattr(body, "read"):
+        return _file_size(body)
+    return getattr(body, "len", None)
+
+
+def _iter_chunks(body):
+    """
+    Yields a request body in chunks of bytes, without copying bodies held in
+    memory
+    """
+    if isinstance(body, str):
+        body = body.encode("utf-8")
+    if isinstance(body, (bytes, bytearray, memoryview)):
+        view = memoryview(body).cast("B")
+        for i in range(0, len(view), CHUNK_SIZE):
+            yield view[i : i + CHUNK_SIZE]
+    elif hasattr(body, "read"):
+        while True:
+            chunk = body.read(CHUNK_SIZE)
+            if not chunk:
+                return
+            yield chunk.encode("utf-8") if isinstance(chunk, str) else chunk
+    else:
+        for chunk in body:
+            yield chunk.encode("utf-8") if isinstance(chunk, str) else chunk
+
+
+class CompressedBody:
+    """
+    A request body compressed a chunk at a time as it's sent, so that the
+    compressed body is never held in memory in full.  Once it's been sent,
+    ``uncompressed_bytes``, ``compressed_bytes`` and ``time`` hold the sizes of
+    the body before and after compression and the time spent compressing it.
+    Bodies held in memory may be sent again; files and iterators can't.
+    """
+
+    def __init__(self, body, encoding="gzip", level=6):
+        """
+        :param body: The body to compress
+        :type body: str, bytes, file-like, iterable[bytes]
+        :param encoding: The content encoding to compress with, one of
+                         :any:`ENCODINGS`
+        :type encoding: str
+        :param level: The zlib compression level, from 1 (fastest) to 9
+                      (smallest)
+        :type level: int
+        """
+        self.body = body
+        self.encoding = encoding
+        self.level = level
+        self.uncompressed_bytes = 0
+        self.compressed_bytes = 0
+        self.time = 0
+
+    def __iter__(self):
+        self.uncompressed_bytes = self.compressed_bytes = 0
+        self.time = 0
+
+        compressor = zlib.compressobj(self.level, zlib.DEFLATED, ENCODINGS[self.encoding])
+        for chunk in _iter_chunks(self.body):
+            start = time.perf_counter()
+            compressed = compressor.compress(chunk)
+            self.time += time.perf_counter() - start
+            self.uncompressed_bytes += len(chunk)
+
+            # zlib holds on to small inputs until it has enough to compress
+            if compressed:
+                self.compressed_bytes += len(compressed)
+                yield compressed
+
+        start = time.perf_counter()
+        compressed = compressor.flush()
+        self.time += time.perf_counter() - start
+        self.compressed_bytes += len(compressed)
+        yield compressed
+
+
+class RequestCompression:
+    """
+    Compresses request bodies larger than a threshold.  Enabled for every
+    operation of an :any:`OpenAPI` instance with the ``compression`` argument;
+    operations may opt in or out with the ``x-compress`` extension, which may
+    also name the encoding to use::
+
+       x-compress: gzip
+    """
+
+    def __init__(self, encoding="gzip", min_size=1024, level=6):
+        """
+        :param encoding: The content encoding to compress with, one of
+                         :any:`ENCODINGS`
+        :type encoding: str
+        :param min_size: Bodies smaller than this many bytes are sent as they
+                         are.  Bodies whose size isn't known up front, such as
+                         iterators, are always compressed.
+        :type min_size: int
+        :param level: The zlib compression level, from 1 (fastest) to 9
+                      (smallest)
+        :type level: int
+        """
+        if encoding not in ENCODINGS:
+            raise ValueError("Unknown encoding {} (expected one of {})".format(encoding, ", ".join(ENCODINGS)))
+
+        self.encoding = encoding
+        self.min_size = min_size
+        self.level = level
+
+    @classmethod
+    def for_operation(cls, operation, compression=None):
+        """
+        Returns how requests to an operation are compressed, or None if they
+        aren't
+
+        :param operation: The operation being called
+        :type operation: Operation
+        :param compression: The compression configured for the client, if any
+        :type compression: RequestCompression
+
+        :rtype: RequestCompression
+        """
+        enabled = operation.extensions.get("compress", compression is not None)
+        if not enabled:
+            return None
+        if compression is None:
+            compression = cls()
+        if isinstance(enabled, str) and enabled != compression.encoding:
+            compression = cls(enabled, compression.min_size, compression.level)
+        return compression
+
+    def apply(self, request):
+        """
+        Compresses the body of a request if it's large enough, setting its
+        Content-Encoding header
+
+        :param request: The request to compress the body of, before it's
+                        prepared
+        :type request: requests.Request
+        """
+        body = request.data
+        if not body:
+            return
+
+        size = _body_size(body)
+        if size is not None and size < self.min_size:
+            return
+
+        request.data = CompressedBody(body, self.encoding, self.level)
+        request.headers["Content-Encoding"] = self.encoding
@@ -21,6 +21,48 @@ class ModelError(ValueError):
     """The data supplied to the Model mismatches the models attributes"""
 
 
+class RequestValidationError(ValueError):
+    """
+    This error is raised before a request is sent if request validation is
+    enabled and a parameter or the request body doesn't match its schema.
+    """
+
+    def __init__(self, message, path):
+        """
+        :param message: What is wrong with the value
+        :type message: str
+        :param path: Where the value is, such as ``data.items[0].name``
+        :type path: str
+        """
+        super().__init__("{}: {}".format(path, message))
+
+        #: What is wrong with the value
+        self.message = message
+        #: Where the value is, such as ``parameters.limit`` or ``data.items[0].name``
+        self.path = path
+
+
+class ResponseValidationError(ValueError):
+    """
+    This error is reported by the validation middleware when a sampled response
+    from an application doesn't match the responses its operation documents.
+    """
+
+    def __init__(self, message, path):
+        """
+        :param message: What is wrong with the response
+        :type message: str
+        :param path: Where the value is, such as ``response.items[0].name``
+        :type path: str
+        """
+        super().__init__("{}: {}".format(path, message))
+
+        #: What is wrong with the response
+        self.message = message
+        #: Where the value is, such as ``response`` or ``response.items[0].name``
+        self.path = path
+
+
 class UnexpectedResponseError(RuntimeError):
     """
     This error is raised if a call to an Operation results in an undocumented
@@ -50,3 +92,32 @@ class UnexpectedResponseError(RuntimeError):
         #: A convenience field that captures the unexpected status code that
         #: triggered this exception.
         self.status_code = response.status_code
+
+
+class TransportError(ConnectionError):
+    """
+    This error is raised by the transports included with this library when a
+    request could not be sent or its response could not be read, for example
+    because the server could not be reached.
+    """
+
+
+class CircuitOpenError(TransportError):
+    """
+    This error is raised instead of sending a request to a server whose circuit
+    breaker is open, because too many recent requests to it failed.
+    """
+
+
+class RateLimitError(RuntimeError):
+    """
+    This error is raised if a call would have had to wait longer than allowed for
+    a client-side rate limit to let it through.
+    """
+
+
+class BulkheadFullError(RuntimeError):
+    """
+    This error is raised if a call could not start because too many calls to its
+    operation were already in flight.
+    """
@@ -0,0 +1,281 @@
+import io
+import os
+import uuid
+from urllib.parse import urlencode
+
+from .codec import model_to_dict
+from .schemas import Model
+from .streaming import CHUNK_SIZE
+
+#: The form media types request bodies can be encoded as
+FORM_TYPES = ("multipart/form-data", "application/x-www-form-urlencoded")
+
+
+def _quote(name):
+    """
+    Escapes a field name or filename for a Content-Disposition header, as
+    browsers do
+    """
+    return name.replace('"', "%22").replace("\r", "%0D").replace("\n", "%0A")
+
+
+def _default_content_type(schema):
+    """
+    Returns the content type the spec says a property's parts default to, or
+    None if the property's schema isn't known
+    """
+    if schema is None:
+        return None
+    if schema.type == "array" and schema.items is not None:
+        return _default_content_type(schema.items)
+    if schema.type == "string" and schema.format in ("binary", "base64"):
+        return "application/octet-stream"
+    if schema.type == "object" or schema.properties:
+        return "application/json"
+    if schema.type is None:
+        return None
+    return "text/plain"
+
+
+def _text(value):
+    """
+    Returns a primitive value as it's written in a form
+    """
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    return str(value)
+
+
+def _file_size(f):
+    """
+    Returns the number of bytes left to read from a file, or None if that can't
+    be known without reading it
+    """
+    try:
+        return os.fstat(f.fileno()).st_size - f.tell()
+    except (AttributeError, OSError, io.UnsupportedOperation):
+        pass
+
+    try:
+        position = f.tell()
+        size = f.seek(0, io.SEEK_END) - position
+        f.seek(position)
+        return size
+    except (AttributeError, OSError, io.UnsupportedOperation):
+        return None
+
+
+class _Part:
+    """
+    The precomputed headers of a form field
+    """
+
+    __slots__ = ["prefix", "suffix", "content_type", "style", "explode"]
+
+    def __init__(self, boundary, name, content_type, encoding):
+        self.content_type = content_type
+        self.style = encoding.get("style", "form")
+        self.explode = encoding.get("explode", self.style == "form")
+
+        # a filename goes between the prefix and suffix, if there is one
+        self.prefix = '--{}\r\nContent-Disposition: form-data; name="{}"'.format(boundary, _quote(name)).encode()
+        self.suffix = "\r\nContent-Type: {}\r\n\r\n".format(content_type).encode() if content_type else b"\r\n\r\n"
+
+
+class MultipartBody:
+    """
+    The body of a multipart/form-data request.  Iterating over it yields the
+    body in chunks, reading files as it goes rather than up front; each
+    iteration seeks files back to where they started, so the body may be sent
+    again.  ``len`` is the size of the body if every file's size is known, and
+    None otherwise, in which case it is sent chunked.
+    """
+
+    def __init__(self, chunks, boundary):
+        """
+        :param chunks: The bytes and files making up the body, in order
+        :type chunks: list[bytes, file-like]
+        :param boundary: The boundary between parts
+        :type boundary: str
+        """
+        self._chunks = chunks
+        self._starts = {}
+        self._end = "--{}--\r\n".format(boundary).encode()
+
+        self.len = len(self._end)
+        unknown = False
+        for c in chunks:
+            if isinstance(c, bytes):
+                self.len += len(c)
+                continue
+
+            size = _file_size(c)
+            if size is None:
+                unknown = True
+            else:
+                self._starts[id(c)] = c.tell()
+                self.len += size
+
+        if unknown:
+            self.len = None
+
+    def __iter__(self):
+        for c in self._chunks:
+            if isinstance(c, bytes):
+                yield c
+                continue
+
+            if id(c) in self._starts:
+                c.seek(self._starts[id(c)])
+            while True:
+                chunk = c.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                yield chunk.encode("utf-8") if isinstance(chunk, str) else chunk
+        yield self._end
+
+
+class FormEncoder:
+    """
+    Encodes request bodies as multipart/form-data or
+    application/x-www-form-urlencoded, as described by a request body's media
+    type and its ``encoding``.  An operation builds one the first time it sends
+    a form, so that the boundary and each part's headers are worked out once.
+    """
+
+    def __init__(self, name, media_type):
+        """
+        :param name: The form media type, one of :any:`FORM_TYPES`
+        :type name: str
+        :param media_type: The media type describing the form
+        :type media_type: MediaType
+        """
+        self.multipart = name == "multipart/form-data"
+        self.boundary = uuid.uuid4().hex
+        if self.multipart:
+            self.content_type = "multipart/form-data; boundary={}".format(self.boundary)
+        else:
+            self.content_type = name
+
+        schema = media_type.schema
+        self._properties = (schema.properties if schema is not None else None) or {}
+        self._encoding = media_type.encoding or {}
+        self._parts = {}
+        for c in set(self._properties) | set(self._encoding):
+            self._parts[c] = self._part(c)
+
+    def _part(self, name, value=None):
+        """
+        Returns the headers for a field, guessing its content type from its
+        value if the spec doesn't give one
+        """
+        encoding = self._encoding.get(name) or {}
+        content_type = encoding.get("contentType") or _default_content_type(self._properties.get(name))
+        if content_type is None and value is not None:
+            if isinstance(value, (bytes, bytearray, tuple)) or hasattr(value, "read"):
+                content_type = "application/octet-stream"
+            elif isinstance(value, (dict, list, Model)):
+                content_type = "application/json"
+        # several content types may be allowed; send the first
+        return _Part(self.boundary, name, (content_type or "").split(",")[0].strip(), encoding)
+
+    def encode(self, data, codec):
+        """
+        Returns the body of a request sending the given fields
+
+        :param data: The fields to send, by name
+        :type data: dict, Model
+        :param codec: Encodes fields sent as JSON
+        :type codec: JSONCodec
+
+        :returns: The body as a string for urlencoded forms, or a
+                  :any:`MultipartBody` for multipart forms
+        """
+        if isinstance(data, Model):
+            data = model_to_dict(data)
+        if not isinstance(data, dict):
+            raise TypeError("Form bodies must be sent as a dict or Model, not {}".format(type(data).__name__))
+
+        if self.multipart:
+            return self._encode_multipart(data, codec)
+        return self._encode_urlencoded(data, codec)
+
+    def _get_part(self, name, value):
+        part = self._parts.get(name)
+        if part is None or not part.content_type:
+            part = self._part(name, value)
+        return part
+
+    def _encode_urlencoded(self, data, codec):
+        pairs = []
+        for name, value in data.items():
+            if value is None:
+                continue
+            part = self._get_part(name, value)
+
+            if isinstance(value, Model):
+                value = model_to_dict(value)
+
+            # objects are only sent as JSON if the encoding asks for it, unlike
+            # in multipart forms
+            as_json = (self._encoding.get(name) or {}).get("contentType") == "application/json"
+            if as_json and isinstance(value, (dict, list)):
+                pairs.append((name, codec.dumps(value)))
+            elif isinstance(value, (list, tuple)):
+                if part.explode:
+                    pairs.extend((name, _text(c)) for c in value)
+                else:
+                    pairs.append((name, ",".join(_text(c) for c in value)))
+            elif isinstance(value, dict):
+                if part.style == "deepObject":
+                    pairs.extend(("{}[{}]".format(name, k), _text(v)) for k, v in value.items())
+                elif part.explode:
+                    pairs.extend((k, _text(v)) for k, v in value.items())
+                else:
+                    pairs.append((name, ",".join("{},{}".format(k, _text(v)) for k, v in value.items())))
+            else:
+                pairs.append((name, _text(value)))
+
+        return urlencode(pairs)
+
+    def _encode_multipart(self, data, codec):
+        chunks = []
+        for name, value in data.items():
+            if value is None:
+                continue
+            part = self._get_part(name, value)
+
+            # arrays of anything but JSON are sent as a part per item
+            if isinstance(value, list) and part.content_type != "application/json":
+                values = value
+            else:
+                values = [value]
+
+            for value in values:
+                filename = None
+                if isinstance(value, tuple):
+                    filename, value = value[:2]
+                elif hasattr(value, "read"):
+                    filename = os.path.basename(getattr(value, "name", None) or name)
+                    if not isinstance(filename, str):
+                        filename = name
+
+                if filename is None:
+                    chunks.append(part.prefix + part.suffix)
+                else:
+                    chunks.append(part.prefix + '; filename="{}"'.format(_quote(filename)).encode() + part.suffix)
+
+                if hasattr(value, "read"):
+                    chunks.append(value)
+                    chunks.append(b"\r\n")
+                    continue
+
+                if isinstance(value, (bytes, bytearray, memoryview)):
+                    value = bytes(value)
+                elif isinstance(value, (dict, list, Model)):
+                    value = codec.dumps(value)
+                else:
+                    value = _text(value).encode("utf-8")
+                chunks.append(value + b"\r\n")
+
+        return MultipartBody(chunks, self.boundary)
@@ -0,0 +1,357 @@
+import string
+import uuid
+
+try:
+    import re._parser as sre_parse
+except ImportError:  # before Python 3.11
+    import sre_parse
+
+#: How long generated strings and arrays are when their schema doesn't say
+DEFAULT_MAX_LENGTH = 16
+DEFAULT_MAX_ITEMS = 5
+
+#: How many times a schema may be nested inside itself in a generated value
+MAX_DEPTH = 3
+
+#: The characters strings are generated from, unless a pattern says otherwise
+ALPHABET = string.ascii_letters + string.digits
+
+#: How unbounded repeats in patterns, like ``+`` and ``*``, are limited
+MAX_REPEAT = 8
+
+#: How many strings matching a pattern are generated, at most, to find one
+#: within the schema's length limits
+MAX_PATTERN_ATTEMPTS = 100
+
+_CATEGORIES = {
+    sre_parse.CATEGORY_DIGIT: string.digits,
+    sre_parse.CATEGORY_NOT_DIGIT: string.ascii_letters + "_-",
+    sre_parse.CATEGORY_WORD: string.ascii_letters + string.digits + "_",
+    sre_parse.CATEGORY_NOT_WORD: " -.,;",
+    sre_parse.CATEGORY_SPACE: " ",
+    sre_parse.CATEGORY_NOT_SPACE: string.ascii_letters + string.digits,
+}
+
+#: The printable characters ``.`` and negated classes in patterns pick from
+_PRINTABLE = string.ascii_letters + string.digits + string.punctuation + " "
+
+
+class _TooDeep(Exception):
+    """
+    Raised when a schema that refers to itself is nested too deeply, for the
+    object or array containing it to leave it out
+    """
+
+
+def _date(rng):
+    return "{:04d}-{:02d}-{:02d}".format(rng.randint(1970, 2037), rng.randint(1, 12), rng.randint(1, 28))
+
+
+def _date_time(rng):
+    return "{}T{:02d}:{:02d}:{:02d}Z".format(_date(rng), rng.randrange(24), rng.randrange(60), rng.randrange(60))
+
+
+#: How strings of each format are generated
+FORMATS = {
+    "date": _date,
+    "date-time": _date_time,
+    "uuid": lambda rng: str(uuid.UUID(int=rng.getrandbits(128), version=4)),
+    "email": lambda rng: "{}@example.com".format("".join(rng.choices(string.ascii_lowercase, k=8))),
+    "ipv4": lambda rng: "{}.{}.{}.{}".format(*(rng.randrange(256) for _ in range(4))),
+    "ipv6": lambda rng: ":".join("{:x}".format(rng.randrange(65536)) for _ in range(8)),
+    "uri": lambda rng: "https://example.com/{}".format("".join(rng.choices(string.ascii_lowercase, k=8))),
+    "hostname": lambda rng: "{}.example.com".format("".join(rng.choices(string.ascii_lowercase, k=8))),
+    "byte": lambda rng: "".join(rng.choices(string.ascii_letters + string.digits, k=8)) + "==",
+}
+
+
+def _compile_pattern(items, max_length=None):
+    """
+    Compiles a parsed regular expression into a function generating strings it
+    matches.  Anchors are ignored, as is anything else that doesn't consume
+    characters.  Repeats are limited to ``max_length``, if given, so that
+    shorter strings are more likely.
+    """
+    parts = []
+    for op, arg in items:
+        if op == sre_parse.LITERAL:
+            char = chr(arg)
+            parts.append(lambda rng, char=char: char)
+        elif op == sre_parse.NOT_LITERAL:
+            choices = _PRINTABLE.replace(chr(arg), "")
+            parts.append(lambda rng, choices=choices: rng.choice(choices))
+        elif op == sre_parse.ANY:
+            parts.append(lambda rng: rng.choice(_PRINTABLE))
+        elif op == sre_parse.IN:
+            choices = _compile_class(arg)
+            parts.append(lambda rng, choices=choices: rng.choice(choices))
+        elif op in (sre_parse.MAX_REPEAT, sre_parse.MIN_REPEAT):
+            low, high, sub = arg
+            high = min(high, low + MAX_REPEAT)
+            if max_length is not None:
+                high = max(low, min(high, max_length))
+            repeat = _compile_pattern(sub, max_length)
+            parts.append(
+                lambda rng, low=low, high=high, repeat=repeat: "".join(
+                    repeat(rng) for _ in range(rng.randint(low, high))
+                )
+            )
+        elif op == sre_parse.SUBPATTERN:
+            parts.append(_compile_pattern(arg[-1], max_length))
+        elif op == sre_parse.BRANCH:
+            branches = [_compile_pattern(c, max_length) for c in arg[1]]
+            parts.append(lambda rng, branches=branches: rng.choice(branches)(rng))
+        elif op == sre_parse.CATEGORY:
+            choices = _CATEGORIES.get(arg, ALPHABET)
+            parts.append(lambda rng, choices=choices: rng.choice(choices))
+
+    if len(parts) == 1:
+        return parts[0]
+    return lambda rng: "".join(c(rng) for c in parts)
+
+
+def _compile_class(items):
+    """
+    Returns the characters a character class like ``[a-z_]`` matches
+    """
+    chars = []
+    negate = False
+    for op, arg in items:
+        if op == sre_parse.NEGATE:
+            negate = True
+        elif op == sre_parse.LITERAL:
+            chars.append(chr(arg))
+        elif op == sre_parse.RANGE:
+            chars.extend(chr(c) for c in range(arg[0], arg[1] + 1))
+        elif op == sre_parse.CATEGORY:
+            chars.extend(_CATEGORIES.get(arg, ""))
+    if negate:
+        chars = [c for c in _PRINTABLE if c not in chars]
+    return "".join(chars) or ALPHABET
+
+
+class SchemaGenerator:
+    """
+    Compiles schemas into plans that generate random values matching them.
+    Like :any:`SchemaCompiler`, schemas are compiled from their raw
+    definitions, and each is compiled once no matter how often it's referenced,
+    so generating many values only runs the plans.  Use :any:`Schema.generate`.
+    """
+
+    def __init__(self, root):
+        """
+        :param root: The spec, to resolve references against
+        :type root: OpenAPI
+        """
+        self.root = root
+        self._compiled = {}
+
+    def _resolve(self, raw):
+        while isinstance(raw, dict) and "$ref" in raw:
+            raw = self.root.resolve_path(raw["$ref"].split("/")[1:]).raw_element
+        return raw
+
+    def compile(self, schema):
+        """
+        Returns a function generating values for a schema
+
+        :param schema: The schema, or its raw definition
+        :type schema: Schema, dict
+
+        :returns: A function taking a random.Random and returning a value
+        :rtype: callable
+        """
+        raw = self._resolve(getattr(schema, "raw_element", schema))
+        key = id(raw)
+        plan = self._compiled.get(key)
+        if plan is not None:
+            return plan
+
+        # a schema that refers to itself generates through this until it's
+        # built, which stops once it's nested too deeply
+        cell = []
+        depth = [0]
+
+        def nested(rng):
+            if depth[0] >= MAX_DEPTH:
+                raise _TooDeep()
+            depth[0] += 1
+            try:
+                return cell[0](rng)
+            finally:
+                depth[0] -= 1
+
+        self._compiled[key] = nested
+        plan = self._build(raw if isinstance(raw, dict) else {})
+        cell.append(plan)
+        self._compiled[key] = plan
+        return plan
+
+    def _build(self, raw):
+        if "enum" in raw and raw["enum"]:
+            enum = raw["enum"]
+            return lambda rng: rng.choice(enum)
+
+        if raw.get("allOf"):
+            return self._build_all_of(raw)
+        for c in ("oneOf", "anyOf"):
+            if raw.get(c):
+                branches = [self.compile(c) for c in raw[c]]
+                return lambda rng: rng.choice(branches)(rng)
+
+        kind = raw.get("type")
+        if kind is None:
+            kind = "object" if "properties" in raw else "string"
+        plan = getattr(self, "_build_" + kind, self._build_string)(raw)
+
+        if raw.get("nullable"):
+            inner = plan
+            plan = lambda rng: None if rng.random() < 0.1 else inner(rng)
+        return plan
+
+    def _build_all_of(self, raw):
+        parts = [self.compile(c) for c in raw["allOf"]]
+        rest = {k: v for k, v in raw.items() if k != "allOf"}
+        if rest.get("properties") or rest.get("type") == "object":
+            parts.append(self._build_object(rest))
+
+        def generate(rng):
+            value = {}
+            for c in parts:
+                part = c(rng)
+                if isinstance(part, dict):
+                    value.update(part)
+            return value
+
+        return generate
+
+    def _build_object(self, raw):
+        required = set(raw.get("required") or [])
+        properties = [(k, self.compile(v), k in required) for k, v in (raw.get("properties") or {}).items()]
+        min_properties = raw.get("minProperties", 0)
+
+        def generate(rng):
+            value = {}
+            for name, plan, is_required in properties:
+                # optional properties are included half of the time
+                if is_required or len(value) < min_properties or rng.random() < 0.5:
+                    try:
+                        value[name] = plan(rng)
+                    except _TooDeep:
+                        if is_required:
+                            raise
+            return value
+
+        return generate
+
+    def _build_array(self, raw):
+        items = self.compile(raw.get("items") or {})
+        low = raw.get("minItems", 0)
+        high = raw.get("maxItems", max(low, DEFAULT_MAX_ITEMS))
+        unique = raw.get("uniqueItems", False)
+
+        def generate(rng):
+            length = rng.randint(low, high)
+            try:
+                if not unique:
+                    return [items(rng) for _ in range(length)]
+                value = []
+                for _ in range(length * 4):
+                    item = items(rng)
+                    if item not in value:
+                        value.append(item)
+                        if len(value) == length:
+                            break
+                return value
+            except _TooDeep:
+                if low:
+                    raise
+                return []
+
+        return generate
+
+    def _build_string(self, raw):
+        if "pattern" in raw:
+            return self._build_pattern(raw)
+
+        generate_format = FORMATS.get(raw.get("format"))
+        if generate_format is not None:
+            return generate_format
+
+        low = raw.get("minLength", 0)
+        high = raw.get("maxLength", max(low, DEFAULT_MAX_LENGTH))
+        return lambda rng: "".join(rng.choices(ALPHABET, k=rng.randint(low, high)))
+
+    @staticmethod
+    def _build_pattern(raw):
+        """
+        Generates strings matching a pattern, regenerating them until they're
+        within the schema's length limits too
+        """
+        low = raw.get("minLength", 0)
+        high = raw.get("maxLength")
+        generate = _compile_pattern(sre_parse.parse(raw["pattern"]), high)
+        if not low and high is None:
+            return generate
+
+        def generate_within(rng):
+            for _ in range(MAX_PATTERN_ATTEMPTS):
+                value = generate(rng)
+                if len(value) >= low and (high is None or len(value) <= high):
+                    return value
+            raise ValueError(
+                "Could not generate a string matching {} between {} and {} characters long".format(
+                    raw["pattern"], low, high
+                )
+            )
+
+        return generate_within
+
+    def _build_integer(self, raw):
+        low, high = self._bounds(raw, 1)
+        low, high = int(low), int(high)
+        multiple_of = raw.get("multipleOf")
+        if multiple_of:
+            multiple_of = int(multiple_of)
+            low, high = -(-low // multiple_of), high // multiple_of
+            return lambda rng: (low + int(rng.random() * (high - low + 1))) * multiple_of
+        return lambda rng: low + int(rng.random() * (high - low + 1))
+
+    def _build_number(self, raw):
+        low, high = self._bounds(raw, 1e-9)
+        multiple_of = raw.get("multipleOf")
+        if multiple_of:
+            low, high = -(-low // multiple_of), high // multiple_of
+            return lambda rng: (low + int(rng.random() * (high - low + 1))) * multiple_of
+        return lambda rng: low + rng.random() * (high - low)
+
+    @staticmethod
+    def _bounds(raw, step):
+        """
+        Returns the inclusive range a number may be generated from
+        """
+        low = raw.get("minimum")
+        high = raw.get("maximum")
+        exclusive_low = raw.get("exclusiveMinimum", False)
+        exclusive_high = raw.get("exclusiveMaximum", False)
+
+        # OpenAPI 3.1 gives the exclusive bounds as numbers
+        if not isinstance(exclusive_low, bool):
+            low, exclusive_low = exclusive_low, True
+        if not isinstance(exclusive_high, bool):
+            high, exclusive_high = exclusive_high, True
+
+        if low is None:
+            low = min(0, high - 1000) if high is not None else 0
+        if high is None:
+            high = low + 1000
+        if exclusive_low:
+            low += step
+        if exclusive_high:
+            high -= step
+        return low, high
+
+    @staticmethod
+    def _build_boolean(raw):
+        return lambda rng: rng.random() < 0.5
+
@@ -0,0 +1,211 @@
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextvars import copy_context
+
+from .singleflight import SAFE_METHODS
+
+
+class _OperationLatency:
+    """
+    The recent latencies of, and hedging statistics for, a single operation
+    """
+
+    __slots__ = ["latencies", "samples", "delay", "budget", "calls", "hedged", "hedges_won"]
+
+    def __init__(self, window):
+        self.latencies = deque(maxlen=window)
+        self.samples = 0
+        self.delay = None
+        self.budget = 0
+        self.calls = 0
+        self.hedged = 0
+        self.hedges_won = 0
+
+
+class HedgingPolicy:
+    """
+    Sends a duplicate of a slow request to another server, returning whichever
+    response arrives first.  Enabled per :any:`OpenAPI` instance with the
+    ``hedging`` argument.
+
+    Only calls to GET and HEAD operations are hedged, unless an operation opts
+    in or out with the ``x-hedge`` extension, and only if the operation declares
+    more than one server.  A call is hedged once it has taken longer than the
+    given percentile of that operation's recent latencies; until ``min_samples``
+    calls have been made, calls aren't hedged.
+
+    Each call earns an operation ``max_hedge_rate`` hedges, up to ``burst``, and
+    each hedge spends one, so no more than that fraction of calls are hedged.
+    Requests run on a thread pool so that they can be raced.  The request that
+    loses the race can't be interrupted once sent; its response is discarded.
+    """
+
+    def __init__(self, percentile=95, max_hedge_rate=0.05, min_samples=20, window=1000, burst=10, max_workers=64):
+        """
+        :param percentile: The percentile of an operation's latency after which
+                           a call to it is hedged
+        :type percentile: float
+        :param max_hedge_rate: The largest fraction of calls to an operation that
+                               may be hedged
+        :type max_hedge_rate: float
+        :param min_samples: The number of latencies that must be observed for an
+                            operation before calls to it are hedged
+        :type min_samples: int
+        :param window: The number of recent latencies kept per operation
+        :type window: int
+        :param burst: The most hedges an operation may save up
+        :type burst: float
+        :param max_workers: The size of the thread pool requests are sent from
+        :type max_workers: int
+        """
+        self.percentile = percentile
+        self.max_hedge_rate = max_hedge_rate
+        self.min_samples = min_samples
+        self.window = window
+        self.burst = burst
+
+        self._operations = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers, thread_name_prefix="HedgingPolicy")
+
+    @staticmethod
+    def applies_to(operation):
+        """
+        Returns True if calls to the given operation may be hedged
+
+        :param operation: The operation being called
+        :type operation: Operation
+        """
+        return operation.extensions.get("hedge", operation.path[-1] in SAFE_METHODS)
+
+    def _get(self, operation):
+        """
+        Returns the latency record for an operation.  Must be called with the
+        lock held.
+        """
+        record = self._operations.get(operation.operationId)
+        if record is None:
+            record = self._operations[operation.operationId] = _OperationLatency(self.window)
+        return record
+
+    def delay(self, operation):
+        """
+        Returns how long to wait before hedging a call to an operation, or None
+        if not enough calls have been observed yet
+
+        :param operation: The operation being called
+        :type operation: Operation
+        """
+        with self._lock:
+            return self._get(operation).delay
+
+    def record(self, operation, latency):
+        """
+        Records the latency of a request
+
+        :param operation: The operation called
+        :type operation: Operation
+        :param latency: How long the request took, in seconds
+        :type latency: float
+        """
+        with self._lock:
+            record = self._get(operation)
+            record.latencies.append(latency)
+            record.samples += 1
+
+            # sorting the window is too slow to do for every request, and one
+            # sample barely moves the percentile anyway
+            if len(record.latencies) >= self.min_samples and (record.delay is None or record.samples % 10 == 0):
+                latencies = sorted(record.latencies)
+                record.delay = latencies[min(len(latencies) - 1, int(len(latencies) * self.percentile / 100))]
+
+    def _timed(self, operation, func):
+        """
+        Calls ``func``, recording how long it took if it succeeded
+        """
+        start = time.monotonic()
+        result = func()
+        self.record(operation, time.monotonic() - start)
+        return result
+
+    def call(self, operation, primary, backup):
+        """
+        Calls ``primary``, and if it doesn't return in time, ``backup`` as well,
+        returning the result of whichever succeeds first.
+
+        :param operation: The operation being called
+        :type operation: Operation
+        :param primary: Sends the request to the preferred server
+        :type primary: callable
+        :param backup: Sends the request to the next server
+        :type backup: callable
+
+        :returns: The result of the first call to succeed
+        """
+        with self._lock:
+            record = self._get(operation)
+            record.calls += 1
+            record.budget = min(self.burst, record.budget + self.max_hedge_rate)
+            delay = record.delay
+
+        if delay is None:
+            return self._timed(operation, primary)
+
+        # requests run in a copy of the caller's context, so that they're traced
+        # as its children
+        first = self._executor.submit(copy_context().run, self._timed, operation, primary)
+        done, _ = wait([first], timeout=delay)
+        if done:
+            return first.result()
+
+        with self._lock:
+            hedge = record.budget >= 1
+            if hedge:
+                record.budget -= 1
+                record.hedged += 1
+
+        if not hedge:
+            # out of budget; wait for the original request
+            return first.result()
+
+        second = self._executor.submit(copy_context().run, self._timed, operation, backup)
+        pending = {first, second}
+        winner = None
+        while pending and winner is None:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            winner = next((c for c in done if c.exception() is None), None)
+
+        for loser in pending:
+            loser.cancel()
+
+        if winner is None:
+            # both failed; report the original request's error
+            return first.result()
+
+        if winner is second:
+            with self._lock:
+                record.hedges_won += 1
+
+        return winner.result()
+
+    def stats(self):
+        """
+        Returns how many calls were made to each operation, how many of those
+        were hedged, and how many hedges returned first.
+
+        :returns: A dict of operationId to a dict of statistics
+        :rtype: dict[str, dict]
+        """
+        with self._lock:
+            return {
+                k: {"calls": c.calls, "hedged": c.hedged, "hedges_won": c.hedges_won, "delay": c.delay}
+                for k, c in self._operations.items()
+            }
+
+    def close(self):
+        """
+        Shuts down the thread pool requests are sent from
+        """
+        self._executor.shutdown(wait=False)
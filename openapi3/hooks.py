@@ -0,0 +1,196 @@
+import time
+
+from .compression import CompressedBody
+
+#: The events hooks may be registered for
+EVENTS = ("request_start", "response", "error", "model_built")
+
+
+class Call:
+    """
+    A single request sent by an operation, and what's known about it so far.
+    Times are in seconds, and are None for phases that didn't happen.
+    """
+
+    __slots__ = [
+        "operation",
+        "base_url",
+        "request",
+        "response",
+        "model",
+        "error",
+        "cached",
+        "streamed",
+        "start",
+        "duration",
+        "network_time",
+        "decode_time",
+        "model_time",
+    ]
+
+    def __init__(self, operation, base_url, request):
+        self.operation = operation
+        self.base_url = base_url
+        self.request = request
+        self.response = None
+        self.model = None
+        self.error = None
+        self.cached = False
+        self.streamed = False
+        self.start = time.perf_counter()
+        self.duration = None
+        self.network_time = None
+        self.decode_time = None
+        self.model_time = None
+
+    @property
+    def status_code(self):
+        """
+        The status code of the response, or None if none was received
+        """
+        return self.response.status_code if self.response is not None else None
+
+    @property
+    def bytes_out(self):
+        """
+        The size of the request body sent, if it was sent all at once or
+        compressed
+        """
+        body = self.request.body
+        if isinstance(body, CompressedBody):
+            return body.compressed_bytes
+        if isinstance(body, str):
+            return len(body.encode("utf-8"))
+        if isinstance(body, (bytes, bytearray)):
+            return len(body)
+        if isinstance(body, memoryview):
+            return body.nbytes
+        # multipart bodies know their size before they're sent
+        return getattr(body, "len", None) or 0
+
+    @property
+    def bytes_out_uncompressed(self):
+        """
+        The size of the request body before it was compressed, which is
+        :any:`bytes_out` if it wasn't
+        """
+        if isinstance(self.request.body, CompressedBody):
+            return self.request.body.uncompressed_bytes
+        return self.bytes_out
+
+    @property
+    def compression_ratio(self):
+        """
+        How many times smaller compressing the request body made it, or None if
+        it wasn't compressed
+        """
+        body = self.request.body
+        if not isinstance(body, CompressedBody) or not body.compressed_bytes:
+            return None
+        return body.uncompressed_bytes / body.compressed_bytes
+
+    @property
+    def compress_time(self):
+        """
+        The time spent compressing the request body, or None if it wasn't
+        """
+        if isinstance(self.request.body, CompressedBody):
+            return self.request.body.time
+        return None
+
+    @property
+    def bytes_in(self):
+        """
+        The size of the response body received.  Streamed responses are still
+        being read when the call ends, so their Content-Length is used.
+        """
+        if self.response is None:
+            return 0
+        if self.streamed:
+            return int(self.response.headers.get("Content-Length", 0))
+        return len(self.response.content or b"")
+
+
+class Hooks:
+    """
+    The callbacks registered for an :any:`OpenAPI` instance, and the metrics it
+    records, if any.  This is created as soon as either is configured; until
+    then, calls pay nothing for instrumentation.
+
+    Callbacks are called on the thread making the call, with these arguments:
+
+    * ``request_start(operation, request)`` before a request is sent, or looked
+      up in the cache
+    * ``response(operation, request, response)`` when a response is received,
+      before it is parsed
+    * ``error(operation, request, error)`` when sending the request or parsing
+      its response raises an error, which is raised again afterwards
+    * ``model_built(operation, model)`` when a model is built from a response
+    """
+
+    def __init__(self, metrics=None):
+        """
+        :param metrics: Where to record the metrics of each call
+        :type metrics: openapi3.metrics.Metrics
+        """
+        self.metrics = metrics
+        self._hooks = {c: [] for c in EVENTS}
+
+    def add(self, event, func):
+        """
+        Registers a callback for an event
+
+        :param event: One of :any:`EVENTS`
+        :type event: str
+        :param func: The callback
+        :type func: callable
+        """
+        if event not in self._hooks:
+            raise ValueError("Unknown event {} (expected one of {})".format(event, ", ".join(EVENTS)))
+        self._hooks[event].append(func)
+
+    def start(self, operation, base_url, request):
+        """
+        Called when a request is about to be sent
+
+        :returns: The record of the call, passed to the other methods
+        :rtype: Call
+        """
+        for func in self._hooks["request_start"]:
+            func(operation, request)
+        return Call(operation, base_url, request)
+
+    def response(self, call, response):
+        """
+        Called when a response is received
+        """
+        call.response = response
+        for func in self._hooks["response"]:
+            func(call.operation, call.request, response)
+
+    def model_built(self, call, model):
+        """
+        Called when a model is built from the response
+        """
+        call.model = model
+        for func in self._hooks["model_built"]:
+            func(call.operation, model)
+
+    def error(self, call, error):
+        """
+        Called when the call failed
+        """
+        call.error = error
+        call.duration = time.perf_counter() - call.start
+        for func in self._hooks["error"]:
+            func(call.operation, call.request, error)
+        if self.metrics is not None:
+            self.metrics.record(call)
+
+    def end(self, call):
+        """
+        Called when the call succeeded
+        """
+        call.duration = time.perf_counter() - call.start
+        if self.metrics is not None:
+            self.metrics.record(call)
@@ -0,0 +1,268 @@
+"""
+Load tests an operation by calling it through this library as fast as it
+answers, from many threads at once, to size an upstream API and spot
+bottlenecks in the client.  Run with::
+
+   python -m openapi3 loadtest spec.yaml --op OPERATION [--concurrency N] [--duration 60s] [--params JSON]
+"""
+import argparse
+import json
+import sys
+import threading
+import time
+
+import requests
+import yaml
+
+from .openapi import OpenAPI
+from .routing import METHODS
+from .transports import HTTPClientTransport, RequestsTransport, Urllib3Transport
+
+#: The percentiles of latency reported
+PERCENTILES = (("p50", 0.5), ("p90", 0.9), ("p99", 0.99), ("p999", 0.999))
+
+
+def _requests_transport(concurrency):
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_maxsize=concurrency)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return RequestsTransport(session)
+
+
+#: The transports that may be load tested with, each with a connection pool
+#: large enough for every worker to keep its connection open
+TRANSPORTS = {
+    "requests": _requests_transport,
+    "urllib3": lambda concurrency: Urllib3Transport(maxsize=concurrency),
+    "http.client": lambda concurrency: HTTPClientTransport(max_idle=concurrency),
+}
+
+
+def parse_duration(value):
+    """
+    Parses a duration like ``60s``, ``500ms``, ``2m`` or ``10`` into seconds
+
+    :rtype: float
+    """
+    value = value.strip()
+    for suffix, scale in (("ms", 0.001), ("s", 1), ("m", 60), ("h", 3600)):
+        if value.endswith(suffix):
+            return float(value[: -len(suffix)]) * scale
+    return float(value)
+
+
+class LoadTest:
+    """
+    Calls an operation repeatedly from ``concurrency`` threads for a fixed
+    duration, recording how long each call takes and how it ended.  The
+    threads share the API's transport, and so its connection pool; size the
+    pool for the concurrency, as the command line does, or connections will be
+    opened and closed as threads contend for them.
+
+    Each thread's CPU time is measured too, so that the time the client spends
+    building requests and parsing responses can be told apart from the time
+    spent waiting on the server.
+    """
+
+    def __init__(self, api, operation_id, concurrency=1, duration=10.0, parameters=None, data=None):
+        """
+        :param api: The API to call.  A ``response`` hook is registered on it to
+                    record each call's status code.
+        :type api: OpenAPI
+        :param operation_id: The operation to call
+        :type operation_id: str
+        :param concurrency: The number of threads calling it at once
+        :type concurrency: int
+        :param duration: How long to call it for, in seconds
+        :type duration: float
+        :param parameters: The parameters to call it with
+        :type parameters: dict
+        :param data: The request body to send
+        :type data: any
+        """
+        self.concurrency = concurrency
+        self.duration = duration
+
+        self._local = threading.local()
+        api.on_response(self._record_status)
+
+        self._call = getattr(api, "call_" + operation_id)
+        self._kwargs = {"parameters": parameters or {}}
+        if data is not None:
+            self._kwargs["data"] = data
+
+    def _record_status(self, operation, request, response):
+        self._local.status = response.status_code
+
+    def _worker(self, end, results):
+        """
+        Calls the operation until ``end``, then adds what it recorded to
+        ``results``
+        """
+        call = self._call
+        kwargs = self._kwargs
+        local = self._local
+        perf_counter = time.perf_counter
+
+        latencies = []
+        statuses = {}
+        errors = {}
+        cpu_start = time.thread_time()
+        while True:
+            start = perf_counter()
+            if start >= end:
+                break
+
+            local.status = None
+            error = None
+            try:
+                call(**kwargs)
+            except Exception as e:  # pylint: disable=broad-except
+                error = e
+            latencies.append(perf_counter() - start)
+
+            status = local.status
+            if status is not None:
+                statuses[status] = statuses.get(status, 0) + 1
+            if error is not None:
+                # failures without a response are counted by their type
+                key = status if status is not None else type(error).__name__
+                errors[key] = errors.get(key, 0) + 1
+
+        results.append((latencies, statuses, errors, time.thread_time() - cpu_start))
+
+    def run(self):
+        """
+        Runs the load test, blocking until it's complete
+
+        :returns: The number of ``calls`` made, their ``throughput`` per second,
+                  their ``latency`` in seconds (the ``min``, ``mean``, ``max``
+                  and each of :any:`PERCENTILES`), the number of responses of
+                  each status code in ``statuses``, the failed calls by status
+                  code or exception in ``errors``, and the client's
+                  ``cpu_per_call`` in seconds
+        :rtype: dict
+        """
+        results = []
+        end = time.perf_counter() + self.duration
+        threads = [threading.Thread(target=self._worker, args=(end, results)) for _ in range(self.concurrency)]
+
+        start = time.perf_counter()
+        for c in threads:
+            c.start()
+        for c in threads:
+            c.join()
+        elapsed = time.perf_counter() - start
+
+        latencies = sorted(latency for c in results for latency in c[0])
+        statuses = {}
+        errors = {}
+        for _, thread_statuses, thread_errors, _ in results:
+            for status, count in thread_statuses.items():
+                statuses[status] = statuses.get(status, 0) + count
+            for key, count in thread_errors.items():
+                errors[key] = errors.get(key, 0) + count
+
+        calls = len(latencies)
+        latency = {}
+        if calls:
+            latency["min"] = latencies[0]
+            latency["mean"] = sum(latencies) / calls
+            for name, fraction in PERCENTILES:
+                latency[name] = latencies[min(calls - 1, int(calls * fraction))]
+            latency["max"] = latencies[-1]
+
+        return {
+            "calls": calls,
+            "duration": elapsed,
+            "throughput": calls / elapsed,
+            "latency": latency,
+            "statuses": statuses,
+            "errors": errors,
+            "cpu_per_call": sum(c[3] for c in results) / calls if calls else 0.0,
+        }
+
+
+def format_report(result):
+    """
+    Formats the result of :any:`LoadTest.run` for reading
+
+    :rtype: str
+    """
+    lines = [
+        "calls:        {}".format(result["calls"]),
+        "duration:     {:.2f}s".format(result["duration"]),
+        "throughput:   {:.1f}/s".format(result["throughput"]),
+        "client CPU:   {:.1f}µs/call".format(result["cpu_per_call"] * 1e6),
+    ]
+    if result["latency"]:
+        lines.append("latency (ms):")
+        lines.extend("  {:<10} {:>10.2f}".format(k, v * 1e3) for k, v in result["latency"].items())
+    if result["statuses"]:
+        lines.append("statuses:")
+        lines.extend("  {:<10} {:>10}".format(k, v) for k, v in sorted(result["statuses"].items()))
+    if result["errors"]:
+        lines.append("errors:")
+        lines.extend("  {:<10} {:>10}".format(k, v) for k, v in sorted(result["errors"].items(), key=str))
+    return "\n".join(lines)
+
+
+def override_servers(raw, url):
+    """
+    Replaces the servers of a raw spec with a single server, wherever they're
+    declared, so that every operation is called on it
+
+    :param raw: The spec, as loaded from YAML or JSON
+    :type raw: dict
+    :param url: The URL of the server to call
+    :type url: str
+    """
+    servers = [{"url": url}]
+    raw["servers"] = servers
+    for path in (raw.get("paths") or {}).values():
+        if not isinstance(path, dict):
+            continue
+        if "servers" in path:
+            path["servers"] = servers
+        for method in METHODS:
+            operation = path.get(method)
+            if isinstance(operation, dict) and "servers" in operation:
+                operation["servers"] = servers
+
+
+def main(argv=None):
+    """
+    Runs a load test from the command line
+    """
+    parser = argparse.ArgumentParser(prog="python -m openapi3 loadtest", description=__doc__.strip().splitlines()[0])
+    parser.add_argument("spec", help="the spec of the API to call, as YAML or JSON")
+    parser.add_argument("--op", required=True, help="the operationId to call")
+    parser.add_argument("--concurrency", type=int, default=1, help="the number of calls to make at once")
+    parser.add_argument("--duration", type=parse_duration, default=10.0, help="how long to run for, like 60s or 2m")
+    parser.add_argument("--params", type=json.loads, help="the parameters to call with, as a JSON object")
+    parser.add_argument("--data", type=json.loads, help="the request body to send, as JSON")
+    parser.add_argument("--server", help="the server to call, instead of the spec's servers")
+    parser.add_argument("--transport", choices=sorted(TRANSPORTS), default="requests", help="how to send requests")
+    parser.add_argument("--json", action="store_true", help="print the results as JSON")
+    args = parser.parse_args(argv)
+
+    with open(args.spec) as f:
+        raw = yaml.safe_load(f.read())
+    if args.server:
+        override_servers(raw, args.server)
+
+    transport = TRANSPORTS[args.transport](args.concurrency)
+    api = OpenAPI(raw, transport=transport)
+    test = LoadTest(api, args.op, args.concurrency, args.duration, parameters=args.params, data=args.data)
+
+    print("Calling {} from {} threads for {:g}s".format(args.op, args.concurrency, args.duration), file=sys.stderr)
+    try:
+        result = test.run()
+    finally:
+        transport.close()
+
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        print(format_report(result))
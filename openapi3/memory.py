@@ -0,0 +1,166 @@
+import sys
+import types
+
+from .object_base import Map, ObjectBase, ReferenceProxy
+
+#: Slots that refer back up or across the tree, and so aren't part of the
+#: object holding them
+_SKIPPED = frozenset(("_root", "_original_ref", "raw_element"))
+
+#: Slots holding the model types generated from a schema
+_MODEL_TYPES = ("_model_type", "_request_model_type")
+
+#: Values whose size is counted without following what they refer to
+_OPAQUE = (type, types.ModuleType, types.FunctionType, types.BuiltinFunctionType, types.MethodType)
+
+
+def _slots(kind):
+    """
+    Returns the names of every slot of a type, including those it inherits
+    """
+    names = []
+    for cls in kind.__mro__:
+        slots = cls.__dict__.get("__slots__", ())
+        names.extend([slots] if isinstance(slots, str) else slots)
+    return names
+
+
+def _pointer(path):
+    """
+    Returns the JSON pointer of an element from its path in the spec
+    """
+    return "#/" + "/".join(str(c).replace("~", "~0").replace("/", "~1") for c in path)
+
+
+class _MemoryWalker:
+    """
+    Walks a parsed spec, counting every object it holds once, no matter how
+    often it's referred to.  Each object is counted where it's defined; a
+    reference counts only its proxy.
+    """
+
+    def __init__(self):
+        self.seen = set()
+        self.objects = {}
+        self.raw_element = {"count": 0, "bytes": 0}
+        self.models = {"count": 0, "bytes": 0}
+        self.subtrees = []
+
+    def _add(self, totals, size):
+        totals["count"] += 1
+        totals["bytes"] += size
+
+    def size(self, value):
+        """
+        Returns the size of a value and everything it holds that hasn't been
+        counted yet, leaving out elements of the spec, which are walked where
+        they're defined
+        """
+        if id(value) in self.seen or isinstance(value, (ObjectBase, Map)):
+            return 0
+        self.seen.add(id(value))
+
+        size = sys.getsizeof(value)
+        if isinstance(value, _OPAQUE):
+            return size
+        if isinstance(value, dict):
+            for k, v in value.items():
+                size += self.size(k) + self.size(v)
+        elif isinstance(value, (list, tuple, set, frozenset)):
+            for c in value:
+                size += self.size(c)
+        else:
+            for name in _slots(type(value)):
+                size += self.size(getattr(value, name, None))
+            attributes = getattr(value, "__dict__", None)
+            if isinstance(attributes, dict):
+                size += self.size(attributes)
+        return size
+
+    def _model_type(self, model_type):
+        """
+        Counts a model type generated from a schema
+        """
+        if model_type is None or id(model_type) in self.seen:
+            return 0
+        self.seen.add(id(model_type))
+        size = sys.getsizeof(model_type) + sum(sys.getsizeof(c) for c in vars(model_type).values())
+        self._add(self.models, size)
+        return size
+
+    def walk(self, node):
+        """
+        Counts an element of the spec and everything below it, returning their
+        total size
+        """
+        if id(node) in self.seen:
+            return 0
+        self.seen.add(id(node))
+
+        kind = type(node)
+        if kind is ReferenceProxy:
+            own = sys.getsizeof(node) + sys.getsizeof(object.__getattribute__(node, "__dict__"))
+            self._add(self.objects.setdefault("ReferenceProxy", {"count": 0, "bytes": 0}), own)
+            # proxies in lists hold the list the reference was found in
+            reference = object.__getattribute__(node, "_original_ref")
+            references = reference if isinstance(reference, list) else [reference]
+            return own + sum(self.walk(c) for c in references if isinstance(c, ObjectBase))
+
+        own = sys.getsizeof(node)
+        children = 0
+        if issubclass(kind, Map):
+            values = list(node.values())
+            own += sum(self.size(c) for c in node) + self.size(node.path)
+        else:
+            values = []
+            for name in _slots(kind) + list(getattr(node, "__dict__", {})):
+                if name in _SKIPPED:
+                    continue
+                value = getattr(node, name, None)
+                if name in _MODEL_TYPES:
+                    children += self._model_type(value)
+                elif isinstance(value, list) and id(value) not in self.seen:
+                    self.seen.add(id(value))
+                    own += sys.getsizeof(value)
+                    values.extend(value)
+                else:
+                    values.append(value)
+
+        for value in values:
+            if isinstance(value, (ObjectBase, Map)):
+                children += self.walk(value)
+            else:
+                own += self.size(value)
+
+        # the raw elements of everything below were counted with them
+        raw = self.size(node.raw_element)
+        self._add(self.raw_element, raw)
+        self._add(self.objects.setdefault(kind.__name__, {"count": 0, "bytes": 0}), own)
+
+        total = own + raw + children
+        self.subtrees.append((node.path, total))
+        return total
+
+
+def memory_report(root, top=10):
+    """
+    Reports the memory held by a parsed spec; see :any:`OpenAPI.memory_report`
+
+    :param root: The spec to report on
+    :type root: OpenAPI
+    :param top: How many of the largest subtrees to report
+    :type top: int
+
+    :rtype: dict
+    """
+    walker = _MemoryWalker()
+    total = walker.walk(root)
+
+    subtrees = sorted((c for c in walker.subtrees if c[0]), key=lambda c: c[1], reverse=True)
+    return {
+        "total": total,
+        "objects": dict(sorted(walker.objects.items(), key=lambda c: c[1]["bytes"], reverse=True)),
+        "raw_element": walker.raw_element,
+        "models": walker.models,
+        "subtrees": [{"pointer": _pointer(path), "bytes": size} for path, size in subtrees[:top]],
+    }
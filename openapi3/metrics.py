@@ -0,0 +1,221 @@
+import threading
+from bisect import bisect_left
+
+#: The default upper bounds of the latency histogram's buckets, in seconds
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+#: The phases each call's time is split between
+PHASES = ("compress", "network", "decode", "model")
+
+
+class _OperationMetrics:
+    """
+    The metrics recorded for a single operation
+    """
+
+    __slots__ = [
+        "calls",
+        "errors",
+        "cached",
+        "buckets",
+        "latency_sum",
+        "bytes_in",
+        "bytes_out",
+        "bytes_out_uncompressed",
+        "statuses",
+        "phases",
+    ]
+
+    def __init__(self, buckets):
+        self.calls = 0
+        self.errors = 0
+        self.cached = 0
+        # one more bucket than bounds, for calls slower than all of them
+        self.buckets = [0] * (len(buckets) + 1)
+        self.latency_sum = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.bytes_out_uncompressed = 0
+        self.statuses = {}
+        self.phases = dict.fromkeys(PHASES, 0)
+
+
+def _escape(value):
+    """
+    Escapes a Prometheus label value
+    """
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class Metrics:
+    """
+    Records the number, latency, size and outcome of calls made by an
+    :any:`OpenAPI` instance, configured with the ``metrics`` argument.
+
+    Metrics are kept per operationId, and may be read as a dict with
+    :any:`snapshot` or in the Prometheus text exposition format with
+    :any:`prometheus`.  Each call's time is split between the network (sending
+    the request and reading the response), decoding the response body, and
+    building a model from it; compressing the request body overlaps sending it.
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        """
+        :param buckets: The upper bounds of the latency histogram's buckets, in
+                        seconds, in ascending order
+        :type buckets: tuple[float]
+        """
+        self.buckets = tuple(buckets)
+
+        self._operations = {}
+        self._lock = threading.Lock()
+
+    def record(self, call):
+        """
+        Records a completed call
+
+        :param call: The call to record
+        :type call: openapi3.hooks.Call
+        """
+        bytes_in = call.bytes_in
+        bytes_out = call.bytes_out
+        bytes_out_uncompressed = call.bytes_out_uncompressed
+        bucket = bisect_left(self.buckets, call.duration)
+        status = call.status_code
+
+        with self._lock:
+            metrics = self._operations.get(call.operation.operationId)
+            if metrics is None:
+                metrics = self._operations[call.operation.operationId] = _OperationMetrics(self.buckets)
+
+            metrics.calls += 1
+            if call.error is not None:
+                metrics.errors += 1
+            if call.cached:
+                metrics.cached += 1
+
+            metrics.buckets[bucket] += 1
+            metrics.latency_sum += call.duration
+            metrics.bytes_in += bytes_in
+            metrics.bytes_out += bytes_out
+            metrics.bytes_out_uncompressed += bytes_out_uncompressed
+            if status is not None:
+                metrics.statuses[status] = metrics.statuses.get(status, 0) + 1
+
+            for phase in PHASES:
+                elapsed = getattr(call, phase + "_time")
+                if elapsed is not None:
+                    metrics.phases[phase] += elapsed
+
+    def snapshot(self):
+        """
+        Returns the metrics recorded so far
+
+        :returns: A dict of operationId to a dict of metrics.  ``latency`` holds
+                  the histogram, with the count of calls at or below each
+                  bucket's bound (not cumulative), and ``time`` the total time
+                  spent in each phase.  ``bytes_out_uncompressed`` is the size
+                  of request bodies before compression.
+        :rtype: dict[str, dict]
+        """
+        bounds = self.buckets + (float("inf"),)
+        with self._lock:
+            return {
+                operation_id: {
+                    "calls": m.calls,
+                    "errors": m.errors,
+                    "cached": m.cached,
+                    "latency": {
+                        "buckets": dict(zip(bounds, m.buckets)),
+                        "sum": m.latency_sum,
+                        "count": m.calls,
+                    },
+                    "bytes_in": m.bytes_in,
+                    "bytes_out": m.bytes_out,
+                    "bytes_out_uncompressed": m.bytes_out_uncompressed,
+                    "statuses": dict(m.statuses),
+                    "time": dict(m.phases),
+                }
+                for operation_id, m in self._operations.items()
+            }
+
+    def prometheus(self, prefix="openapi3"):
+        """
+        Returns the metrics recorded so far in the Prometheus text exposition
+        format
+
+        :param prefix: The prefix of every metric's name
+        :type prefix: str
+
+        :rtype: str
+        """
+        snapshot = self.snapshot()
+        lines = []
+
+        def metric(name, kind, doc, samples):
+            lines.append("# HELP {}_{} {}".format(prefix, name, doc))
+            lines.append("# TYPE {}_{} {}".format(prefix, name, kind))
+            for suffix, labels, value in samples:
+                label_text = ",".join('{}="{}"'.format(k, _escape(v)) for k, v in labels)
+                lines.append("{}_{}{}{{{}}} {}".format(prefix, name, suffix, label_text, value))
+
+        ops = sorted(snapshot.items())
+        metric("calls_total", "counter", "Calls made", [("", [("operation", k)], v["calls"]) for k, v in ops])
+        metric("errors_total", "counter", "Calls that failed", [("", [("operation", k)], v["errors"]) for k, v in ops])
+        metric(
+            "cached_total",
+            "counter",
+            "Calls answered from the cache",
+            [("", [("operation", k)], v["cached"]) for k, v in ops],
+        )
+
+        samples = []
+        for k, v in ops:
+            cumulative = 0
+            for bound, count in v["latency"]["buckets"].items():
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(float(bound))
+                samples.append(("_bucket", [("operation", k), ("le", le)], cumulative))
+            samples.append(("_sum", [("operation", k)], v["latency"]["sum"]))
+            samples.append(("_count", [("operation", k)], v["latency"]["count"]))
+        metric("call_duration_seconds", "histogram", "Call latency", samples)
+
+        metric(
+            "request_bytes_total",
+            "counter",
+            "Request body bytes sent",
+            [("", [("operation", k)], v["bytes_out"]) for k, v in ops],
+        )
+        metric(
+            "request_uncompressed_bytes_total",
+            "counter",
+            "Request body bytes before compression",
+            [("", [("operation", k)], v["bytes_out_uncompressed"]) for k, v in ops],
+        )
+        metric(
+            "response_bytes_total",
+            "counter",
+            "Response body bytes received",
+            [("", [("operation", k)], v["bytes_in"]) for k, v in ops],
+        )
+        metric(
+            "responses_total",
+            "counter",
+            "Responses received by status code",
+            [("", [("operation", k), ("status", s)], n) for k, v in ops for s, n in sorted(v["statuses"].items())],
+        )
+        metric(
+            "phase_seconds_total",
+            "counter",
+            "Time spent in each phase of a call",
+            [("", [("operation", k), ("phase", p)], t) for k, v in ops for p, t in v["time"].items()],
+        )
+
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        """
+        Discards the metrics recorded so far
+        """
+        with self._lock:
+            self._operations.clear()
@@ -0,0 +1,626 @@
+"""
+ASGI and WSGI middleware validating the requests an application receives, and
+a sample of the responses it sends, against the spec describing it
+"""
+import io
+import logging
+import random
+import threading
+from urllib.parse import quote
+
+from .codec import DEFAULT_CODEC
+from .errors import RequestValidationError, ResponseValidationError
+from .parameters import parse_query
+from .routing import METHODS, Router
+from .validation import SchemaCompiler
+
+logger = logging.getLogger(__name__)
+
+#: The characters left as they are when re-encoding a decoded path for matching
+PATH_SAFE = "/:@!$&'()*+,;="
+
+
+def _media_type(content_type):
+    """
+    Returns the media type of a Content-Type header, without its parameters
+    """
+    if content_type is None:
+        return None
+    return content_type.partition(";")[0].strip().lower()
+
+
+def _is_json(media_type):
+    return media_type == "application/json" or media_type.endswith("+json")
+
+
+def _find_media(content, media_type):
+    """
+    Returns the key of a content map matching a media type, accepting the
+    ranges the spec allows, or None
+    """
+    for c in (media_type, media_type.partition("/")[0] + "/*", "*/*"):
+        if c in content:
+            return c
+    return None
+
+
+def _parse_cookies(header):
+    """
+    Returns the names and values of the cookies in a Cookie header
+    """
+    if not header:
+        return []
+    return [c.strip().partition("=")[::2] for c in header.split(";") if c.strip()]
+
+
+class _Parameter:
+    """
+    A parameter of an operation, compiled for validating requests
+    """
+
+    __slots__ = ["name", "location", "header", "codec", "validate", "required"]
+
+    def __init__(self, parameter, compiler):
+        self.name = parameter.name
+        self.location = parameter.in_
+        self.header = parameter.name.lower()
+        self.codec = parameter._codec
+        self.validate = compiler.compile(parameter.schema) if parameter.schema is not None else None
+        self.required = bool(parameter.required)
+
+
+class _OperationValidator:
+    """
+    The validators for the requests to and responses from an operation, each
+    compiled once when the middleware is created
+    """
+
+    __slots__ = [
+        "operation",
+        "name",
+        "stats",
+        "parameters",
+        "uses_query",
+        "uses_cookies",
+        "body",
+        "body_required",
+        "responses",
+    ]
+
+    def __init__(self, operation, request_compiler, response_compiler):
+        self.operation = operation
+        self.name = operation.operationId or "{} {}".format(operation.path[-1].upper(), operation.path[-2])
+        self.stats = {"requests": 0, "invalid_requests": 0, "responses_validated": 0, "invalid_responses": 0}
+
+        # parameters declared on the operation override those on its path
+        declared = {}
+        for c in operation._root.paths[operation.path[-2]].parameters + operation.parameters:
+            declared[(c.name, c.in_)] = c
+        self.parameters = [_Parameter(c, request_compiler) for c in declared.values()]
+        self.uses_query = any(c.location == "query" for c in self.parameters)
+        self.uses_cookies = any(c.location == "cookie" for c in self.parameters)
+
+        self.body = None
+        self.body_required = False
+        if operation.requestBody is not None:
+            self.body = {
+                name: request_compiler.compile(c.schema) if c.schema is not None and _is_json(name) else None
+                for name, c in operation.requestBody.content.items()
+            }
+            self.body_required = bool(operation.requestBody.required)
+
+        # status codes, like 200, 2XX or default, to the validators for their
+        # content by media type, or None if they have no content
+        self.responses = {}
+        for status, response in operation.responses.items():
+            if response.content is None:
+                self.responses[str(status)] = None
+            else:
+                self.responses[str(status)] = {
+                    name: response_compiler.compile(c.schema) if c.schema is not None and _is_json(name) else None
+                    for name, c in response.content.items()
+                }
+
+    def reads_body(self, content_type):
+        """
+        Returns True if a request body of the given Content-Type is validated
+        as JSON, and so has to be read; other bodies, like binary and multipart
+        uploads, are passed to the application without being buffered
+        """
+        if self.body is None:
+            return False
+        key = _find_media(self.body, _media_type(content_type) or "application/octet-stream")
+        return key is not None and self.body[key] is not None
+
+    def validate_request(self, path_values, query_string, headers, body, has_body, codec):
+        """
+        Deserializes and validates the parameters and body of a request,
+        returning the parameters by name.  Headers are looked up by their
+        lowercase names.  The body is only given if :any:`reads_body` is True
+        for its Content-Type; ``has_body`` is whether the request has one.
+        """
+        parameters = {}
+        query = parse_query(query_string) if self.uses_query and query_string else []
+        cookies = _parse_cookies(headers.get("cookie")) if self.uses_cookies else []
+
+        for c in self.parameters:
+            if c.location == "path":
+                raw = path_values.get(c.name)
+            elif c.location == "query":
+                raw = query
+            elif c.location == "header":
+                raw = headers.get(c.header)
+            else:
+                raw = cookies
+
+            value = None
+            if raw is not None and c.codec is not None:
+                try:
+                    value = c.codec.deserialize(raw)
+                except ValueError as e:
+                    raise RequestValidationError(str(e), "parameters.{}".format(c.name))
+
+            if value is None:
+                if c.required:
+                    raise RequestValidationError("is required", "parameters.{}".format(c.name))
+                continue
+
+            if c.validate is not None:
+                c.validate(value, ("parameters", c.name))
+            parameters[c.name] = value
+
+        if self.body is not None:
+            if not has_body:
+                if self.body_required:
+                    raise RequestValidationError("a request body is required", "data")
+                return parameters
+
+            media_type = _media_type(headers.get("content-type")) or "application/octet-stream"
+            key = _find_media(self.body, media_type)
+            if key is None:
+                raise RequestValidationError(
+                    "unsupported Content-Type {} (expected one of {})".format(media_type, ", ".join(self.body)),
+                    "data",
+                )
+
+            validate = self.body[key]
+            if validate is not None:
+                try:
+                    data = codec.loads(body)
+                except ValueError:
+                    raise RequestValidationError("is not valid JSON", "data")
+                validate(data, ("data",))
+
+        return parameters
+
+    def validate_response(self, status, content_type, body, codec):
+        """
+        Validates a response against the responses the operation documents
+        """
+        status = str(status)
+        if status in self.responses:
+            content = self.responses[status]
+        elif status[0] + "XX" in self.responses:
+            content = self.responses[status[0] + "XX"]
+        elif "default" in self.responses:
+            content = self.responses["default"]
+        else:
+            raise ResponseValidationError(
+                "undocumented status {} (expected one of {})".format(status, ", ".join(self.responses)), "response"
+            )
+
+        if content is None or not body:
+            return
+
+        media_type = _media_type(content_type) or "application/octet-stream"
+        key = _find_media(content, media_type)
+        if key is None:
+            raise ResponseValidationError(
+                "undocumented Content-Type {} (expected one of {})".format(media_type, ", ".join(content)), "response"
+            )
+
+        validate = content[key]
+        if validate is None:
+            return
+        try:
+            data = codec.loads(body)
+        except ValueError:
+            raise ResponseValidationError("is not valid JSON", "response")
+        try:
+            validate(data, ("response",))
+        except RequestValidationError as e:
+            raise ResponseValidationError(e.message, e.path)
+
+
+class ValidationMiddleware:
+    """
+    Validates the requests an application receives against the spec describing
+    it, answering those that don't match with a 400 Bad Request before they
+    reach the application.  Each request is matched to its operation, its
+    parameters are deserialized according to their style and validated, and a
+    JSON body is validated against the operation's request body.  Requests
+    that don't match any operation are passed to the application as they are.
+
+    A sample of responses may also be validated against the responses the
+    operation documents.  Responses are never changed; errors found in them are
+    passed to ``on_response_error``, or logged.
+
+    Everything needed to validate requests and responses is compiled when the
+    middleware is created.  The matched operation and its deserialized
+    parameters are handed to the application as ``openapi3.operation`` and
+    ``openapi3.parameters`` in the WSGI environ or ASGI scope.
+
+    Use :any:`WSGIValidationMiddleware` or :any:`ASGIValidationMiddleware`.
+    """
+
+    def __init__(self, app, spec, response_sample_rate=0.0, on_response_error=None, codec=None):
+        """
+        :param app: The application to validate requests to
+        :type app: callable
+        :param spec: The spec describing the application
+        :type spec: OpenAPI
+        :param response_sample_rate: The fraction of responses to validate,
+                                     from 0 (none) to 1 (all)
+        :type response_sample_rate: float
+        :param on_response_error: Called with the operation and the
+                                  :any:`ResponseValidationError` when a
+                                  sampled response is invalid.  If not given,
+                                  errors are logged as warnings.
+        :type on_response_error: callable
+        :param codec: The JSON codec to decode bodies with.  Defaults to the
+                      fastest installed.
+        :type codec: openapi3.codec.JSONCodec
+        """
+        self.app = app
+        self.spec = spec
+        self.response_sample_rate = response_sample_rate
+        self.on_response_error = on_response_error
+        self.codec = codec if codec is not None else DEFAULT_CODEC
+
+        self._router = Router(spec)
+        request_compiler = SchemaCompiler(spec)
+        response_compiler = SchemaCompiler(spec, for_request=False)
+        self._validators = {}
+        for path in spec.paths.values():
+            for method in METHODS:
+                operation = getattr(path, method)
+                if operation is not None:
+                    self._validators[id(operation)] = _OperationValidator(
+                        operation, request_compiler, response_compiler
+                    )
+
+        self._lock = threading.Lock()
+
+    def _match(self, method, path):
+        """
+        Returns the validator for the operation a request calls and the
+        percent-encoded values of its path parameters, or None
+        """
+        found = self._router.match(method, path, decode=False)
+        if found is None:
+            return None
+        operation, values = found
+        return self._validators[id(operation)], values
+
+    def _record(self, validator, key):
+        with self._lock:
+            validator.stats[key] += 1
+
+    def _sample(self):
+        rate = self.response_sample_rate
+        return rate >= 1 or (rate > 0 and random.random() < rate)
+
+    def _error_body(self, error):
+        return self.codec.dumps({"message": error.message, "path": error.path})
+
+    def _check_response(self, validator, status, content_type, body):
+        """
+        Validates a sampled response, reporting any error found
+        """
+        self._record(validator, "responses_validated")
+        try:
+            validator.validate_response(status, content_type, body, self.codec)
+        except ResponseValidationError as e:
+            self._record(validator, "invalid_responses")
+            if self.on_response_error is not None:
+                self.on_response_error(validator.operation, e)
+            else:
+                logger.warning("Invalid response from %s: %s", validator.operation.operationId, e)
+
+    def stats(self):
+        """
+        Returns the number of requests to each operation, how many were
+        rejected, and how many responses were validated and found invalid
+
+        :rtype: dict[str, dict[str, int]]
+        """
+        with self._lock:
+            return {c.name: dict(c.stats) for c in self._validators.values() if c.stats["requests"]}
+
+
+class _WSGIHeaders:
+    """
+    Looks up request headers in a WSGI environ by name
+    """
+
+    __slots__ = ["environ"]
+
+    def __init__(self, environ):
+        self.environ = environ
+
+    def get(self, name):
+        if name == "content-type":
+            return self.environ.get("CONTENT_TYPE")
+        return self.environ.get("HTTP_" + name.upper().replace("-", "_"))
+
+
+class _ASGIHeaders:
+    """
+    Looks up request headers in an ASGI scope by name, decoding them the first
+    time one is needed
+    """
+
+    __slots__ = ["raw", "headers"]
+
+    def __init__(self, raw):
+        self.raw = raw
+        self.headers = None
+
+    def get(self, name):
+        if self.headers is None:
+            self.headers = {}
+            for k, v in self.raw:
+                k = k.decode("latin-1")
+                v = v.decode("latin-1")
+                # repeated headers are combined, as they would be in a WSGI environ
+                self.headers[k] = self.headers[k] + "," + v if k in self.headers else v
+        return self.headers.get(name)
+
+
+class _ValidatedIterable:
+    """
+    Passes the body of a WSGI response through as it's sent, validating it
+    once it's complete
+    """
+
+    def __init__(self, iterable, on_complete):
+        self.iterable = iterable
+        self.on_complete = on_complete
+
+    def __iter__(self):
+        chunks = []
+        for chunk in self.iterable:
+            chunks.append(chunk)
+            yield chunk
+        self.on_complete(b"".join(chunks))
+
+    def close(self):
+        if hasattr(self.iterable, "close"):
+            self.iterable.close()
+
+
+class WSGIValidationMiddleware(ValidationMiddleware):
+    """
+    Validates requests to, and optionally responses from, a WSGI application;
+    see :any:`ValidationMiddleware`::
+
+       app = WSGIValidationMiddleware(app, OpenAPI(spec), response_sample_rate=0.01)
+    """
+
+    def __call__(self, environ, start_response):
+        path = quote(environ.get("PATH_INFO", "").encode("latin-1"), safe=PATH_SAFE)
+        found = self._match(environ["REQUEST_METHOD"], path)
+        if found is None:
+            return self.app(environ, start_response)
+
+        validator, path_values = found
+        self._record(validator, "requests")
+
+        headers = _WSGIHeaders(environ)
+        body = None
+        has_body = False
+        if validator.body is not None:
+            if validator.reads_body(environ.get("CONTENT_TYPE")):
+                body = self._read_body(environ)
+                has_body = bool(body)
+            else:
+                has_body = self._has_body(environ)
+
+        try:
+            parameters = validator.validate_request(
+                path_values,
+                environ.get("QUERY_STRING", ""),
+                headers,
+                body,
+                has_body,
+                self.codec,
+            )
+        except RequestValidationError as e:
+            self._record(validator, "invalid_requests")
+            content = self._error_body(e)
+            start_response(
+                "400 Bad Request", [("Content-Type", "application/json"), ("Content-Length", str(len(content)))]
+            )
+            return [content]
+
+        environ["openapi3.operation"] = validator.operation
+        environ["openapi3.parameters"] = parameters
+
+        if not self._sample():
+            return self.app(environ, start_response)
+
+        response = {}
+
+        def capture(status, headers, exc_info=None):
+            response["status"] = int(status.split(" ", 1)[0])
+            response["content_type"] = next((v for k, v in headers if k.lower() == "content-type"), None)
+            return start_response(status, headers, exc_info)
+
+        return _ValidatedIterable(
+            self.app(environ, capture),
+            lambda body: self._check_response(validator, response["status"], response["content_type"], body),
+        )
+
+    @staticmethod
+    def _has_body(environ):
+        """
+        Returns True if a request has a body, without reading it
+        """
+        length = environ.get("CONTENT_LENGTH")
+        if length:
+            return int(length) > 0
+        return "chunked" in environ.get("HTTP_TRANSFER_ENCODING", "").lower()
+
+    @staticmethod
+    def _read_body(environ):
+        """
+        Reads the body of a request, and replaces it so that the application
+        can read it again
+        """
+        stream = environ["wsgi.input"]
+        length = environ.get("CONTENT_LENGTH")
+        if length:
+            body = stream.read(int(length))
+        elif environ.get("wsgi.input_terminated"):
+            body = stream.read()
+        else:
+            return b""
+
+        environ["wsgi.input"] = io.BytesIO(body)
+        environ["CONTENT_LENGTH"] = str(len(body))
+        return body
+
+
+class ASGIValidationMiddleware(ValidationMiddleware):
+    """
+    Validates requests to, and optionally responses from, an ASGI application;
+    see :any:`ValidationMiddleware`::
+
+       app = ASGIValidationMiddleware(app, OpenAPI(spec), response_sample_rate=0.01)
+    """
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        raw_path = scope.get("raw_path")
+        if raw_path:
+            path = raw_path.decode("latin-1")
+        else:
+            path = quote(scope["path"], safe=PATH_SAFE)
+
+        found = self._match(scope["method"], path)
+        if found is None:
+            await self.app(scope, receive, send)
+            return
+
+        validator, path_values = found
+        self._record(validator, "requests")
+
+        headers = _ASGIHeaders(scope["headers"])
+        body = None
+        has_body = False
+        if validator.body is not None:
+            if validator.reads_body(headers.get("content-type")):
+                body, receive = await self._read_body(receive)
+                has_body = bool(body)
+            else:
+                has_body, receive = await self._peek_body(receive)
+
+        try:
+            parameters = validator.validate_request(
+                path_values,
+                scope.get("query_string", b"").decode("latin-1"),
+                headers,
+                body,
+                has_body,
+                self.codec,
+            )
+        except RequestValidationError as e:
+            self._record(validator, "invalid_requests")
+            content = self._error_body(e)
+            await send(
+                {
+                    "type": "http.response.start",
+                    "status": 400,
+                    "headers": [
+                        (b"content-type", b"application/json"),
+                        (b"content-length", str(len(content)).encode("latin-1")),
+                    ],
+                }
+            )
+            await send({"type": "http.response.body", "body": content})
+            return
+
+        scope = dict(scope)
+        scope["openapi3.operation"] = validator.operation
+        scope["openapi3.parameters"] = parameters
+
+        if not self._sample():
+            await self.app(scope, receive, send)
+            return
+
+        response = {}
+        chunks = []
+
+        async def capture(message):
+            if message["type"] == "http.response.start":
+                response["status"] = message["status"]
+                response["content_type"] = next(
+                    (v.decode("latin-1") for k, v in message.get("headers", []) if k.lower() == b"content-type"), None
+                )
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+            await send(message)
+            if message["type"] == "http.response.body" and not message.get("more_body", False):
+                self._check_response(validator, response["status"], response["content_type"], b"".join(chunks))
+
+        await self.app(scope, receive, capture)
+
+    @staticmethod
+    async def _peek_body(receive):
+        """
+        Returns whether a request has a body from its first message, without
+        reading the rest, and a ``receive`` callable that hands the message to
+        the application again
+        """
+        message = await receive()
+        has_body = message["type"] == "http.request" and bool(message.get("body") or message.get("more_body"))
+        pending = [message]
+
+        async def replay():
+            if pending:
+                return pending.pop()
+            return await receive()
+
+        return has_body, replay
+
+    @staticmethod
+    async def _read_body(receive):
+        """
+        Reads the body of a request, returning it and a ``receive`` callable
+        that hands it to the application again
+        """
+        chunks = []
+        while True:
+            message = await receive()
+            if message["type"] != "http.request":
+                # the client disconnected; let the application find out
+                pending = [message]
+                break
+            chunks.append(message.get("body", b""))
+            if not message.get("more_body", False):
+                if len(chunks) > 1:
+                    message = {"type": "http.request", "body": b"".join(chunks), "more_body": False}
+                pending = [message]
+                break
+
+        body = b"".join(chunks)
+
+        async def replay():
+            if pending:
+                return pending.pop()
+            return await receive()
+
+        return body, replay
@@ -0,0 +1,525 @@
+"""
+A mock server answering every operation in a spec with the examples it
+documents, for standing in for upstream APIs in load tests.  Run with::
+
+   python -m openapi3 mock spec.yaml [--port PORT] [--latency SECONDS] [--error-rate RATE]
+"""
+import argparse
+import asyncio
+import collections
+import http
+import multiprocessing
+import random
+import sys
+import threading
+from urllib.parse import urlsplit
+
+import yaml
+
+from .codec import DEFAULT_CODEC
+from .openapi import OpenAPI
+from .routing import METHODS, Router
+
+#: Example values for strings of each format
+STRING_FORMATS = {
+    "date": "2024-01-01",
+    "date-time": "2024-01-01T00:00:00Z",
+    "time": "00:00:00",
+    "uuid": "00000000-0000-4000-8000-000000000000",
+    "email": "user@example.com",
+    "ipv4": "192.0.2.1",
+    "ipv6": "2001:db8::1",
+    "uri": "https://example.com",
+    "hostname": "example.com",
+    "byte": "",
+    "binary": "",
+}
+
+#: The longest request head accepted before the connection is closed
+MAX_HEAD = 64 * 1024
+
+
+def example_value(root, raw, depth=0):
+    """
+    Builds a single value matching a schema, preferring the examples, defaults
+    and enums it declares
+
+    :param root: The spec, to resolve references against
+    :type root: OpenAPI
+    :param raw: The schema's raw definition
+    :type raw: dict
+    :param depth: How deeply nested the value is; nesting stops at 8 levels
+
+    :rtype: any
+    """
+    while isinstance(raw, dict) and "$ref" in raw:
+        raw = root.resolve_path(raw["$ref"].split("/")[1:]).raw_element
+    if not isinstance(raw, dict) or depth > 8:
+        return None
+
+    for c in ("example", "default"):
+        if c in raw:
+            return raw[c]
+    if raw.get("enum"):
+        return raw["enum"][0]
+
+    if "allOf" in raw:
+        value = {}
+        for c in raw["allOf"]:
+            part = example_value(root, c, depth + 1)
+            if isinstance(part, dict):
+                value.update(part)
+        return value
+    for c in ("oneOf", "anyOf"):
+        if raw.get(c):
+            return example_value(root, raw[c][0], depth + 1)
+
+    kind = raw.get("type")
+    if kind == "object" or (kind is None and "properties" in raw):
+        return {k: example_value(root, v, depth + 1) for k, v in (raw.get("properties") or {}).items()}
+    if kind == "array":
+        item = example_value(root, raw.get("items", {}), depth + 1)
+        return [item] * max(raw.get("minItems", 1), 1)
+    if kind == "string":
+        value = STRING_FORMATS.get(raw.get("format"), "string")
+        min_length = raw.get("minLength", 0)
+        if len(value) < min_length:
+            value += "x" * (min_length - len(value))
+        return value[: raw["maxLength"]] if "maxLength" in raw else value
+    if kind in ("integer", "number"):
+        value = raw.get("minimum", raw.get("maximum", 0))
+        if isinstance(raw.get("exclusiveMinimum"), bool) and raw["exclusiveMinimum"] and "minimum" in raw:
+            value += 1
+        return int(value) if kind == "integer" else float(value)
+    if kind == "boolean":
+        return True
+    return None
+
+
+def _raw_response(status, content_type, body):
+    """
+    Returns a complete HTTP/1.1 response, ready to be written
+    """
+    lines = ["HTTP/1.1 {} {}".format(status, http.HTTPStatus(status).phrase)]
+    if content_type is not None:
+        lines.append("Content-Type: {}".format(content_type))
+    lines.append("Content-Length: {}".format(len(body)))
+    return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + body
+
+
+class _MockOperation:
+    """
+    The responses of an operation, serialized when the server is created, and
+    the latency and error rate injected into them
+    """
+
+    __slots__ = ["name", "responses", "head", "error", "latency", "error_rate", "requests", "errors"]
+
+    def __init__(self, operation, codec, latency, error_rate, samples=0, seed=None):
+        self.name = operation.operationId or "{} {}".format(operation.path[-1].upper(), operation.path[-2])
+        self.latency = latency
+        self.error_rate = error_rate
+        self.requests = 0
+        self.errors = 0
+
+        codes = sorted(str(c) for c in operation.responses.keys())
+        success = next((c for c in codes if c.startswith("2")), "default" if "default" in codes else None)
+        failure = next((c for c in codes if c.startswith("5")), None)
+
+        if success is None:
+            self.responses = [_raw_response(204, None, b"")]
+        else:
+            status = 200 if success in ("default", "2XX") else int(success)
+            self.responses = self._render(operation, success, status, codec, samples, seed)
+        # HEAD requests are answered with the same headers, without the body
+        self.head = [c[: c.index(b"\r\n\r\n") + 4] for c in self.responses]
+
+        if failure is not None:
+            status = 500 if failure == "5XX" else int(failure)
+            self.error = self._render(operation, failure, status, codec, 1, seed)[0]
+        else:
+            self.error = _raw_response(500, "application/json", codec.dumps({"message": "injected error"}))
+
+    @staticmethod
+    def _render(operation, key, status, codec, samples, seed):
+        """
+        Serializes each example of a response, or values generated from its
+        schema if it has none
+        """
+        response = operation.responses[key]
+        if not response.content or status in (204, 304):
+            return [_raw_response(status, None, b"")]
+
+        content = response.content
+        media_type = "application/json" if "application/json" in content else next(iter(content))
+        media = content[media_type]
+        content_type = "application/octet-stream" if "*" in media_type else media_type
+
+        if media.examples:
+            values = [c.value for c in media.examples.values() if c.value is not None]
+        elif media.example is not None:
+            values = [media.example]
+        elif media.schema is not None and samples:
+            values = media.schema.generate(samples, seed=seed)
+        elif media.schema is not None:
+            values = [example_value(operation._root, media.schema.raw_element)]
+        else:
+            values = [""]
+
+        bodies = []
+        for value in values:
+            if media_type == "application/json" or media_type.endswith("+json"):
+                body = codec.dumps(value)
+            elif isinstance(value, bytes):
+                body = value
+            else:
+                body = str(value if value is not None else "").encode("utf-8")
+            bodies.append(_raw_response(status, content_type, body))
+        return bodies
+
+
+class _MockProtocol(asyncio.Protocol):
+    """
+    Reads requests from a connection, answering each with its operation's
+    precomputed response.  Responses are written in the order requests were
+    received, each no earlier than its operation's latency allows.
+    """
+
+    def __init__(self, server, loop):
+        self.server = server
+        self.loop = loop
+        self.transport = None
+        self.buffer = bytearray()
+        # bytes of request body left to discard, and the state of a chunked body
+        self.skip = 0
+        self.chunked = None
+        # responses waiting for their latency, as when to send, the response,
+        # and whether to close the connection after it
+        self.queue = collections.deque()
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def data_received(self, data):
+        self.buffer += data
+        while self._next():
+            pass
+
+    def _next(self):
+        """
+        Consumes as much of the buffer as makes up the next request, or the
+        next part of one, returning False once more data is needed
+        """
+        buffer = self.buffer
+
+        if self.skip:
+            n = min(self.skip, len(buffer))
+            del buffer[:n]
+            self.skip -= n
+            return bool(buffer) and not self.skip
+
+        if self.chunked is not None:
+            end = buffer.find(b"\r\n")
+            if end < 0:
+                return False
+            line = bytes(buffer[:end])
+            del buffer[: end + 2]
+            if self.chunked == "trailers":
+                if not line:
+                    self.chunked = None
+            else:
+                size = int(line.split(b";", 1)[0], 16)
+                if size == 0:
+                    self.chunked = "trailers"
+                else:
+                    self.skip = size + 2
+            return True
+
+        end = buffer.find(b"\r\n\r\n")
+        if end < 0:
+            if len(buffer) > MAX_HEAD:
+                self.transport.close()
+            return False
+
+        head = bytes(buffer[:end]).decode("latin-1").split("\r\n")
+        del buffer[: end + 4]
+
+        method, target, version = (head[0].split(" ") + ["", ""])[:3]
+        close = version == "HTTP/1.0"
+        for line in head[1:]:
+            name, _, value = line.partition(":")
+            name = name.strip().lower()
+            if name == "content-length":
+                self.skip = int(value)
+            elif name == "transfer-encoding" and "chunked" in value.lower():
+                self.chunked = "size"
+            elif name == "connection":
+                close = value.strip().lower() == "close"
+
+        if not target.startswith("/"):
+            target = urlsplit(target).path or "/"
+        self._respond(method, target, close)
+        return True
+
+    def _respond(self, method, target, close):
+        response, latency = self.server._response(method, target)
+        if close:
+            response = response.replace(b"\r\n\r\n", b"\r\nConnection: close\r\n\r\n", 1)
+
+        if not latency and not self.queue:
+            self.transport.write(response)
+            if close:
+                self.transport.close()
+            return
+
+        when = self.loop.time() + latency
+        if self.queue:
+            when = max(when, self.queue[-1][0])
+        self.queue.append((when, response, close))
+        if len(self.queue) == 1:
+            self.loop.call_at(when, self._flush)
+
+    def _flush(self):
+        now = self.loop.time()
+        while self.queue and self.queue[0][0] <= now:
+            _, response, close = self.queue.popleft()
+            if self.transport.is_closing():
+                self.queue.clear()
+                return
+            self.transport.write(response)
+            if close:
+                self.transport.close()
+                self.queue.clear()
+                return
+        if self.queue:
+            self.loop.call_at(self.queue[0][0], self._flush)
+
+    def connection_lost(self, exc):
+        self.queue.clear()
+
+
+class MockServer:
+    """
+    Serves every operation in a spec, answering each request with the example
+    its operation documents for its first 2XX response, or one generated from
+    the response's schema.  Operations with several examples, or several
+    generated samples, cycle through them.  Every response is serialized when
+    the server is created, so that answering a request is a lookup and a write.
+
+    Latency and errors may be injected for every operation, or per operation.
+    An injected error is the operation's first documented 5XX response, or a
+    500.
+    """
+
+    def __init__(self, spec, latency=0.0, error_rate=0.0, per_operation=None, seed=None, codec=None, samples=0):
+        """
+        :param spec: The spec to serve
+        :type spec: OpenAPI
+        :param latency: Seconds to wait before answering each request
+        :type latency: float
+        :param error_rate: The fraction of requests answered with an error,
+                           from 0 to 1
+        :type error_rate: float
+        :param per_operation: The ``latency`` and ``error_rate`` of particular
+                              operations, by operationId
+        :type per_operation: dict[str, dict[str, float]]
+        :param seed: Seeds the choice of which requests fail, and the samples
+                     generated, to make them repeatable
+        :type seed: int
+        :param codec: The JSON codec to serialize responses with
+        :type codec: openapi3.codec.JSONCodec
+        :param samples: If set, responses without examples cycle through this
+                        many random values matching their schemas, generated
+                        with :any:`Schema.generate`, instead of one fixed value
+        :type samples: int
+        """
+        codec = codec if codec is not None else DEFAULT_CODEC
+        per_operation = per_operation or {}
+
+        self._router = Router(spec)
+        self._operations = {}
+        for path in spec.paths.values():
+            for method in METHODS:
+                operation = getattr(path, method)
+                if operation is None:
+                    continue
+                overrides = per_operation.get(operation.operationId, {})
+                self._operations[id(operation)] = _MockOperation(
+                    operation,
+                    codec,
+                    overrides.get("latency", latency),
+                    overrides.get("error_rate", error_rate),
+                    samples,
+                    seed,
+                )
+
+        self._not_found = _raw_response(404, "application/json", codec.dumps({"message": "no such operation"}))
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._loop = None
+        self._server = None
+
+    def _response(self, method, target):
+        """
+        Returns the response to a request and how long to wait before sending it
+        """
+        found = self._router.match(method, target, decode=False)
+        if found is None and method == "HEAD":
+            # HEAD requests to operations without one are answered like a GET
+            found = self._router.match("GET", target, decode=False)
+        if found is None:
+            return self._not_found, 0
+
+        mock = self._operations[id(found[0])]
+        with self._lock:
+            mock.requests += 1
+            failed = mock.error_rate and self._random.random() < mock.error_rate
+            if failed:
+                mock.errors += 1
+            count = mock.requests
+
+        if failed:
+            return mock.error, mock.latency
+        responses = mock.head if method == "HEAD" else mock.responses
+        return responses[count % len(responses)], mock.latency
+
+    async def _start(self, host, port, reuse_port=False):
+        self._loop = asyncio.get_running_loop()
+        self._server = await self._loop.create_server(
+            lambda: _MockProtocol(self, self._loop), host, port, reuse_port=reuse_port or None
+        )
+        return self._server.sockets[0].getsockname()[1]
+
+    def serve(self, host="127.0.0.1", port=8080, reuse_port=False):
+        """
+        Serves requests until interrupted
+
+        :param host: The address to listen on
+        :type host: str
+        :param port: The port to listen on
+        :type port: int
+        :param reuse_port: If True, several processes may listen on the same
+                           port, and the operating system balances connections
+                           between them
+        :type reuse_port: bool
+        """
+
+        async def run():
+            await self._start(host, port, reuse_port)
+            async with self._server:
+                await self._server.serve_forever()
+
+        asyncio.run(run())
+
+    def start(self, host="127.0.0.1", port=0):
+        """
+        Serves requests from a background thread, returning once the server is
+        listening
+
+        :param host: The address to listen on
+        :type host: str
+        :param port: The port to listen on; by default, any free port
+        :type port: int
+
+        :returns: The server's base URL
+        :rtype: str
+        """
+        loop = asyncio.new_event_loop()
+        port = loop.run_until_complete(self._start(host, port))
+        threading.Thread(target=loop.run_forever, daemon=True).start()
+        return "http://{}:{}".format(host, port)
+
+    def stop(self):
+        """
+        Stops a server started with :any:`start`
+        """
+        loop, server = self._loop, self._server
+        if loop is None:
+            return
+
+        def close():
+            server.close()
+            loop.stop()
+
+        loop.call_soon_threadsafe(close)
+        self._loop = self._server = None
+
+    def stats(self):
+        """
+        Returns the number of requests to each operation, and how many were
+        answered with an injected error
+
+        :rtype: dict[str, dict[str, int]]
+        """
+        with self._lock:
+            return {
+                c.name: {"requests": c.requests, "errors": c.errors} for c in self._operations.values() if c.requests
+            }
+
+
+def _per_operation(values, name, per_operation):
+    """
+    Parses command line values that are either a number for every operation,
+    or ``operationId=number`` for one, returning the number for every operation
+    """
+    default = 0.0
+    for value in values or []:
+        operation_id, _, number = value.rpartition("=")
+        if operation_id:
+            per_operation.setdefault(operation_id, {})[name] = float(number)
+        else:
+            default = float(number)
+    return default
+
+
+def _serve(raw, latency, error_rate, per_operation, seed, samples, host, port, reuse_port):
+    server = MockServer(OpenAPI(raw), latency, error_rate, per_operation, seed=seed, samples=samples)
+    try:
+        server.serve(host, port, reuse_port=reuse_port)
+    except KeyboardInterrupt:
+        pass
+
+
+def main(argv=None):
+    """
+    Runs the mock server from the command line
+    """
+    parser = argparse.ArgumentParser(prog="python -m openapi3 mock", description=__doc__.strip().splitlines()[0])
+    parser.add_argument("spec", help="the spec to serve, as YAML or JSON")
+    parser.add_argument("--host", default="127.0.0.1", help="the address to listen on")
+    parser.add_argument("--port", type=int, default=8080, help="the port to listen on")
+    parser.add_argument(
+        "--latency",
+        action="append",
+        metavar="[OPERATION=]SECONDS",
+        help="seconds to wait before answering, for every operation or one; may be repeated",
+    )
+    parser.add_argument(
+        "--error-rate",
+        action="append",
+        metavar="[OPERATION=]RATE",
+        help="the fraction of requests to fail, for every operation or one; may be repeated",
+    )
+    parser.add_argument("--seed", type=int, help="seeds which requests fail, and the samples generated")
+    parser.add_argument(
+        "--samples", type=int, default=0, help="generate this many random responses for operations without examples"
+    )
+    parser.add_argument("--workers", type=int, default=1, help="processes to serve from, sharing the port")
+    args = parser.parse_args(argv)
+
+    with open(args.spec) as f:
+        raw = yaml.safe_load(f.read())
+
+    per_operation = {}
+    latency = _per_operation(args.latency, "latency", per_operation)
+    error_rate = _per_operation(args.error_rate, "error_rate", per_operation)
+
+    options = (latency, error_rate, per_operation, args.seed, args.samples, args.host, args.port, args.workers > 1)
+    workers = [
+        multiprocessing.Process(target=_serve, args=(raw,) + options, daemon=True) for _ in range(args.workers - 1)
+    ]
+    for c in workers:
+        c.start()
+
+    print("Serving {} on http://{}:{}".format(args.spec, args.host, args.port), file=sys.stderr)
+    _serve(raw, *options)
@@ -1,7 +1,17 @@
+import time
+
 import requests
 
 from .object_base import ObjectBase, Map
-from .errors import ReferenceResolutionError, SpecError
+from .codec import get_codec
+from .compression import RequestCompression
+from .errors import ReferenceResolutionError, SpecError, UnexpectedResponseError
+from .hooks import Hooks
+from .memory import memory_report
+from .routing import Router
+from .servers import server_urls
+from .singleflight import SingleFlight
+from .transports import UNAVAILABLE_ERRORS
 
 
 class OpenAPI(ObjectBase):
@@ -27,11 +37,46 @@ class OpenAPI(ObjectBase):
         "_spec_errors",
         "_ssl_verify",
         "_session",
+        "_transport",
+        "_cache",
+        "_single_flight",
+        "_server_selector",
+        "_hedging",
+        "_retry",
+        "_circuit_breaker",
+        "_rate_limiter",
+        "_bulkhead",
+        "_hooks",
+        "_tracer",
+        "_codec",
+        "_compression",
+        "_validate_requests",
+        "_router",
+        "_server_urls",
     ]
     required_fields = ["openapi", "info", "paths"]
 
     def __init__(
-        self, raw_document, validate=False, ssl_verify=None, use_session=False, session_factory=requests.Session
+        self,
+        raw_document,
+        validate=False,
+        ssl_verify=None,
+        use_session=False,
+        session_factory=requests.Session,
+        transport=None,
+        cache=None,
+        coalesce=False,
+        server_selector=None,
+        hedging=None,
+        retry=None,
+        circuit_breaker=None,
+        rate_limiter=None,
+        bulkhead=None,
+        metrics=None,
+        tracer=None,
+        codec=None,
+        compression=None,
+        validate_requests=False,
     ):
         """
         Creates a new OpenAPI document from a loaded spec file.  This is
@@ -49,6 +94,59 @@ class OpenAPI(ObjectBase):
         :type ssl_verify: bool, str, None
         :param use_session: Should we use a consistent session between API calls
         :type use_session: bool
+        :param transport: The transport to send requests with.  If not given,
+                          requests are sent with requests.
+        :type transport: openapi3.transports.Transport
+        :param cache: If given, the models returned by GET operations are cached
+                      here according to the responses' caching headers.
+        :type cache: openapi3.cache.ResponseCache
+        :param coalesce: If True, identical concurrent calls to safe operations
+                         share a single request.
+        :type coalesce: bool
+        :param server_selector: If given, chooses the server each call is sent to
+                                based on the health of the servers declared for
+                                its operation, failing over to the next if one
+                                can't be reached.  Otherwise, calls are sent to
+                                the first server declared.
+        :type server_selector: openapi3.servers.ServerSelector
+        :param hedging: If given, slow calls to safe operations are duplicated to
+                        the next server declared for the operation, and the
+                        first response received is returned.
+        :type hedging: openapi3.hedging.HedgingPolicy
+        :param retry: If given, calls that fail because a server could not be
+                      reached or answered with a retryable status are retried
+                      according to this policy.
+        :type retry: openapi3.retry.RetryPolicy
+        :param circuit_breaker: If given, requests are not sent to servers that
+                                have recently failed repeatedly.
+        :type circuit_breaker: openapi3.retry.CircuitBreaker
+        :param rate_limiter: If given, requests wait for this to allow them before
+                             being sent.
+        :type rate_limiter: openapi3.ratelimit.RateLimiter
+        :param bulkhead: If given, limits the number of concurrent requests to
+                         each operation.
+        :type bulkhead: openapi3.ratelimit.Bulkhead
+        :param metrics: If given, the number, latency, size and outcome of calls
+                        are recorded here.
+        :type metrics: openapi3.metrics.Metrics
+        :param tracer: If given, requests are traced with this, and the trace
+                       is propagated to the server in a traceparent header.  An
+                       OpenTelemetry tracer may be used.
+        :type tracer: openapi3.tracing.Tracer
+        :param codec: The JSON codec to encode request bodies and decode
+                      responses with, or the name of one ("orjson", "ujson" or
+                      "json").  Defaults to the fastest installed.
+        :type codec: openapi3.codec.JSONCodec, str
+        :param compression: If given, request bodies larger than its threshold
+                            are compressed, or the name of the encoding to
+                            compress them with ("gzip" or "deflate").
+                            Operations may opt in or out with the
+                            ``x-compress`` extension.
+        :type compression: openapi3.compression.RequestCompression, str
+        :param validate_requests: If True, the parameters and body of each call
+                                  are checked against their schemas before the
+                                  request is sent.
+        :type validate_requests: bool
         """
         # do this first so super().__init__ can see it
         self.validation_mode = validate
@@ -67,6 +165,39 @@ class OpenAPI(ObjectBase):
         if use_session:
             self._session = session_factory()
 
+        self._transport = transport
+        self._cache = cache
+
+        self._single_flight = None
+        if coalesce:
+            self._single_flight = SingleFlight()
+
+        self._server_selector = server_selector
+        self._hedging = hedging
+        self._retry = retry
+        self._circuit_breaker = circuit_breaker
+        self._rate_limiter = rate_limiter
+        self._bulkhead = bulkhead
+
+        self._hooks = None
+        if metrics is not None:
+            self._hooks = Hooks(metrics)
+
+        self._tracer = tracer
+
+        if codec is None or isinstance(codec, str):
+            codec = get_codec(codec)
+        self._codec = codec
+
+        if isinstance(compression, str):
+            compression = RequestCompression(compression)
+        self._compression = compression
+        self._validate_requests = validate_requests
+        self._router = None
+
+        # the expanded URLs of each operation's servers, by operationId
+        self._server_urls = {}
+
     # public methods
     def authenticte(self, security_scheme, value):
         """
@@ -87,6 +218,112 @@ class OpenAPI(ObjectBase):
 
     authenticate = authenticte
 
+    def _add_hook(self, event, func):
+        """
+        Registers a callback for an event, setting up hooks if this is the first
+        """
+        if self._hooks is None:
+            self._hooks = Hooks()
+        self._hooks.add(event, func)
+        return func
+
+    def on_request_start(self, func):
+        """
+        Registers a function to call with the operation and prepared request
+        before each request is sent.  Returns the function, so that this may be
+        used as a decorator.
+
+        :param func: The function to call
+        :type func: callable
+        """
+        return self._add_hook("request_start", func)
+
+    def on_response(self, func):
+        """
+        Registers a function to call with the operation, request and response
+        when each response is received, before it is parsed.  Returns the
+        function, so that this may be used as a decorator.
+
+        :param func: The function to call
+        :type func: callable
+        """
+        return self._add_hook("response", func)
+
+    def on_error(self, func):
+        """
+        Registers a function to call with the operation, request and error when
+        sending a request or parsing its response fails.  Returns the function,
+        so that this may be used as a decorator.
+
+        :param func: The function to call
+        :type func: callable
+        """
+        return self._add_hook("error", func)
+
+    def on_model_built(self, func):
+        """
+        Registers a function to call with the operation and model when a model
+        is built from a response.  Returns the function, so that this may be used
+        as a decorator.
+
+        :param func: The function to call
+        :type func: callable
+        """
+        return self._add_hook("model_built", func)
+
+    def match(self, method, path):
+        """
+        Finds the operation a request to this API calls, for example to validate
+        incoming requests on the server side::
+
+           operation, parameters = api.match("GET", "/regions/us-east")
+
+        Literal path segments are matched before templated ones, so
+        ``/users/me`` is preferred over ``/users/{id}``.  The paths of the spec
+        are compiled for matching the first time this is called.
+
+        :param method: The method of the request
+        :type method: str
+        :param path: The path of the request, optionally including the path of
+                     the server and a query string
+        :type path: str
+
+        :returns: The operation and the values of its path parameters, or None
+                  if no operation matches
+        :rtype: tuple[Operation, dict[str, str]], None
+        """
+        if self._router is None:
+            self._router = Router(self)
+        return self._router.match(method, path)
+
+    def memory_report(self, top=10):
+        """
+        Reports how much memory this parsed spec holds, to see how much of a
+        process' memory it accounts for::
+
+           report = api.memory_report()
+           report["total"]                    # bytes held by the whole spec
+           report["objects"]["Schema"]        # {"count": 120, "bytes": 104448}
+           report["subtrees"][0]["pointer"]   # "#/paths/~1regions"
+
+        The spec is walked from this object, and each object is counted once,
+        where it's defined, including the raw elements of the spec it retains
+        and the model types generated from its schemas.  Objects shared with
+        other parts of the process, such as a session's default settings, are
+        counted with the first element found holding them.
+
+        :param top: How many of the largest subtrees to report
+        :type top: int
+
+        :returns: The ``total`` size in bytes; the count and size of the
+                  ``objects`` of each type (including ``Map`` and
+                  ``ReferenceProxy``), the ``raw_element`` dicts retained, and
+                  the generated ``models``; and the largest ``subtrees`` of
+                  the spec, by JSON pointer
+        :rtype: dict
+        """
+        return memory_report(self, top)
+
     def resolve_path(self, path):
         """
         Given a $ref path, follows the document tree and returns the given attribute.
@@ -193,15 +430,44 @@ class OpenAPI(ObjectBase):
         pre-initialized with the required values from this object.
 
         :param operation: The Operation the callable should call
-        :type operation: callable (Operation.request)
+        :type operation: Operation
 
         :returns: The callable that executes this operation with this object's
                   configuration.
         :rtype: OperationCallable
         """
-        base_url = self.servers[0].url
-
-        return OperationCallable(operation, base_url, self._security, self._ssl_verify, self._session)
+        base_url = None
+        urls = None
+        if self._server_selector is None:
+            # servers are expanded once per operation, rather than on every
+            # lookup
+            urls = self._server_urls.get(operation.operationId)
+            if urls is None:
+                urls = self._server_urls[operation.operationId] = server_urls(operation)
+            base_url = urls[0]
+
+        return OperationCallable(
+            operation,
+            base_url,
+            self._security,
+            self._ssl_verify,
+            self._session,
+            transport=self._transport,
+            cache=self._cache,
+            single_flight=self._single_flight,
+            server_selector=self._server_selector,
+            hedging=self._hedging,
+            retry=self._retry,
+            circuit_breaker=self._circuit_breaker,
+            rate_limiter=self._rate_limiter,
+            bulkhead=self._bulkhead,
+            hooks=self._hooks,
+            tracer=self._tracer,
+            codec=self._codec,
+            compression=self._compression,
+            validate=self._validate_requests,
+            server_urls=urls,
+        )
 
     def __getattribute__(self, attr):
         """
@@ -225,7 +491,7 @@ class OpenAPI(ObjectBase):
         if attr.startswith("call_"):
             _, operationId = attr.split("_", 1)
             if operationId in self._operation_map:
-                return self._get_callable(self._operation_map[operationId].request)
+                return self._get_callable(self._operation_map[operationId])
             else:
                 raise AttributeError("{} has no operation {}".format(self.info.title, operationId))
 
@@ -241,16 +507,173 @@ class OperationCallable:
     directly.
     """
 
-    def __init__(self, operation, base_url, security, ssl_verify, session):
+    def __init__(
+        self,
+        operation,
+        base_url,
+        security,
+        ssl_verify,
+        session,
+        transport=None,
+        cache=None,
+        single_flight=None,
+        server_selector=None,
+        hedging=None,
+        retry=None,
+        circuit_breaker=None,
+        rate_limiter=None,
+        bulkhead=None,
+        hooks=None,
+        tracer=None,
+        codec=None,
+        compression=None,
+        validate=False,
+        server_urls=None,
+    ):
         self.operation = operation
         self.base_url = base_url
         self.security = security
         self.ssl_verify = ssl_verify
         self.session = session
+        self.transport = transport
+        self.cache = cache
+        self.single_flight = single_flight
+        self.server_selector = server_selector
+        self.hedging = hedging
+        self.retry = retry
+        self.circuit_breaker = circuit_breaker
+        self.rate_limiter = rate_limiter
+        self.bulkhead = bulkhead
+        self.hooks = hooks
+        self.tracer = tracer
+        self.codec = codec
+        self.compression = compression
+        self.validate = validate
+        self.server_urls = server_urls
 
     def __call__(self, *args, **kwargs):
         if self.ssl_verify is not None:
             kwargs["verify"] = self.ssl_verify
         if self.session:
             kwargs["session"] = self.session
-        return self.operation(self.base_url, *args, security=self.security, **kwargs)
+        if self.transport is not None:
+            kwargs["transport"] = self.transport
+        if self.cache is not None:
+            kwargs["cache"] = self.cache
+        if self.rate_limiter is not None:
+            kwargs["rate_limiter"] = self.rate_limiter
+        if self.bulkhead is not None:
+            kwargs["bulkhead"] = self.bulkhead
+        if self.hooks is not None:
+            kwargs["hooks"] = self.hooks
+        if self.tracer is not None:
+            kwargs["tracer"] = self.tracer
+        if self.codec is not None:
+            kwargs["codec"] = self.codec
+        if self.compression is not None:
+            kwargs["compression"] = self.compression
+        if self.validate:
+            kwargs.setdefault("validate", True)
+
+        # streamed responses and downloads can only be read once, so they can't
+        # be shared
+        if (
+            self.single_flight is not None
+            and not kwargs.get("stream")
+            and kwargs.get("download") is None
+            and self.single_flight.applies_to(self.operation)
+        ):
+            key = self.single_flight.key(self.operation, self.base_url, self.security, kwargs)
+            return self.single_flight.do(key, lambda: self._call(*args, **kwargs))
+
+        return self._call(*args, **kwargs)
+
+    def _call(self, *args, **kwargs):
+        """
+        Calls the operation with the given arguments, retrying it if a retry
+        policy is configured
+        """
+        # files and iterators are consumed by uploading them, so can't be resent
+        data = kwargs.get("data")
+        replayable = not (hasattr(data, "read") or hasattr(data, "__next__"))
+
+        if self.retry is not None and replayable and self.retry.applies_to(self.operation):
+            return self.retry.call(self.operation, lambda: self._request(*args, **kwargs))
+
+        return self._request(*args, **kwargs)
+
+    def _request(self, *args, **kwargs):
+        """
+        Calls the operation with the given arguments, choosing the server to send
+        the request to if a server selector is configured, and hedging the call
+        if a hedging policy is
+        """
+        if self.server_selector is not None:
+            candidates = self.server_selector.candidates(self.operation)
+        elif self.hedging is not None:
+            candidates = [self.base_url] + [c for c in self.server_urls if c != self.base_url]
+        else:
+            return self._send(self.base_url, *args, **kwargs)
+
+        # streamed responses and downloads can only be read once, so they can't
+        # be raced against a duplicate
+        if (
+            self.hedging is not None
+            and len(candidates) > 1
+            and not kwargs.get("stream")
+            and kwargs.get("download") is None
+            and self.hedging.applies_to(self.operation)
+        ):
+            return self.hedging.call(
+                self.operation,
+                lambda: self._send(candidates[0], *args, **kwargs),
+                lambda: self._send(candidates[1], *args, **kwargs),
+            )
+
+        for i, base_url in enumerate(candidates):
+            try:
+                return self._send(base_url, *args, **kwargs)
+            except UNAVAILABLE_ERRORS:
+                if self.server_selector is None or i == len(candidates) - 1:
+                    raise
+
+    def _send(self, base_url, *args, **kwargs):
+        """
+        Sends a request to the given server, recording its outcome with the
+        server selector and circuit breaker if they are configured
+        """
+        if self.server_selector is None and self.circuit_breaker is None:
+            return self.operation.request(base_url, *args, security=self.security, **kwargs)
+
+        if self.circuit_breaker is not None:
+            self.circuit_breaker.check(base_url)
+
+        start = time.monotonic()
+        try:
+            result = self.operation.request(base_url, *args, security=self.security, **kwargs)
+        except UNAVAILABLE_ERRORS:
+            self._record(base_url, unreachable=True)
+            raise
+        except UnexpectedResponseError as e:
+            self._record(base_url, time.monotonic() - start, error=e.status_code >= 500)
+            raise
+        except Exception:
+            # not the server's fault, like invalid parameters, so nothing is
+            # recorded; a probe of a half open circuit is released so that
+            # another can be sent
+            if self.circuit_breaker is not None:
+                self.circuit_breaker.release(base_url)
+            raise
+
+        self._record(base_url, time.monotonic() - start)
+        return result
+
+    def _record(self, base_url, latency=None, error=False, unreachable=False):
+        """
+        Records the outcome of a request with the server selector and circuit
+        breaker, if they are configured
+        """
+        if self.server_selector is not None:
+            self.server_selector.record(base_url, latency, error=error, unreachable=unreachable)
+        if self.circuit_breaker is not None:
+            self.circuit_breaker.record(base_url, error or unreachable)
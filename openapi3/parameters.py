@@ -0,0 +1,331 @@
+import re
+from urllib.parse import quote, unquote, unquote_plus
+
+from .codec import model_to_dict
+from .schemas import Model
+
+#: The styles each parameter location allows, the first being its default
+STYLES = {
+    "path": ("simple", "label", "matrix"),
+    "query": ("form", "spaceDelimited", "pipeDelimited", "deepObject"),
+    "header": ("simple",),
+    "cookie": ("form",),
+}
+
+#: The characters a parameter with ``allowReserved`` sends without encoding
+RESERVED = ":/?#[]@!$&'()*+,;="
+
+# how each style separates the items of an array that isn't exploded; the
+# delimiters are sent encoded, but may be received either way
+_DELIMITERS = {"spaceDelimited": "%20", "pipeDelimited": "%7C"}
+_SPLITTERS = {
+    "spaceDelimited": re.compile(r"%20|\+| "),
+    "pipeDelimited": re.compile(r"%7[Cc]|\|"),
+}
+
+
+def _text(value):
+    """
+    Returns a primitive value as it's written in a parameter
+    """
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if value is None:
+        return ""
+    return str(value)
+
+
+def _raw(text):
+    return text
+
+
+def _boolean(text):
+    if text == "true":
+        return True
+    if text == "false":
+        return False
+    raise ValueError(text)
+
+
+#: How deserialized values are converted to the primitive types of their schemas
+_CONVERTERS = {"integer": int, "number": float, "boolean": _boolean}
+
+
+def parse_query(query):
+    """
+    Splits a query string into pairs of names and values for
+    :any:`ParameterCodec.deserialize`.  Names are decoded; values are left
+    encoded, so that they can be split on delimiters before being decoded.
+
+    :param query: The query string, without the leading ``?``
+    :type query: str
+
+    :rtype: list[tuple[str, str]]
+    """
+    pairs = []
+    for c in query.split("&"):
+        if not c:
+            continue
+        name, _, value = c.partition("=")
+        pairs.append((unquote_plus(name), value))
+    return pairs
+
+
+class ParameterCodec:
+    """
+    Serializes a parameter's values according to its ``style``, ``explode`` and
+    ``allowReserved``, and deserializes them again.  Each :any:`Parameter`
+    compiles one once its references are resolved, so that the work of
+    choosing how to encode it is done once rather than on every call.
+
+    Path and query values are percent encoded; header and cookie values are
+    sent as they are.  Path parameters serialize to the text substituted into
+    the path, and headers to the header's value; query and cookie parameters
+    serialize to a list of names and values, since exploded arrays and objects
+    become several of them.
+    """
+
+    __slots__ = ["name", "location", "style", "explode", "schema", "_safe", "_quote", "_encoded_name", "_serialize"]
+
+    def __init__(self, name, location, style=None, explode=None, allow_reserved=False, schema=None):
+        """
+        :param name: The parameter's name
+        :type name: str
+        :param location: Where the parameter is sent; one of ``path``,
+                         ``query``, ``header`` or ``cookie``
+        :type location: str
+        :param style: How the parameter is serialized, defaulting to the
+                      location's default style
+        :type style: str
+        :param explode: If arrays and objects are sent as separate values,
+                        defaulting to True for the ``form`` style only
+        :type explode: bool
+        :param allow_reserved: If reserved characters are sent without being
+                               percent encoded, for query parameters
+        :type allow_reserved: bool
+        :param schema: The parameter's schema, used to convert deserialized
+                       values to the types it describes
+        :type schema: Schema
+        """
+        if location not in STYLES:
+            raise ValueError("Unknown parameter location {}".format(location))
+        if style is None:
+            style = STYLES[location][0]
+        elif style not in STYLES[location]:
+            raise ValueError(
+                "Style {} is not allowed for {} parameters (expected one of {})".format(
+                    style, location, ", ".join(STYLES[location])
+                )
+            )
+
+        self.name = name
+        self.location = location
+        self.style = style
+        self.explode = explode if explode is not None else style == "form"
+        self.schema = schema
+        self._safe = RESERVED if allow_reserved and location == "query" else ""
+        # only values in the URL are percent encoded
+        self._quote = location in ("path", "query")
+        self._encoded_name = quote(name, safe="") if self._quote else name
+        self._serialize = getattr(self, "_serialize_" + style)
+
+    def _encode(self, value):
+        if type(value) is int:
+            # digits and signs never need encoding
+            return str(value)
+        if not self._quote:
+            return _text(value)
+        return quote(_text(value), safe=self._safe)
+
+    def _items(self, value, separator):
+        """
+        Returns the encoded keys and values of an object, each pair joined by
+        ``separator``
+        """
+        return [self._encode(k) + separator + self._encode(v) for k, v in value.items()]
+
+    def serialize(self, value):
+        """
+        Serializes a value of this parameter
+
+        :param value: The value to serialize
+        :type value: str, int, float, bool, list, dict, Model
+
+        :returns: The text of path and header parameters, or a list of names
+                  and values for query and cookie parameters
+        :rtype: str, list[tuple[str, str]]
+        """
+        if isinstance(value, Model):
+            value = model_to_dict(value)
+        return self._serialize(value)
+
+    def _serialize_simple(self, value):
+        if isinstance(value, (list, tuple)):
+            return ",".join(self._encode(c) for c in value)
+        if isinstance(value, dict):
+            if self.explode:
+                return ",".join(self._items(value, "="))
+            return ",".join(self._items(value, ","))
+        return self._encode(value)
+
+    def _serialize_label(self, value):
+        if isinstance(value, (list, tuple)):
+            return "." + ("." if self.explode else ",").join(self._encode(c) for c in value)
+        if isinstance(value, dict):
+            if self.explode:
+                return "." + ".".join(self._items(value, "="))
+            return "." + ",".join(self._items(value, ","))
+        return "." + self._encode(value)
+
+    def _serialize_matrix(self, value):
+        prefix = ";" + self._encoded_name + "="
+        if isinstance(value, (list, tuple)):
+            if self.explode:
+                return "".join(prefix + self._encode(c) for c in value)
+            return prefix + ",".join(self._encode(c) for c in value)
+        if isinstance(value, dict):
+            if self.explode:
+                return "".join(";" + c for c in self._items(value, "="))
+            return prefix + ",".join(self._items(value, ","))
+        return prefix + self._encode(value)
+
+    def _serialize_form(self, value):
+        name = self._encoded_name
+        if isinstance(value, (list, tuple)):
+            if self.explode:
+                return [(name, self._encode(c)) for c in value]
+            return [(name, ",".join(self._encode(c) for c in value))]
+        if isinstance(value, dict):
+            if self.explode:
+                return [(self._encode(k), self._encode(v)) for k, v in value.items()]
+            return [(name, ",".join(self._items(value, ",")))]
+        return [(name, self._encode(value))]
+
+    def _serialize_delimited(self, value):
+        if isinstance(value, (list, tuple)) and not self.explode:
+            return [(self._encoded_name, _DELIMITERS[self.style].join(self._encode(c) for c in value))]
+        if isinstance(value, dict) and not self.explode:
+            return [(self._encoded_name, _DELIMITERS[self.style].join(self._items(value, _DELIMITERS[self.style])))]
+        return self._serialize_form(value)
+
+    _serialize_spaceDelimited = _serialize_pipeDelimited = _serialize_delimited
+
+    def _serialize_deepObject(self, value):
+        if not isinstance(value, dict):
+            raise ValueError("deepObject parameter {} must be an object, not {}".format(self.name, value))
+        return [("{}[{}]".format(self._encoded_name, self._encode(k)), self._encode(v)) for k, v in value.items()]
+
+    def _coerce_all(self, items, schema, decode=unquote):
+        """
+        Decodes values and converts them to the primitive type their schema
+        describes
+        """
+        kind = getattr(schema, "type", None)
+        convert = _CONVERTERS.get(kind)
+        if convert is None:
+            return [decode(c) for c in items]
+        try:
+            return [convert(decode(c)) for c in items]
+        except ValueError:
+            raise ValueError("Invalid value for parameter {} (expected {})".format(self.name, kind))
+
+    def _coerce(self, text, schema, decode=unquote):
+        # the same as _coerce_all for a single value, which is most of them
+        kind = getattr(schema, "type", None)
+        convert = _CONVERTERS.get(kind)
+        if convert is None:
+            return decode(text)
+        try:
+            return convert(decode(text))
+        except ValueError:
+            raise ValueError("Invalid value for parameter {} (expected {})".format(self.name, kind))
+
+    def _kind(self):
+        return getattr(self.schema, "type", None)
+
+    def _array(self, items, decode=unquote):
+        return self._coerce_all(items, getattr(self.schema, "items", None), decode)
+
+    def _object(self, pairs, decode=unquote, decode_keys=True):
+        properties = getattr(self.schema, "properties", None) or {}
+        result = {}
+        for k, v in pairs:
+            if decode_keys:
+                k = decode(k)
+            result[k] = self._coerce(v, properties.get(k), decode)
+        return result
+
+    @staticmethod
+    def _alternating(items):
+        return zip(items[::2], items[1::2])
+
+    def deserialize(self, raw):
+        """
+        Deserializes a value of this parameter as it was received, converting
+        its values to the types described by its schema
+
+        :param raw: The text of a path or header parameter, as received, or the
+                    names and values of a request's query parameters or
+                    cookies, as returned by :any:`parse_query`
+        :type raw: str, list[tuple[str, str]]
+
+        :returns: The value, or None if a query or cookie parameter is absent
+        :raises ValueError: If the value doesn't match the parameter's schema
+        """
+        if self.location in ("query", "cookie"):
+            return self._deserialize_pairs(raw)
+
+        # path parameters arrive percent encoded, and headers as they were sent
+        decode = unquote if self.location == "path" else _raw
+        kind = self._kind()
+        separator = ","
+        if self.style == "label":
+            raw = raw[1:] if raw.startswith(".") else raw
+            if self.explode:
+                separator = "."
+        elif self.style == "matrix":
+            segments = [c.partition("=") for c in raw.split(";") if c]
+            if self.explode and kind == "object":
+                return self._object(((k, v) for k, _, v in segments), decode)
+            if self.explode and kind == "array":
+                return self._array((v for _, _, v in segments), decode)
+            raw = segments[0][2] if segments else ""
+
+        if kind == "array":
+            return self._array(raw.split(separator) if raw else [], decode)
+        if kind == "object":
+            if self.explode:
+                return self._object((c.partition("=")[::2] for c in raw.split(separator) if c), decode)
+            return self._object(self._alternating(raw.split(",")), decode)
+        return self._coerce(raw, self.schema, decode)
+
+    def _deserialize_pairs(self, pairs):
+        # cookies are sent as they are, so only query values are decoded
+        decode = unquote_plus if self.location == "query" else _raw
+        kind = self._kind()
+
+        if self.style == "deepObject":
+            prefix = self.name + "["
+            found = [(k[len(prefix) : -1], v) for k, v in pairs if k.startswith(prefix) and k.endswith("]")]
+            return self._object(found, decode, decode_keys=False) if found else None
+
+        if kind == "object" and self.explode:
+            # the object's properties are parameters of their own
+            properties = getattr(self.schema, "properties", None)
+            found = [(k, v) for k, v in pairs if properties is None or k in properties]
+            return self._object(found, decode, decode_keys=False) if found else None
+
+        values = [v for k, v in pairs if k == self.name]
+        if not values:
+            return None
+
+        splitter = _SPLITTERS.get(self.style)
+        if kind == "array":
+            if self.explode:
+                return self._array(values, decode)
+            items = splitter.split(values[0]) if splitter is not None else values[0].split(",")
+            return self._array([c for c in items if c], decode)
+        if kind == "object":
+            items = splitter.split(values[0]) if splitter is not None else values[0].split(",")
+            return self._object(self._alternating(items), decode)
+        return self._coerce(values[0], self.schema, decode)
@@ -1,5 +1,5 @@
-import json
 import re
+import time
 import requests
 
 try:
@@ -7,9 +7,25 @@ try:
 except ImportError:
     from urllib import urlencode
 
+from .codec import DEFAULT_CODEC
+from .compression import RequestCompression
 from .errors import SpecError, UnexpectedResponseError
+from .forms import FORM_TYPES, FormEncoder
 from .object_base import ObjectBase
+from .parameters import ParameterCodec
 from .schemas import Model
+from .streaming import (
+    CHUNK_SIZE,
+    JSON_LINES_TYPES,
+    ModelStream,
+    ResponseStream,
+    copy_into,
+    is_binary_body,
+    iter_json_array,
+    iter_json_lines,
+)
+from .tracing import format_traceparent, operation_span, phase_span
+from .validation import RequestValidator
 
 
 def _validate_parameters(instance):
@@ -101,6 +117,7 @@ class Parameter(ObjectBase):
         "schema",
         "example",
         "examples",
+        "_codec",
     ]
     required_fields = ["name", "in"]
 
@@ -125,6 +142,22 @@ class Parameter(ObjectBase):
             err_msg = "Parameter {} must be required since it is in the path"
             raise SpecError(err_msg.format(self.get_path()), path=self.path)
 
+        # work out how to serialize this parameter once, rather than per call
+        try:
+            self._codec = ParameterCodec(self.name, self.in_, self.style, self.explode, self.allowReserved, self.schema)
+        except ValueError as e:
+            raise SpecError("Parameter {}: {}".format(self.get_path(), e), path=self.path)
+
+    def _resolve_references(self):
+        """
+        Overloaded _resolve_references to give the parameter's codec its
+        resolved schema
+        """
+        super(self.__class__, self)._resolve_references()
+        # in validation mode, a parameter that failed to parse has no codec
+        if self._codec is not None:
+            self._codec.schema = self.schema
+
 
 class Operation(ObjectBase):
     """
@@ -147,7 +180,8 @@ class Operation(ObjectBase):
         "deprecated",
         "servers",
         "_session",
-        "_request",
+        "_form",
+        "_validator",
     ]
     required_fields = ["responses"]
 
@@ -187,8 +221,9 @@ class Operation(ObjectBase):
         # Store session object
         self._session = requests.Session()
 
-        # Store request object
-        self._request = requests.Request()
+        # built the first time a form is sent, or a call validated
+        self._form = None
+        self._validator = None
 
     def _resolve_references(self):
         """
@@ -200,36 +235,36 @@ class Operation(ObjectBase):
         # this will raise if parameters are invalid
         _validate_parameters(self)
 
-    def _request_handle_secschemes(self, security_requirement, value):
+    def _request_handle_secschemes(self, request, security_requirement, value):
         ss = self._root.components.securitySchemes[security_requirement.name]
 
         if ss.type == "http" and ss.scheme == "basic":
-            self._request.auth = requests.auth.HTTPBasicAuth(*value)
+            request.auth = requests.auth.HTTPBasicAuth(*value)
 
         if ss.type == "http" and ss.scheme == "digest":
-            self._request.auth = requests.auth.HTTPDigestAuth(*value)
+            request.auth = requests.auth.HTTPDigestAuth(*value)
 
         if ss.type == "http" and ss.scheme == "bearer":
             header = ss.bearerFormat or "Bearer {}"
-            self._request.headers["Authorization"] = header.format(value)
+            request.headers["Authorization"] = header.format(value)
 
         if ss.type == "mutualTLS":
             # TLS Client certificates (mutualTLS)
-            self._request.cert = value
+            request.cert = value
 
         if ss.type == "apiKey":
             if ss.in_ == "query":
                 # apiKey in query parameter
-                self._request.params[ss.name] = value
+                request.params[ss.name] = value
 
             if ss.in_ == "header":
                 # apiKey in query header data
-                self._request.headers[ss.name] = value
+                request.headers[ss.name] = value
 
             if ss.in_ == "cookie":
-                self._request.cookies = {ss.name: value}
+                request.cookies = {ss.name: value}
 
-    def _request_handle_parameters(self, parameters={}):
+    def _request_handle_parameters(self, request, parameters={}):
         # Parameters
         path_parameters = {}
         accepted_parameters = {}
@@ -239,6 +274,7 @@ class Operation(ObjectBase):
             # TODO - make this work with $refs - can operations be $refs?
             accepted_parameters.update({_.name: _})
 
+        query = []
         for name, spec in accepted_parameters.items():
             try:
                 value = parameters[name]
@@ -249,100 +285,67 @@ class Operation(ObjectBase):
 
                 continue
 
+            # values are serialized according to the parameter's style
+            serialized = spec._codec.serialize(value)
+
             if spec.in_ == "path":
                 # The string method `format` is incapable of partial updates,
                 # as such we need to collect all the path parameters before
                 # applying them to the format string.
-                path_parameters[name] = value
+                path_parameters[name] = serialized
 
             if spec.in_ == "query":
-                self._request.params[name] = value
+                query.extend(serialized)
 
             if spec.in_ == "header":
-                self._request.headers[name] = value
+                request.headers[name] = serialized
 
             if spec.in_ == "cookie":
-                self._request.cookies[name] = value
+                if request.cookies is None:
+                    request.cookies = {}
+                request.cookies.update(serialized)
+
+        request.url = request.url.format(**path_parameters)
+        if query:
+            # already encoded, so this can't go through request.params
+            request.url += "?" + "&".join("{}={}".format(k, v) for k, v in query)
+
+    def _request_handle_body(self, request, data, codec=DEFAULT_CODEC):
+        if is_binary_body(data):
+            # bytes, files and iterators are uploaded as they are, as
+            # application/octet-stream or else the first media type that isn't
+            # JSON or a form; requests sends iterators chunked
+            content = self.requestBody.content
+            if "application/octet-stream" in content:
+                media_type = "application/octet-stream"
+            else:
+                media_type = next((c for c in content if c != "application/json" and c not in FORM_TYPES), None)
+            if media_type is not None:
+                request.data = data
+                request.headers["Content-Type"] = "application/octet-stream" if "*" in media_type else media_type
+                return
 
-        self._request.url = self._request.url.format(**path_parameters)
-
-    def _request_handle_body(self, data):
         if "application/json" in self.requestBody.content:
-            if isinstance(data, dict) or isinstance(data, list):
-                body = json.dumps(data)
-
-            if issubclass(type(data), Model):
-                # serialize models as dicts
-                converter = lambda c: dict(c)
-                data_dict = {k: v for k, v in data if v is not None}
+            if isinstance(data, (dict, list, Model)):
+                body = codec.dumps(data)
 
-                body = json.dumps(data_dict, default=converter)
-
-            self._request.data = body
-            self._request.headers["Content-Type"] = "application/json"
+            request.data = body
+            request.headers["Content-Type"] = "application/json"
         else:
-            raise NotImplementedError()
+            form = next((c for c in self.requestBody.content if c in FORM_TYPES), None)
+            if form is None:
+                raise NotImplementedError()
 
-    def request(self, base_url, security={}, data=None, parameters={}, verify=True, session=None, raw_response=False):
-        """
-        Sends an HTTP request as described by this Path
+            if self._form is None:
+                self._form = FormEncoder(form, self.requestBody.content[form])
+            request.data = self._form.encode(data, codec)
+            request.headers["Content-Type"] = self._form.content_type
 
-        :param base_url: The URL to append this operation's path to when making
-                         the call.
-        :type base_url: str
-        :param security: The security scheme to use, and the values it needs to
-                         process successfully.
-        :type security: dict{str: str}
-        :param data: The request body to send.
-        :type data: any, should match content/type
-        :param parameters: The parameters used to create the path
-        :type parameters: dict{str: str}
-        :param verify: Should we do an ssl verification on the request or not,
-                       In case str was provided, will use that as the CA.
-        :type verify: bool/str
-        :param session: a persistent request session
-        :type session: None, requests.Session
-        :param raw_response: If true, return the raw response instead of validating
-                             and exterpolating it.
-        :type raw_response: bool
+    def _request_find_media(self, result):
+        """
+        Finds the media type describing a response, returning it and the
+        response's content type, or None for both if no content was expected.
         """
-        # Set request method (e.g. 'GET')
-        self._request = requests.Request(self.path[-1])
-
-        # Set self._request.url to base_url w/ path
-        self._request.url = base_url + self.path[-2]
-
-        if security and self.security:
-            security_requirement = None
-            for scheme, value in security.items():
-                security_requirement = None
-                for r in self.security:
-                    if r.name == scheme:
-                        security_requirement = r
-                        self._request_handle_secschemes(r, value)
-
-            if security_requirement is None:
-                err_msg = """No security requirement satisfied (accepts {}) \
-                          """.format(
-                    ", ".join(self.security.keys())
-                )
-                raise ValueError(err_msg)
-
-        if self.requestBody:
-            if self.requestBody.required and data is None:
-                err_msg = "Request Body is required but none was provided."
-                raise ValueError(err_msg)
-
-            self._request_handle_body(data)
-
-        self._request_handle_parameters(parameters)
-
-        if session is None:
-            session = self._session
-
-        # send the prepared request
-        result = session.send(self._request.prepare(), verify=verify)
-
         # spec enforces these are strings
         status_code = str(result.status_code)
 
@@ -359,7 +362,7 @@ class Operation(ObjectBase):
         # if we got back a valid response code (or there was a default) and no
         # response content was expected, return None
         if expected_response.content is None:
-            return
+            return None, None
 
         content_type = result.headers["Content-Type"]
         if ';' in content_type:
@@ -386,12 +389,417 @@ class Operation(ObjectBase):
 
             raise RuntimeError(err_msg.format(*err_var))
 
-        response_data = None
+        return expected_media, content_type
 
-        if content_type.lower() == "application/json":
-            return expected_media.schema.model(result.json())
-        else:
-            raise NotImplementedError()
+    def _request_stream_schema(self, schema, stream):
+        """
+        Returns the schema of the items to stream from a response described by
+        ``schema``, and the field of the response object holding them (or None
+        if the response is an array).  Returns None for both if the response
+        can't be streamed, in which case it's read in full.
+
+        :param schema: The schema of the response
+        :type schema: Schema
+        :param stream: True, or the field holding the array to stream
+        :type stream: bool, str
+        """
+        if schema.type == "array":
+            return schema.items, None
+
+        field = stream if isinstance(stream, str) else schema.extensions.get("stream-field")
+        if field is None or schema.properties is None or field not in schema.properties:
+            return None, None
+
+        field_schema = schema.properties[field]
+        if field_schema.type != "array":
+            return None, None
+        return field_schema.items, field
+
+    def _request_stream(self, result, values, items_schema):
+        """
+        Returns the models decoded from a streamed response as they arrive, as
+        a :any:`ModelStream` that releases the response even if it's never
+        iterated
+        """
+        return ModelStream(result, values, items_schema)
+
+    def _send(self, prepared, verify, session, transport, stream=False):
+        """
+        Sends a prepared request with the given transport, or else with requests
+        """
+        if transport is not None:
+            if stream:
+                return transport.send(prepared, verify=verify, stream=True)
+            return transport.send(prepared, verify=verify)
+
+        if session is None:
+            session = self._session
+
+        if stream:
+            return session.send(prepared, verify=verify, stream=True)
+        return session.send(prepared, verify=verify)
+
+    def request(
+        self,
+        base_url,
+        security={},
+        data=None,
+        parameters={},
+        verify=True,
+        session=None,
+        raw_response=False,
+        transport=None,
+        cache=None,
+        rate_limiter=None,
+        bulkhead=None,
+        hooks=None,
+        tracer=None,
+        codec=None,
+        stream=False,
+        download=None,
+        compression=None,
+        validate=False,
+    ):
+        """
+        Sends an HTTP request as described by this Path
+
+        :param base_url: The URL to append this operation's path to when making
+                         the call.
+        :type base_url: str
+        :param security: The security scheme to use, and the values it needs to
+                         process successfully.
+        :type security: dict{str: str}
+        :param data: The request body to send.
+        :type data: any, should match content/type
+        :param parameters: The parameters used to create the path
+        :type parameters: dict{str: str}
+        :param verify: Should we do an ssl verification on the request or not,
+                       In case str was provided, will use that as the CA.
+        :type verify: bool/str
+        :param session: a persistent request session
+        :type session: None, requests.Session
+        :param raw_response: If true, return the raw response instead of validating
+                             and exterpolating it.
+        :type raw_response: bool
+        :param transport: The transport to send the request with.  If given,
+                          ``session`` is ignored.
+        :type transport: None, openapi3.transports.Transport
+        :param cache: The cache to look up and store the models returned by GET
+                      requests in.
+        :type cache: None, openapi3.cache.ResponseCache
+        :param rate_limiter: The rate limiter to wait for before sending the
+                             request, and to inform of the server's limits.
+        :type rate_limiter: None, openapi3.ratelimit.RateLimiter
+        :param bulkhead: The bulkhead limiting concurrent requests to this
+                         operation.
+        :type bulkhead: None, openapi3.ratelimit.Bulkhead
+        :param hooks: The callbacks to call, and metrics to record, as the
+                      request progresses.
+        :type hooks: None, openapi3.hooks.Hooks
+        :param tracer: The tracer to trace the request with.
+        :type tracer: None, openapi3.tracing.Tracer
+        :param codec: The codec to encode the request body and decode the
+                      response with.  Defaults to the fastest available.
+        :type codec: None, openapi3.codec.JSONCodec
+        :param stream: If True, and the response is a JSON array, return an
+                       iterator of a model for each item, decoding the response
+                       as it's received instead of reading it all first.  For
+                       responses that are objects, give the name of the field
+                       holding the array to stream, or mark it with the
+                       ``x-stream-field`` extension on the response schema.
+                       Responses that can't be streamed are read as usual.
+                       Newline delimited JSON responses are streamed a line
+                       at a time, and returned as a list if not streamed.
+                       Other responses are returned as a readable file-like
+                       object, which must be closed, instead of bytes.
+        :type stream: bool, str
+        :param download: A file, or writable buffer such as a bytearray, to
+                         write a response that isn't JSON into as it's received.
+                         The number of bytes written is returned.
+        :type download: file-like, bytearray, memoryview
+        :param compression: How to compress the request body, unless the
+                            operation's ``x-compress`` extension says otherwise.
+        :type compression: None, openapi3.compression.RequestCompression
+        :param validate: If True, the parameters and body are checked against
+                         their schemas before the request is sent, raising a
+                         :any:`RequestValidationError` for the first value that
+                         doesn't match.
+        :type validate: bool
+        """
+        if codec is None:
+            codec = DEFAULT_CODEC
+
+        if validate:
+            # compiled on first use, as references must be resolved first
+            if self._validator is None:
+                self._validator = RequestValidator(self)
+            self._validator.validate(parameters, data)
+
+        with operation_span(tracer, self, base_url) as span:
+            return self._request(
+                base_url,
+                security,
+                data,
+                parameters,
+                verify,
+                session,
+                transport,
+                cache,
+                rate_limiter,
+                bulkhead,
+                hooks,
+                tracer,
+                span,
+                codec,
+                stream,
+                download,
+                compression,
+            )
+
+    def _request(
+        self,
+        base_url,
+        security,
+        data,
+        parameters,
+        verify,
+        session,
+        transport,
+        cache,
+        rate_limiter,
+        bulkhead,
+        hooks,
+        tracer,
+        span,
+        codec,
+        stream,
+        download,
+        compression,
+    ):
+        """
+        Builds the request for :any:`request` and sends it.  If ``tracer`` is
+        given, each phase is traced in a child of ``span``.
+        """
+        # Set request method (e.g. 'GET'); this is built per call, as operations
+        # may be called from many threads at once
+        request = requests.Request(self.path[-1])
+
+        # Set request.url to base_url w/ path
+        request.url = base_url + self.path[-2]
+
+        if security and self.security:
+            with phase_span(tracer, "security"):
+                security_requirement = None
+                for scheme, value in security.items():
+                    security_requirement = None
+                    for r in self.security:
+                        if r.name == scheme:
+                            security_requirement = r
+                            self._request_handle_secschemes(request, r, value)
+
+                if security_requirement is None:
+                    err_msg = """No security requirement satisfied (accepts {}) \
+                              """.format(
+                        ", ".join(self.security.keys())
+                    )
+                    raise ValueError(err_msg)
+
+        if self.requestBody:
+            if self.requestBody.required and data is None:
+                err_msg = "Request Body is required but none was provided."
+                raise ValueError(err_msg)
+
+            with phase_span(tracer, "body"):
+                self._request_handle_body(request, data, codec)
+
+                # compressed as it's sent, not here
+                compression = RequestCompression.for_operation(self, compression)
+                if compression is not None:
+                    compression.apply(request)
+
+        with phase_span(tracer, "parameters"):
+            self._request_handle_parameters(request, parameters)
+
+        if span is not None:
+            # propagate the trace to the server
+            request.headers["traceparent"] = format_traceparent(span.get_span_context())
+
+        prepared = request.prepare()
+
+        if hooks is None:
+            return self._request_send(
+                base_url,
+                prepared,
+                verify,
+                session,
+                transport,
+                cache,
+                rate_limiter,
+                bulkhead,
+                tracer=tracer,
+                span=span,
+                codec=codec,
+                stream=stream,
+                download=download,
+            )
+
+        call = hooks.start(self, base_url, prepared)
+        try:
+            model = self._request_send(
+                base_url,
+                prepared,
+                verify,
+                session,
+                transport,
+                cache,
+                rate_limiter,
+                bulkhead,
+                hooks,
+                call,
+                tracer,
+                span,
+                codec,
+                stream,
+                download,
+            )
+        except Exception as e:
+            hooks.error(call, e)
+            raise
+
+        hooks.end(call)
+        return model
+
+    def _request_send(
+        self,
+        base_url,
+        prepared,
+        verify,
+        session,
+        transport,
+        cache,
+        rate_limiter,
+        bulkhead,
+        hooks=None,
+        call=None,
+        tracer=None,
+        span=None,
+        codec=DEFAULT_CODEC,
+        stream=False,
+        download=None,
+    ):
+        """
+        Sends a prepared request, unless it can be answered from the cache, and
+        builds a model from the response.  If ``call`` is given, the time spent
+        in each phase is recorded on it, and ``hooks`` are called; if ``tracer``
+        is, each phase is traced in a child of ``span``.
+        """
+        # answer from the cache if we can; a stale entry may still be revalidated
+        cache_entry = None
+        if cache is not None and prepared.method == "GET":
+            cache_entry, fresh = cache.lookup(self, prepared)
+            if fresh:
+                if call is not None:
+                    call.cached = True
+                return cache_entry.model
+
+        if rate_limiter is not None:
+            rate_limiter.acquire(self, base_url)
+
+        if call is not None:
+            start = time.perf_counter()
+
+        # send the prepared request; downloads are always streamed
+        streamed = bool(stream) or download is not None
+        with phase_span(tracer, "send"):
+            if bulkhead is not None:
+                with bulkhead.slot(self):
+                    result = self._send(prepared, verify, session, transport, streamed)
+            else:
+                result = self._send(prepared, verify, session, transport, streamed)
+
+        if span is not None:
+            span.set_attribute("http.response.status_code", result.status_code)
+
+        if call is not None:
+            call.network_time = time.perf_counter() - start
+            hooks.response(call, result)
+
+        if rate_limiter is not None:
+            rate_limiter.observe(base_url, result)
+
+        if cache_entry is not None and result.status_code == 304:
+            return cache.revalidated(self, prepared, cache_entry, result)
+
+        try:
+            with phase_span(tracer, "response"):
+                expected_media, content_type = self._request_find_media(result)
+        except Exception:
+            if streamed:
+                # read the body so that it's available to the error; this also
+                # releases the connection
+                result.content  # pylint: disable=pointless-statement
+            raise
+
+        if expected_media is None:
+            if streamed:
+                result.close()
+            return
+
+        content_type = content_type.lower()
+        if content_type in JSON_LINES_TYPES:
+            # each line holds an item; the schema may describe either the item
+            # or the whole document as an array
+            items_schema = expected_media.schema
+            if items_schema.type == "array":
+                items_schema = items_schema.items
+
+            values = iter_json_lines(result.iter_content(CHUNK_SIZE) if stream else [result.content], codec.loads)
+            if not stream:
+                return [items_schema.model(c) for c in values]
+
+            if call is not None:
+                call.streamed = True
+            return self._request_stream(result, values, items_schema)
+
+        if content_type != "application/json" or download is not None:
+            # anything else is returned as bytes, or read as it's received
+            if download is not None:
+                with ResponseStream(result) as body:
+                    if call is not None:
+                        call.streamed = True
+                    return copy_into(body, download)
+            if stream:
+                if call is not None:
+                    call.streamed = True
+                return ResponseStream(result)
+            return result.content
+
+        if stream:
+            items_schema, field = self._request_stream_schema(expected_media.schema, stream)
+            if items_schema is not None:
+                if call is not None:
+                    call.streamed = True
+                values = iter_json_array(result.iter_content(CHUNK_SIZE), field)
+                return self._request_stream(result, values, items_schema)
+
+        with phase_span(tracer, "model"):
+            # decode the body ourselves, as the codec may be faster than requests
+            if call is None:
+                model = expected_media.schema.model(codec.decode(result))
+            else:
+                start = time.perf_counter()
+                data = codec.decode(result)
+                call.decode_time = time.perf_counter() - start
+
+                start = time.perf_counter()
+                model = expected_media.schema.model(data)
+                call.model_time = time.perf_counter() - start
+                hooks.model_built(call, model)
+
+        if cache is not None and prepared.method == "GET":
+            cache.store(self, prepared, result, model)
+
+        return model
 
 
 class SecurityRequirement(ObjectBase):
@@ -0,0 +1,375 @@
+import threading
+import time
+from contextlib import contextmanager
+
+from .errors import BulkheadFullError, RateLimitError
+from .retry import _retry_after
+
+
+def _header_number(headers, *names):
+    """
+    Returns the value of the first of the given headers that is present as a
+    number, or None
+    """
+    for name in names:
+        value = headers.get(name)
+        if value is not None:
+            try:
+                # RateLimit-Limit may carry a policy after the number, like "10, 10;w=1"
+                return float(value.split(",")[0].split(";")[0])
+            except ValueError:
+                return None
+    return None
+
+
+class TokenBucket:
+    """
+    A token bucket, filled at ``rate`` tokens per second up to ``burst`` tokens.
+    A bucket with no rate never runs out, but can still be paused.
+    """
+
+    def __init__(self, rate=None, burst=None):
+        """
+        :param rate: The number of tokens added per second, or None for no limit
+        :type rate: float
+        :param burst: The most tokens the bucket holds; defaults to ``rate``
+        :type burst: float
+        """
+        self.rate = rate
+        self.burst = burst if burst is not None else max(1, rate or 1)
+        self.tokens = self.burst
+        self.paused_until = 0
+        self.updated = time.monotonic()
+
+        self.acquired = 0
+        self.throttled = 0
+        self.waited = 0
+
+        self._lock = threading.Lock()
+
+    def _reserve(self):
+        """
+        Takes a token, returning how long the caller must wait before using it.
+        Tokens may go negative, which queues callers in the order they arrived.
+        Must be called with the lock held.
+        """
+        now = time.monotonic()
+        if self.rate is not None:
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+        wait = max(0, self.paused_until - now)
+        if self.rate is not None:
+            self.tokens -= 1
+            if self.tokens < 0:
+                wait = max(wait, -self.tokens / self.rate)
+
+        return wait
+
+    def acquire(self, max_wait=None):
+        """
+        Takes a token, waiting until one is available
+
+        :param max_wait: The longest time, in seconds, to wait
+        :type max_wait: float
+
+        :returns: How long the call waited, in seconds
+        :rtype: float
+        :raises RateLimitError: If a token would not be available in time
+        """
+        with self._lock:
+            wait = self._reserve()
+            if max_wait is not None and wait > max_wait:
+                if self.rate is not None:
+                    # give back the token we won't use
+                    self.tokens += 1
+                raise RateLimitError("Rate limited for {:.3f}s, more than the {}s allowed".format(wait, max_wait))
+
+            self.acquired += 1
+            if wait > 0:
+                self.throttled += 1
+                self.waited += wait
+
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    def pause(self, seconds):
+        """
+        Lets nothing through for the given time
+
+        :param seconds: How long to pause for
+        :type seconds: float
+        """
+        with self._lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+    def limit(self, remaining):
+        """
+        Caps the tokens available at the number a server says remain
+
+        :param remaining: The number of requests the server will accept
+        :type remaining: float
+        """
+        with self._lock:
+            if self.rate is not None:
+                self.tokens = min(self.tokens, remaining)
+
+    def stats(self):
+        """
+        Returns how many tokens were acquired, how many of those had to wait,
+        and the total time spent waiting
+        """
+        with self._lock:
+            return {"acquired": self.acquired, "throttled": self.throttled, "waited": self.waited}
+
+
+class RateLimiter:
+    """
+    Limits the rate of requests sent by an :any:`OpenAPI` instance, configured
+    with the ``rate_limiter`` argument.
+
+    Requests may be limited overall, per server and per operation; each request
+    takes a token from every bucket that applies to it, waiting until all of them
+    have one.  Operations may declare their own limit with the ``x-rate-limit``
+    extension, a number of requests per second or an object with ``rate`` and
+    ``burst``, which is overridden by ``per_operation``.
+
+    Limits also adapt to the servers' responses: a ``Retry-After`` header on a
+    429 or 503 response, or a ``RateLimit-Remaining`` (or
+    ``X-RateLimit-Remaining``) of 0, pauses requests to that server until
+    ``RateLimit-Reset`` says the limit resets.
+    """
+
+    def __init__(self, rate=None, burst=None, per_server=None, per_operation=None, max_wait=None):
+        """
+        :param rate: The requests per second allowed overall
+        :type rate: float
+        :param burst: The requests allowed at once overall; defaults to ``rate``
+        :type burst: float
+        :param per_server: The requests per second allowed to each server, or a
+                           tuple of rate and burst
+        :type per_server: float, tuple[float, float]
+        :param per_operation: The requests per second allowed to each operation,
+                              or tuples of rate and burst, by operationId
+        :type per_operation: dict[str, float]
+        :param max_wait: The longest time, in seconds, a call may wait for the
+                         limits to let it through before :any:`RateLimitError`
+                         is raised instead.  If None, calls wait as long as
+                         necessary.
+        :type max_wait: float
+        """
+        self.max_wait = max_wait
+        self.per_server = per_server
+        self.per_operation = per_operation or {}
+
+        self._global = TokenBucket(rate, burst) if rate is not None else None
+        self._servers = {}
+        self._operations = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _bucket(limit):
+        """
+        Returns a bucket for a limit given as a rate or a tuple of rate and burst
+        """
+        if isinstance(limit, dict):
+            return TokenBucket(limit.get("rate"), limit.get("burst"))
+        if isinstance(limit, (tuple, list)):
+            return TokenBucket(*limit)
+        return TokenBucket(limit)
+
+    def _server(self, base_url):
+        """
+        Returns the bucket for a server.  Every server has one, even if it isn't
+        limited, so that it can be paused.
+        """
+        bucket = self._servers.get(base_url)
+        if bucket is None:
+            with self._lock:
+                bucket = self._servers.get(base_url)
+                if bucket is None:
+                    bucket = self._servers[base_url] = self._bucket(self.per_server)
+        return bucket
+
+    def _operation(self, operation):
+        """
+        Returns the bucket for an operation, or None if it isn't limited
+        """
+        operation_id = operation.operationId
+        if operation_id not in self._operations:
+            limit = self.per_operation.get(operation_id, operation.extensions.get("rate-limit"))
+            with self._lock:
+                self._operations.setdefault(operation_id, self._bucket(limit) if limit is not None else None)
+        return self._operations[operation_id]
+
+    def acquire(self, operation, base_url):
+        """
+        Waits until a request to the given operation and server is allowed
+
+        :param operation: The operation being called
+        :type operation: Operation
+        :param base_url: The server the request will be sent to
+        :type base_url: str
+
+        :returns: How long the call waited, in seconds
+        :rtype: float
+        :raises RateLimitError: If the call would wait longer than ``max_wait``
+        """
+        waited = 0
+        for bucket in (self._global, self._server(base_url), self._operation(operation)):
+            if bucket is not None:
+                max_wait = None if self.max_wait is None else self.max_wait - waited
+                waited += bucket.acquire(max_wait)
+        return waited
+
+    def observe(self, base_url, response):
+        """
+        Adapts the limit for a server to the rate limit headers in its response
+
+        :param base_url: The server the response came from
+        :type base_url: str
+        :param response: The response received
+        :type response: requests.Response
+        """
+        bucket = self._server(base_url)
+        headers = response.headers
+
+        if response.status_code in (429, 503):
+            retry_after = _retry_after(response)
+            if retry_after is not None:
+                bucket.pause(retry_after)
+                return
+
+        remaining = _header_number(headers, "RateLimit-Remaining", "X-RateLimit-Remaining")
+        if remaining is None:
+            return
+
+        if remaining < 1:
+            reset = _header_number(headers, "RateLimit-Reset", "X-RateLimit-Reset")
+            if reset is not None:
+                if reset > time.time() - 86400:
+                    # some servers send a timestamp rather than a delay
+                    reset -= time.time()
+                bucket.pause(max(0, reset))
+        bucket.limit(remaining)
+
+    def stats(self):
+        """
+        Returns how many requests each limit let through, how many of those had
+        to wait, and how long they waited in total
+
+        :returns: A dict with the overall limit's statistics under "global", and
+                  dicts of statistics by server URL and by operationId under
+                  "servers" and "operations"
+        :rtype: dict
+        """
+        with self._lock:
+            servers = dict(self._servers)
+            operations = {k: v for k, v in self._operations.items() if v is not None}
+        return {
+            "global": self._global.stats() if self._global is not None else None,
+            "servers": {k: v.stats() for k, v in servers.items()},
+            "operations": {k: v.stats() for k, v in operations.items()},
+        }
+
+
+class _Compartment:
+    """
+    The concurrency limit for a single operation, and its statistics
+    """
+
+    __slots__ = ["semaphore", "limit", "active", "peak", "rejected"]
+
+    def __init__(self, limit):
+        self.semaphore = threading.BoundedSemaphore(limit)
+        self.limit = limit
+        self.active = 0
+        self.peak = 0
+        self.rejected = 0
+
+
+class Bulkhead:
+    """
+    Limits the number of concurrent calls to each operation of an :any:`OpenAPI`
+    instance, configured with the ``bulkhead`` argument, so that a slow
+    operation can't tie up every thread calling the API.
+
+    Operations may declare their own limit with the ``x-max-concurrency``
+    extension, which is overridden by ``per_operation``.  Calls beyond the limit
+    wait up to ``timeout`` seconds for a slot, and then raise
+    :any:`BulkheadFullError`.
+    """
+
+    def __init__(self, max_concurrent=10, per_operation=None, timeout=None):
+        """
+        :param max_concurrent: The most concurrent calls to each operation
+        :type max_concurrent: int
+        :param per_operation: The most concurrent calls by operationId
+        :type per_operation: dict[str, int]
+        :param timeout: The longest time, in seconds, to wait for a slot.  If 0,
+                        calls beyond the limit fail immediately; if None, they
+                        wait as long as necessary.
+        :type timeout: float
+        """
+        self.max_concurrent = max_concurrent
+        self.per_operation = per_operation or {}
+        self.timeout = timeout
+
+        self._compartments = {}
+        self._lock = threading.Lock()
+
+    def _get(self, operation):
+        """
+        Returns the compartment for an operation
+        """
+        compartment = self._compartments.get(operation.operationId)
+        if compartment is None:
+            limit = self.per_operation.get(
+                operation.operationId, operation.extensions.get("max-concurrency", self.max_concurrent)
+            )
+            with self._lock:
+                compartment = self._compartments.setdefault(operation.operationId, _Compartment(limit))
+        return compartment
+
+    @contextmanager
+    def slot(self, operation):
+        """
+        A context manager holding one of an operation's slots for its duration
+
+        :param operation: The operation being called
+        :type operation: Operation
+
+        :raises BulkheadFullError: If no slot became free in time
+        """
+        compartment = self._get(operation)
+        if not compartment.semaphore.acquire(timeout=self.timeout):
+            with self._lock:
+                compartment.rejected += 1
+            raise BulkheadFullError(
+                "{} already has {} calls in flight".format(operation.operationId, compartment.limit)
+            )
+
+        with self._lock:
+            compartment.active += 1
+            compartment.peak = max(compartment.peak, compartment.active)
+        try:
+            yield
+        finally:
+            with self._lock:
+                compartment.active -= 1
+            compartment.semaphore.release()
+
+    def stats(self):
+        """
+        Returns the limit, current and peak concurrent calls, and number of
+        rejected calls for each operation
+
+        :returns: A dict of operationId to a dict of statistics
+        :rtype: dict[str, dict[str, int]]
+        """
+        with self._lock:
+            return {
+                k: {"limit": c.limit, "active": c.active, "peak": c.peak, "rejected": c.rejected}
+                for k, c in self._compartments.items()
+            }
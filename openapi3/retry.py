@@ -0,0 +1,331 @@
+import random
+import threading
+import time
+
+from .cache import _parse_http_date
+from .errors import CircuitOpenError, UnexpectedResponseError
+from .transports import UNAVAILABLE_ERRORS
+
+#: The methods whose calls are retried unless an operation says otherwise
+IDEMPOTENT_METHODS = ("get", "head", "put", "delete", "options", "trace")
+
+
+def _retry_after(response):
+    """
+    Returns the number of seconds a response's Retry-After header asks clients
+    to wait, or None if it has none
+    """
+    value = response.headers.get("Retry-After")
+    if value is None:
+        return None
+
+    try:
+        return max(0, float(value))
+    except ValueError:
+        pass
+
+    date = _parse_http_date(value)
+    if date is None:
+        return None
+    return max(0, date - time.time())
+
+
+class RetryPolicy:
+    """
+    Retries calls that fail because a server could not be reached, or because it
+    answered with an undocumented, retryable status code.  Enabled per
+    :any:`OpenAPI` instance with the ``retry`` argument.
+
+    Only idempotent operations are retried, unless an operation opts in or out
+    with the ``x-retry`` extension.  Retries back off exponentially with full
+    jitter, and wait at least as long as a Retry-After header asks.
+
+    Retries are limited by a budget: each call earns ``budget_ratio`` retries, up
+    to ``budget_burst``, and each retry spends one.  This keeps retries from
+    multiplying the load on a struggling server.
+    """
+
+    def __init__(
+        self,
+        max_attempts=3,
+        backoff=0.1,
+        max_backoff=10,
+        max_retry_after=60,
+        retry_statuses=(429, 502, 503, 504),
+        budget_ratio=0.2,
+        budget_burst=10,
+    ):
+        """
+        :param max_attempts: The most times a call is attempted, including the
+                             first attempt
+        :type max_attempts: int
+        :param backoff: The delay, in seconds, the exponential backoff grows from
+        :type backoff: float
+        :param max_backoff: The longest delay, in seconds, between attempts,
+                            unless the server asks for a longer one
+        :type max_backoff: float
+        :param max_retry_after: The longest delay, in seconds, a server may ask
+                                for with Retry-After; calls asked to wait longer
+                                are not retried
+        :type max_retry_after: float
+        :param retry_statuses: The undocumented status codes that are retried
+        :type retry_statuses: tuple[int]
+        :param budget_ratio: The number of retries each call earns
+        :type budget_ratio: float
+        :param budget_burst: The most retries that may be saved up
+        :type budget_burst: float
+        """
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.max_retry_after = max_retry_after
+        self.retry_statuses = frozenset(retry_statuses)
+        self.budget_ratio = budget_ratio
+        self.budget_burst = budget_burst
+
+        self._budget = budget_burst
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def applies_to(operation):
+        """
+        Returns True if calls to the given operation may be retried
+
+        :param operation: The operation being called
+        :type operation: Operation
+        """
+        return operation.extensions.get("retry", operation.path[-1] in IDEMPOTENT_METHODS)
+
+    def _count(self, operation, stat):
+        """
+        Increments a statistic for the given operation.  Must be called with
+        the lock held.
+        """
+        stats = self._stats.get(operation.operationId)
+        if stats is None:
+            stats = self._stats[operation.operationId] = {
+                "calls": 0,
+                "retries": 0,
+                "attempts_exhausted": 0,
+                "budget_exhausted": 0,
+            }
+        stats[stat] += 1
+
+    def delay(self, error, attempt):
+        """
+        Returns how long to wait before retrying after the given error, or None
+        if it should not be retried
+
+        :param error: The error raised by the failed attempt
+        :type error: Exception
+        :param attempt: The number of attempts made so far
+        :type attempt: int
+
+        :rtype: float, None
+        """
+        if isinstance(error, CircuitOpenError):
+            # the point of the breaker is to stop calling the server
+            return None
+
+        retry_after = None
+        if isinstance(error, UnexpectedResponseError):
+            if error.status_code not in self.retry_statuses:
+                return None
+            retry_after = _retry_after(error.response)
+        elif not isinstance(error, UNAVAILABLE_ERRORS):
+            return None
+
+        if retry_after is not None and retry_after > self.max_retry_after:
+            return None
+
+        delay = random.uniform(0, min(self.max_backoff, self.backoff * 2 ** (attempt - 1)))
+        return max(delay, retry_after or 0)
+
+    def call(self, operation, func):
+        """
+        Calls ``func``, retrying it if it fails and this policy allows it
+
+        :param operation: The operation being called
+        :type operation: Operation
+        :param func: Makes the call
+        :type func: callable
+
+        :returns: The result of the first successful attempt
+        """
+        with self._lock:
+            self._count(operation, "calls")
+            self._budget = min(self.budget_burst, self._budget + self.budget_ratio)
+
+        attempt = 1
+        while True:
+            try:
+                return func()
+            except Exception as e:
+                delay = self.delay(e, attempt)
+                if delay is None:
+                    raise
+
+                with self._lock:
+                    if attempt >= self.max_attempts:
+                        self._count(operation, "attempts_exhausted")
+                        raise
+                    if self._budget < 1:
+                        self._count(operation, "budget_exhausted")
+                        raise
+                    self._budget -= 1
+                    self._count(operation, "retries")
+
+            time.sleep(delay)
+            attempt += 1
+
+    def stats(self):
+        """
+        Returns how many calls were made to each operation, how many retries
+        were made, and how many calls gave up because they ran out of attempts
+        or the retry budget was spent.
+
+        :returns: A dict of operationId to a dict of statistics
+        :rtype: dict[str, dict[str, int]]
+        """
+        with self._lock:
+            return {k: dict(v) for k, v in self._stats.items()}
+
+
+class _Circuit:
+    """
+    The state of the circuit for a single server
+    """
+
+    __slots__ = ["failures", "opened_at", "probing", "times_opened"]
+
+    def __init__(self):
+        self.failures = 0
+        self.opened_at = None
+        self.probing = False
+        self.times_opened = 0
+
+
+class CircuitBreaker:
+    """
+    Stops sending requests to servers that keep failing.  Enabled per
+    :any:`OpenAPI` instance with the ``circuit_breaker`` argument.
+
+    Once ``failure_threshold`` consecutive requests to a server fail because it
+    could not be reached, timed out, or answered with an undocumented 5xx
+    status, its circuit opens, and calls to it raise :any:`CircuitOpenError`
+    without sending anything (failing over to another server, if a server
+    selector is configured).  After ``reset_timeout`` seconds, a single request
+    is let through; if it succeeds the circuit closes, otherwise it opens
+    again.
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=30):
+        """
+        :param failure_threshold: The number of consecutive failures that open a
+                                  server's circuit
+        :type failure_threshold: int
+        :param reset_timeout: The time, in seconds, before an open circuit lets a
+                              request through to test the server
+        :type reset_timeout: float
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+
+        self._circuits = {}
+        self._lock = threading.Lock()
+
+    def _get(self, url):
+        """
+        Returns the circuit for a server.  Must be called with the lock held.
+        """
+        circuit = self._circuits.get(url)
+        if circuit is None:
+            circuit = self._circuits[url] = _Circuit()
+        return circuit
+
+    def allow(self, url):
+        """
+        Returns True if a request may be sent to the given server
+
+        :param url: The server a request is about to be sent to
+        :type url: str
+        """
+        with self._lock:
+            circuit = self._get(url)
+            if circuit.opened_at is None:
+                return True
+            if circuit.probing or time.monotonic() - circuit.opened_at < self.reset_timeout:
+                return False
+
+            # half open; let one request through to see if the server is back
+            circuit.probing = True
+            return True
+
+    def check(self, url):
+        """
+        Raises :any:`CircuitOpenError` if a request may not be sent to the given
+        server
+
+        :param url: The server a request is about to be sent to
+        :type url: str
+        """
+        if not self.allow(url):
+            raise CircuitOpenError("Circuit for {} is open after repeated failures".format(url))
+
+    def release(self, url):
+        """
+        Lets another request through to a half open circuit without recording
+        an outcome, for when a probe failed before it reached the server
+
+        :param url: The server the request was to be sent to
+        :type url: str
+        """
+        with self._lock:
+            self._get(url).probing = False
+
+    def record(self, url, failed):
+        """
+        Records the outcome of a request to a server
+
+        :param url: The server the request was sent to
+        :type url: str
+        :param failed: True if the request failed
+        :type failed: bool
+        """
+        with self._lock:
+            circuit = self._get(url)
+            circuit.probing = False
+
+            if not failed:
+                circuit.failures = 0
+                circuit.opened_at = None
+                return
+
+            circuit.failures += 1
+            if circuit.opened_at is not None or circuit.failures >= self.failure_threshold:
+                if circuit.opened_at is None:
+                    circuit.times_opened += 1
+                circuit.opened_at = time.monotonic()
+
+    def stats(self):
+        """
+        Returns the state of the circuit for every server requests were sent to
+
+        :returns: A dict of server URL to its state ("closed", "open" or
+                  "half-open"), consecutive failures, and the number of times
+                  its circuit has opened
+        :rtype: dict[str, dict]
+        """
+        now = time.monotonic()
+        with self._lock:
+            stats = {}
+            for url, c in self._circuits.items():
+                if c.opened_at is None:
+                    state = "closed"
+                elif c.probing or now - c.opened_at >= self.reset_timeout:
+                    state = "half-open"
+                else:
+                    state = "open"
+                stats[url] = {"state": state, "failures": c.failures, "times_opened": c.times_opened}
+            return stats
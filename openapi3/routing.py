@@ -0,0 +1,210 @@
+import re
+from urllib.parse import unquote, urlsplit
+
+from .servers import server_urls
+
+#: The methods an operation may be declared for on a Path
+METHODS = ("get", "put", "post", "delete", "options", "head", "patch", "trace")
+
+PATH_TEMPLATE = re.compile(r"{([^}]+)}")
+
+
+class _Node:
+    """
+    A node in the routing trie, matching one segment of a path
+    """
+
+    __slots__ = ["literals", "patterns", "parameter", "operations", "names"]
+
+    def __init__(self):
+        #: Children matching a literal segment, by segment
+        self.literals = {}
+        #: Children matching a segment that is partly templated, like ``{name}.json``
+        self.patterns = []
+        #: The child matching a segment that is a single template, like ``{id}``
+        self.parameter = None
+        #: The operations of the path ending at this node, by method
+        self.operations = None
+        #: The names of that path's parameters, in the order they appear
+        self.names = None
+
+
+class Router:
+    """
+    Matches the method and path of a request to the operation it calls, along
+    with the values of its path parameters.  Path templates are compiled into a
+    trie with a level per segment, so matching takes time proportional to the
+    number of segments in the path, not the number of paths in the spec.
+
+    As the spec requires, literal segments are preferred over templated ones,
+    so ``/users/me`` matches before ``/users/{id}``.  Segments that are only
+    partly templated, like ``/files/{name}.json``, are preferred over segments
+    that are a single template.  Requests may include the path of the server
+    the operation is declared on, such as ``/v4`` for ``https://api.example.com/v4``.
+    """
+
+    def __init__(self, spec):
+        """
+        :param spec: The spec to route requests to the operations of
+        :type spec: OpenAPI
+        """
+        self._root = _Node()
+        #: Paths without templates, matched with a single lookup
+        self._static = {}
+        prefixes = set()
+
+        for template, path in spec.paths.items():
+            operations = {c: getattr(path, c) for c in METHODS if getattr(path, c) is not None}
+            node = self._insert(template)
+            node.operations = operations
+            node.names = PATH_TEMPLATE.findall(template)
+            if "{" not in template:
+                self._static[template] = operations
+
+            for operation in operations.values():
+                try:
+                    urls = server_urls(operation)
+                except ValueError:
+                    # an operation without servers is served from the root
+                    continue
+                for url in urls:
+                    prefix = urlsplit(url).path.rstrip("/")
+                    if prefix:
+                        prefixes.add(prefix)
+
+        # longest first, so that nested prefixes are stripped whole
+        self._prefixes = sorted(prefixes, key=len, reverse=True)
+
+    def _insert(self, template):
+        node = self._root
+        for segment in template.split("/")[1:]:
+            names = PATH_TEMPLATE.findall(segment)
+            if not names:
+                node = node.literals.setdefault(segment, _Node())
+            elif segment == "{" + names[0] + "}":
+                # paths like /a/{id} and /a/{name}/b share this node, since
+                # values are named by the path that's matched in the end
+                if node.parameter is None:
+                    node.parameter = _Node()
+                node = node.parameter
+            else:
+                pattern = "^{}$".format(
+                    "".join("(.+?)" if i % 2 else re.escape(c) for i, c in enumerate(PATH_TEMPLATE.split(segment)))
+                )
+                for regex, child in node.patterns:
+                    if regex.pattern == pattern:
+                        node = child
+                        break
+                else:
+                    child = _Node()
+                    node.patterns.append((re.compile(pattern), child))
+                    node = child
+        return node
+
+    def _search(self, node, segments, index, method, values):
+        """
+        Walks the trie depth first, trying literal segments before templated
+        ones, and returns the node for the first path with an operation for the
+        method.  Values captured along the way are appended to ``values``.
+        """
+        if index == len(segments):
+            if node.operations is not None and method in node.operations:
+                return node
+            return None
+
+        segment = segments[index]
+
+        child = node.literals.get(segment)
+        if child is None and "%" in segment:
+            child = node.literals.get(unquote(segment))
+        if child is not None:
+            found = self._search(child, segments, index + 1, method, values)
+            if found is not None:
+                return found
+
+        for regex, child in node.patterns:
+            m = regex.match(segment)
+            if m is not None:
+                mark = len(values)
+                values.extend(m.groups())
+                found = self._search(child, segments, index + 1, method, values)
+                if found is not None:
+                    return found
+                del values[mark:]
+
+        if node.parameter is not None and segment:
+            values.append(segment)
+            found = self._search(node.parameter, segments, index + 1, method, values)
+            if found is not None:
+                return found
+            values.pop()
+
+        return None
+
+    def _match_path(self, method, path):
+        operations = self._static.get(path)
+        if operations is not None and method in operations:
+            return operations[method], {}
+
+        segments = path.split("/")
+        if segments[0] or len(segments) < 2:
+            return None
+        del segments[0]
+
+        # most paths are matched by following literal segments where there are
+        # any, and single templates where there aren't; that's also the first
+        # path the full search would try, so it's only needed if this fails
+        node = self._root
+        values = []
+        for segment in segments:
+            child = node.literals.get(segment)
+            if child is None:
+                if node.patterns or node.parameter is None or not segment or "%" in segment:
+                    break
+                values.append(segment)
+                child = node.parameter
+            node = child
+        else:
+            if node.operations is not None and method in node.operations:
+                return node.operations[method], dict(zip(node.names, values))
+
+        values = []
+        node = self._search(self._root, segments, 0, method, values)
+        if node is None:
+            return None
+        return node.operations[method], dict(zip(node.names, values))
+
+    def match(self, method, path, decode=True):
+        """
+        Returns the operation a request calls and the values of its path
+        parameters.
+
+        :param method: The method of the request, in any case
+        :type method: str
+        :param path: The path of the request, percent-encoded as it was sent.
+                     A query string is ignored.
+        :type path: str
+        :param decode: If False, values are returned percent-encoded, as they
+                       appear in the path, to be deserialized by their
+                       parameters
+        :type decode: bool
+
+        :returns: The operation and its path parameters by name, or None if no
+                  operation matches
+        :rtype: tuple[Operation, dict[str, str]], None
+        """
+        method = method.lower()
+        path = path.partition("?")[0] or "/"
+
+        found = self._match_path(method, path)
+        if found is None:
+            for prefix in self._prefixes:
+                if path.startswith(prefix) and path[len(prefix) : len(prefix) + 1] in ("/", ""):
+                    found = self._match_path(method, path[len(prefix) :] or "/")
+                    if found is not None:
+                        break
+
+        if found is not None and decode:
+            operation, values = found
+            found = operation, {k: unquote(v) if "%" in v else v for k, v in values.items()}
+        return found
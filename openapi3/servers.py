@@ -1,5 +1,11 @@
+import re
+import threading
+import time
+
 from .object_base import ObjectBase
 
+SERVER_VARIABLE = re.compile(r"{([^}]+)}")
+
 
 class Server(ObjectBase):
     """
@@ -19,6 +25,38 @@ class Server(ObjectBase):
         self.url = self._get("url", str)
         self.variables = self._get("variables", ["ServerVariable"], is_map=True)
 
+    def expand_url(self, variables=None):
+        """
+        Returns this server's URL with its variables substituted.  Variables not
+        given use their default values.
+
+        :param variables: Values for this server's variables
+        :type variables: dict[str, str]
+
+        :returns: The expanded URL
+        :rtype: str
+        :raises ValueError: if a value is not allowed for its variable, or if the
+                            URL uses an undefined variable
+        """
+        variables = variables or {}
+        defined = self.variables or {}
+
+        def substitute(match):
+            name = match.group(1)
+            if name not in defined:
+                raise ValueError("Server {} uses undefined variable {}".format(self.url, name))
+
+            value = variables.get(name, defined[name].default)
+            if defined[name].enum and value not in defined[name].enum:
+                raise ValueError(
+                    "{} is not a valid value for server variable {} (expected one of {})".format(
+                        value, name, ", ".join(defined[name].enum)
+                    )
+                )
+            return str(value)
+
+        return SERVER_VARIABLE.sub(substitute, self.url)
+
 
 class ServerVariable(ObjectBase):
     """
@@ -37,3 +75,181 @@ class ServerVariable(ObjectBase):
         self.default = self._get("default", str)
         self.description = self._get("description", str)
         self.enum = self._get("enum", [str], is_list=True)
+
+
+def server_urls(operation, variables=None):
+    """
+    Returns the expanded URLs of the servers an operation may be called on, in
+    the order they were declared.  As the spec requires, servers declared on the
+    operation override those declared on its path, which override those declared
+    at the root of the document.
+
+    :param operation: The operation to find servers for
+    :type operation: Operation
+    :param variables: Values for server variables, overriding their defaults
+    :type variables: dict[str, str]
+
+    :returns: The URLs of the servers
+    :rtype: list[str]
+    """
+    servers = operation.servers or operation._root.paths[operation.path[-2]].servers or operation._root.servers
+    if not servers:
+        raise ValueError("No servers are defined for {}".format(operation.operationId))
+
+    return [c.expand_url(variables) for c in servers]
+
+
+class _ServerHealth:
+    """
+    The health of a single server, as tracked by :any:`ServerSelector`
+    """
+
+    __slots__ = ["latency", "error_rate", "updated", "failed_until", "requests", "errors"]
+
+    def __init__(self, latency, now):
+        self.latency = latency
+        self.error_rate = 0
+        self.updated = now
+        self.failed_until = 0
+        self.requests = 0
+        self.errors = 0
+
+
+class ServerSelector:
+    """
+    Chooses which server each call to an operation is sent to, tracking the
+    health of every server it sends requests to.  Enabled per :any:`OpenAPI`
+    instance with the ``server_selector`` argument.
+
+    Calls go to the healthiest of the servers declared for the operation (see
+    :any:`server_urls`), judged by an exponentially weighted moving average of
+    each server's latency, penalized by its recent error rate.  Servers that
+    haven't been used yet are tried first.  If a server can't be reached or
+    times out, it is demoted for ``cooldown`` seconds and the call fails over
+    to the next one.
+    """
+
+    def __init__(self, variables=None, decay=0.2, error_penalty=10, error_half_life=30, cooldown=5):
+        """
+        :param variables: Values for server variables, overriding their defaults
+        :type variables: dict[str, str]
+        :param decay: The weight given to each new sample in the moving averages
+        :type decay: float
+        :param error_penalty: How heavily the error rate counts against a
+                              server's latency.  A server with an error rate of
+                              1 scores as if it were ``1 + error_penalty`` times
+                              slower.
+        :type error_penalty: float
+        :param error_half_life: The time, in seconds, it takes for a server's
+                                error rate to halve if it isn't used
+        :type error_half_life: float
+        :param cooldown: The time, in seconds, a server that can't be reached
+                         or times out is tried after all others
+        :type cooldown: float
+        """
+        self.variables = variables
+        self.decay = decay
+        self.error_penalty = error_penalty
+        self.error_half_life = error_half_life
+        self.cooldown = cooldown
+
+        self._urls = {}
+        self._health = {}
+        self._lock = threading.Lock()
+
+    def servers(self, operation):
+        """
+        Returns the expanded URLs of the servers declared for the operation.
+        These are only expanded once per operation.
+
+        :param operation: The operation being called
+        :type operation: Operation
+        """
+        urls = self._urls.get(operation.operationId)
+        if urls is None:
+            urls = self._urls[operation.operationId] = server_urls(operation, self.variables)
+        return urls
+
+    def _score(self, url, now):
+        """
+        Returns a sort key for the given server; lower is healthier
+        """
+        health = self._health.get(url)
+        if health is None:
+            return False, 0
+
+        error_rate = health.error_rate * 0.5 ** ((now - health.updated) / self.error_half_life)
+        return now < health.failed_until, health.latency * (1 + self.error_penalty * error_rate)
+
+    def candidates(self, operation):
+        """
+        Returns the servers a call to the given operation should be tried on,
+        healthiest first.
+
+        :param operation: The operation being called
+        :type operation: Operation
+
+        :rtype: list[str]
+        """
+        urls = self.servers(operation)
+        if len(urls) == 1:
+            return urls
+
+        now = time.monotonic()
+        with self._lock:
+            # sorted is stable, so servers that score the same stay in the order
+            # they were declared in
+            return sorted(urls, key=lambda c: self._score(c, now))
+
+    def record(self, url, latency=None, error=False, unreachable=False):
+        """
+        Records the outcome of a request to a server
+
+        :param url: The server the request was sent to
+        :type url: str
+        :param latency: How long the request took, in seconds, if it succeeded
+        :type latency: float
+        :param error: True if the request failed
+        :type error: bool
+        :param unreachable: True if the server couldn't be reached at all, or
+                            didn't answer in time
+        :type unreachable: bool
+        """
+        now = time.monotonic()
+        error = error or unreachable
+
+        with self._lock:
+            health = self._health.get(url)
+            if health is None:
+                health = self._health[url] = _ServerHealth(latency or 0, now)
+
+            health.error_rate = health.error_rate * 0.5 ** ((now - health.updated) / self.error_half_life)
+            health.error_rate += self.decay * ((1 if error else 0) - health.error_rate)
+            health.updated = now
+            health.requests += 1
+
+            if error:
+                health.errors += 1
+            if latency is not None:
+                health.latency += self.decay * (latency - health.latency)
+            if unreachable:
+                health.failed_until = now + self.cooldown
+
+    def stats(self):
+        """
+        Returns the health of every server requests were sent to
+
+        :returns: A dict of server URL to its request and error counts, average
+                  latency in seconds, and error rate
+        :rtype: dict[str, dict]
+        """
+        with self._lock:
+            return {
+                url: {
+                    "requests": c.requests,
+                    "errors": c.errors,
+                    "latency": c.latency,
+                    "error_rate": c.error_rate,
+                }
+                for url, c in self._health.items()
+            }
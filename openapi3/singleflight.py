@@ -0,0 +1,138 @@
+import json
+import threading
+
+from .schemas import Model
+
+#: The methods whose calls are coalesced unless an operation says otherwise
+SAFE_METHODS = ("get", "head")
+
+
+def _normalize(value):
+    """
+    ``default`` for json.dumps when normalizing arguments into keys
+    """
+    if isinstance(value, Model):
+        return dict(value)
+    return str(value)
+
+
+class _Call:
+    """
+    A call in flight, and its outcome once it's complete
+    """
+
+    __slots__ = ["done", "result", "error"]
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Coalesces identical concurrent calls to safe operations, so that only one
+    request is sent and every caller receives the model it returns (or the error
+    it raised).  Enabled per :any:`OpenAPI` instance with the ``coalesce``
+    argument.
+
+    Calls are identical if they are to the same operation with the same server,
+    credentials, parameters and body.  GET and HEAD operations are coalesced by
+    default; an operation may opt in or out with the ``x-coalesce`` extension.
+    Models returned to coalesced callers are shared, and should not be modified.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def applies_to(operation):
+        """
+        Returns True if calls to the given operation should be coalesced
+
+        :param operation: The operation being called
+        :type operation: Operation
+        """
+        return operation.extensions.get("coalesce", operation.path[-1] in SAFE_METHODS)
+
+    @staticmethod
+    def key(operation, base_url, security, kwargs):
+        """
+        Returns the key identifying a call to an operation
+
+        :param operation: The operation being called
+        :type operation: Operation
+        :param base_url: The server being called
+        :type base_url: str
+        :param security: The security scheme and values in use
+        :type security: dict
+        :param kwargs: The remaining arguments to :any:`Operation.request`
+        :type kwargs: dict
+        """
+        return (
+            operation.operationId,
+            base_url,
+            json.dumps(
+                [security, kwargs.get("parameters"), kwargs.get("data")],
+                sort_keys=True,
+                separators=(",", ":"),
+                default=_normalize,
+            ),
+        )
+
+    def do(self, key, func):
+        """
+        Calls ``func`` unless a call with the same key is already in flight, in
+        which case that call's outcome is waited for and returned instead.
+
+        :param key: The key identifying the call, as returned by :any:`key`
+        :type key: tuple
+        :param func: The function making the call
+        :type func: callable
+
+        :returns: The result of the call
+        """
+        with self._lock:
+            stats = self._stats.get(key[0])
+            if stats is None:
+                stats = self._stats[key[0]] = {"calls": 0, "coalesced": 0}
+            stats["calls"] += 1
+
+            call = self._calls.get(key)
+            if call is None:
+                call = self._calls[key] = _Call()
+                leader = True
+            else:
+                stats["coalesced"] += 1
+                leader = False
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = func()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+        return call.result
+
+    def stats(self):
+        """
+        Returns how many calls each operation received, and how many of those
+        were coalesced into a call already in flight.
+
+        :returns: A dict of operationId to a dict of statistics
+        :rtype: dict[str, dict[str, int]]
+        """
+        with self._lock:
+            return {k: dict(v) for k, v in self._stats.items()}
@@ -0,0 +1,334 @@
+import codecs
+import io
+import json
+
+#: The size of the chunks response bodies are read in when streaming
+CHUNK_SIZE = 64 * 1024
+
+#: The media types of newline delimited JSON (NDJSON, or JSON Lines) documents
+JSON_LINES_TYPES = frozenset(
+    (
+        "application/x-ndjson",
+        "application/ndjson",
+        "application/jsonl",
+        "application/x-jsonlines",
+        "application/jsonlines",
+        "application/json-lines",
+    )
+)
+
+_WHITESPACE = " \t\n\r"
+
+
+class _Reader:
+    """
+    Reads JSON values one at a time from an iterator of byte chunks, holding no
+    more of the document in memory than the value being decoded.  Values are
+    decoded with the standard library's scanner, which can't say whether a
+    value was cut off, so a value is only accepted once a character after it has
+    arrived (or the document ended).
+    """
+
+    __slots__ = ["_chunks", "_decoder", "_scanner", "buffer", "pos", "eof"]
+
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._decoder = codecs.getincrementaldecoder("utf-8")()
+        self._scanner = json.JSONDecoder()
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self, at_least=1):
+        """
+        Reads chunks until at least ``at_least`` more characters are buffered,
+        or the document ends.  Returns False if nothing more could be read.
+        """
+        if self.eof:
+            return False
+
+        # drop what's been consumed, so the buffer only holds the current value
+        if self.pos:
+            self.buffer = self.buffer[self.pos :]
+            self.pos = 0
+
+        parts = [self.buffer]
+        added = 0
+        while added < at_least:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                parts.append(self._decoder.decode(b"", final=True))
+                self.eof = True
+                break
+            text = self._decoder.decode(chunk)
+            parts.append(text)
+            added += len(text)
+
+        self.buffer = "".join(parts)
+        return added > 0 or len(parts[-1]) > 0
+
+    def peek(self):
+        """
+        Returns the next character that isn't whitespace, without consuming it,
+        or "" at the end of the document
+        """
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self._fill():
+                return ""
+
+    def expect(self, chars):
+        """
+        Consumes the next character that isn't whitespace, raising an error if
+        it isn't one of ``chars``
+
+        :returns: The character consumed
+        """
+        char = self.peek()
+        if not char or char not in chars:
+            raise json.JSONDecodeError(
+                "Expecting {}".format(" or ".join(repr(c) for c in chars)), self.buffer, self.pos
+            )
+        self.pos += 1
+        return char
+
+    def value(self):
+        """
+        Decodes and consumes the next value
+        """
+        self.peek()
+        while True:
+            try:
+                value, end = self._scanner.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+                # reading as much again as is pending keeps re-scanning a large
+                # value linear in its size
+                self._fill(max(CHUNK_SIZE, len(self.buffer) - self.pos))
+                continue
+
+            if end < len(self.buffer) or self.eof:
+                self.pos = end
+                return value
+
+            # a number or literal may continue in the next chunk
+            self._fill()
+
+
+def iter_json_array(chunks, field=None):
+    """
+    Yields the items of a JSON array as they're read from an iterator of byte
+    chunks, without reading the whole document first.
+
+    :param chunks: The encoded document
+    :type chunks: iterator[bytes]
+    :param field: If given, the document is an object, and the array to stream
+                  is the value of this field.  Fields before it are skipped; the
+                  document isn't read past the end of the array.
+    :type field: str
+
+    :raises ValueError: If the document isn't an array, or the field isn't found
+    """
+    reader = _Reader(chunks)
+
+    if field is not None:
+        reader.expect("{")
+        while True:
+            if reader.peek() == "}":
+                raise ValueError("Streamed object has no field {}".format(field))
+            key = reader.value()
+            reader.expect(":")
+            if key == field:
+                break
+            reader.value()
+            if reader.expect(",}") == "}":
+                raise ValueError("Streamed object has no field {}".format(field))
+
+    reader.expect("[")
+    if reader.peek() == "]":
+        return
+
+    while True:
+        yield reader.value()
+        if reader.expect(",]") == "]":
+            return
+
+
+def iter_json_lines(chunks, loads=json.loads):
+    """
+    Yields the values in a newline delimited JSON document as they're read from
+    an iterator of byte chunks.  Blank lines are skipped.
+
+    :param chunks: The encoded document
+    :type chunks: iterator[bytes]
+    :param loads: Decodes a single line, given as bytes
+    :type loads: callable
+
+    :raises ValueError: If a line isn't valid JSON
+    """
+    pending = b""
+    for chunk in chunks:
+        lines = (pending + chunk).split(b"\n")
+        # the last line may continue in the next chunk
+        pending = lines.pop()
+        for line in lines:
+            if line.strip():
+                yield loads(line)
+
+    if pending.strip():
+        yield loads(pending)
+
+
+def is_binary_body(data):
+    """
+    Returns True if a request body should be uploaded as is: bytes, a file, or
+    an iterator of chunks
+    """
+    return isinstance(data, (bytes, bytearray, memoryview)) or hasattr(data, "read") or hasattr(data, "__next__")
+
+
+class ModelStream:
+    """
+    Yields a model for each value decoded from a streamed response.  The
+    response is closed once the values run out, or when this is closed or
+    garbage collected, so that its connection is released even if it's never
+    iterated.  It can be used as a context manager.
+    """
+
+    __slots__ = ["response", "closed", "_values", "_schema"]
+
+    def __init__(self, response, values, schema):
+        """
+        :param response: The streamed response
+        :type response: requests.Response, openapi3.transports.TransportResponse
+        :param values: The values decoded from the response, as they arrive
+        :type values: generator
+        :param schema: The schema of the values
+        :type schema: Schema
+        """
+        self.response = response
+        self.closed = False
+        self._values = values
+        self._schema = schema
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self.closed:
+            raise StopIteration
+        try:
+            return self._schema.model(next(self._values))
+        except BaseException:
+            self.close()
+            raise
+
+    def close(self):
+        """
+        Closes the response, releasing its connection
+        """
+        if not self.closed:
+            self.closed = True
+            self._values.close()
+            self.response.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __del__(self):
+        if not getattr(self, "closed", True):
+            self.close()
+
+
+class ResponseStream(io.RawIOBase):
+    """
+    A readable file-like view of a streamed response's body.  ``readinto`` reads
+    straight into the caller's buffer where the transport allows it; responses
+    without a raw stream are read from their ``content`` instead.  Closing this
+    closes the response, releasing its connection.
+    """
+
+    def __init__(self, response):
+        """
+        :param response: The streamed response
+        :type response: requests.Response, openapi3.transports.TransportResponse
+        """
+        self.response = response
+        self._raw = getattr(response, "raw", None)
+        self._chunks = None
+        self._pending = memoryview(b"")
+        if self._raw is None:
+            content = response.content
+            self._chunks = iter([content] if isinstance(content, (bytes, bytearray, memoryview)) else content)
+        elif hasattr(self._raw, "decode_content"):
+            # requests leaves decompressing the body to iter_content
+            self._raw.decode_content = True
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        if self._chunks is None:
+            return self._raw.readinto(buffer)
+
+        while not self._pending:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                return 0
+            self._pending = memoryview(chunk).cast("B")
+        size = min(len(buffer), len(self._pending))
+        memoryview(buffer).cast("B")[:size] = self._pending[:size]
+        self._pending = self._pending[size:]
+        return size
+
+    def close(self):
+        if not self.closed:
+            self.response.close()
+        super().close()
+
+
+def copy_into(stream, target, chunk_size=CHUNK_SIZE):
+    """
+    Copies the rest of a stream into a file, or a writable buffer such as a
+    bytearray, mmap or memoryview, without copying through intermediate bytes
+    objects
+
+    :param stream: The stream to read
+    :type stream: io.RawIOBase
+    :param target: Where to write the stream
+    :type target: file-like, bytearray, memoryview
+    :param chunk_size: The size of the buffer used to copy into files
+    :type chunk_size: int
+
+    :returns: The number of bytes copied
+    :rtype: int
+    :raises ValueError: If the stream doesn't fit in the buffer given
+    """
+    total = 0
+
+    if hasattr(target, "write"):
+        view = memoryview(bytearray(chunk_size))
+        while True:
+            size = stream.readinto(view)
+            if not size:
+                return total
+            target.write(view[:size])
+            total += size
+
+    view = memoryview(target).cast("B")
+    while total < len(view):
+        size = stream.readinto(view[total:])
+        if not size:
+            return total
+        total += size
+
+    if stream.read(1):
+        raise ValueError("The response is larger than the {} byte buffer given".format(len(view)))
+    return total
@@ -0,0 +1,281 @@
+import random
+import re
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+
+#: A context manager standing in for spans when tracing is disabled
+NO_SPAN = nullcontext()
+
+TRACEPARENT = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+
+_current_span = ContextVar("openapi3_current_span", default=None)
+
+
+class SpanContext:
+    """
+    The identity of a span, as propagated between services
+    """
+
+    __slots__ = ["trace_id", "span_id", "trace_flags", "is_remote"]
+
+    def __init__(self, trace_id, span_id, trace_flags=1, is_remote=False):
+        self.trace_id = trace_id
+        self.span_id = span_id
+        self.trace_flags = trace_flags
+        self.is_remote = is_remote
+
+
+def format_traceparent(context):
+    """
+    Returns the W3C traceparent header value for a span context.  Span contexts
+    from OpenTelemetry are accepted as well.
+
+    :param context: The context of the span making the request
+    :type context: SpanContext
+
+    :rtype: str
+    """
+    return "00-{:032x}-{:016x}-{:02x}".format(context.trace_id, context.span_id, context.trace_flags)
+
+
+def parse_traceparent(value):
+    """
+    Parses a W3C traceparent header value
+
+    :param value: The header value
+    :type value: str
+
+    :returns: The remote span's context, or None if the value is invalid
+    :rtype: SpanContext
+    """
+    match = TRACEPARENT.match((value or "").strip().lower())
+    if match is None:
+        return None
+
+    trace_id, span_id = int(match.group(1), 16), int(match.group(2), 16)
+    if trace_id == 0 or span_id == 0:
+        return None
+    return SpanContext(trace_id, span_id, int(match.group(3), 16), is_remote=True)
+
+
+class Span:
+    """
+    A timed operation within a trace, shaped like an OpenTelemetry span
+    """
+
+    __slots__ = ["name", "context", "parent", "attributes", "events", "status", "start_time", "end_time", "_tracer"]
+
+    def __init__(self, tracer, name, context, parent, attributes):
+        self._tracer = tracer
+        self.name = name
+        self.context = context
+        self.parent = parent
+        self.attributes = dict(attributes or {})
+        self.events = []
+        self.status = "UNSET"
+        self.start_time = time.time_ns()
+        self.end_time = None
+
+    def get_span_context(self):
+        """
+        Returns this span's context
+        """
+        return self.context
+
+    def is_recording(self):
+        """
+        Returns True until this span has ended
+        """
+        return self.end_time is None
+
+    def set_attribute(self, key, value):
+        """
+        Sets an attribute on this span
+        """
+        self.attributes[key] = value
+
+    def set_attributes(self, attributes):
+        """
+        Sets several attributes on this span
+        """
+        self.attributes.update(attributes)
+
+    def add_event(self, name, attributes=None):
+        """
+        Records an event at the current time
+        """
+        self.events.append((name, time.time_ns(), dict(attributes or {})))
+
+    def record_exception(self, exception):
+        """
+        Records an exception as an event
+        """
+        self.add_event(
+            "exception",
+            {"exception.type": type(exception).__name__, "exception.message": str(exception)},
+        )
+
+    def set_status(self, status, description=None):
+        """
+        Sets this span's status, one of "UNSET", "OK" or "ERROR"
+        """
+        self.status = status
+
+    def end(self):
+        """
+        Ends this span, handing it to the tracer
+        """
+        if self.end_time is None:
+            self.end_time = time.time_ns()
+            self._tracer._finish(self)
+
+    @property
+    def duration(self):
+        """
+        How long this span took, in seconds, or None if it hasn't ended
+        """
+        if self.end_time is None:
+            return None
+        return (self.end_time - self.start_time) / 1e9
+
+
+class Tracer:
+    """
+    A minimal tracer, shaped like an OpenTelemetry tracer, configured per
+    :any:`OpenAPI` instance with the ``tracer`` argument.  A tracer from
+    ``opentelemetry.trace.get_tracer`` may be given instead.
+
+    Each request is traced by a client span named for its method and path
+    template, with child spans for building the parameters, security and body,
+    sending the request, looking up the response and building the model.  The
+    client span's context is sent in a W3C ``traceparent`` header.
+
+    Finished spans are kept, up to ``max_spans``, and passed to ``on_end`` if
+    given.
+    """
+
+    def __init__(self, on_end=None, max_spans=10000):
+        """
+        :param on_end: Called with each span as it ends
+        :type on_end: callable
+        :param max_spans: The most finished spans to keep
+        :type max_spans: int
+        """
+        self.on_end = on_end
+        self._finished = deque(maxlen=max_spans)
+        self._lock = threading.Lock()
+
+    def start_span(self, name, context=None, attributes=None):
+        """
+        Starts a span, without making it current
+
+        :param name: The span's name
+        :type name: str
+        :param context: The parent's span context; defaults to the current span
+        :type context: SpanContext
+        :param attributes: The span's initial attributes
+        :type attributes: dict
+
+        :rtype: Span
+        """
+        if context is None:
+            current = _current_span.get()
+            context = current.context if current is not None else None
+
+        if context is None:
+            trace_id, trace_flags = random.getrandbits(128) or 1, 1
+        else:
+            trace_id, trace_flags = context.trace_id, context.trace_flags
+
+        span_context = SpanContext(trace_id, random.getrandbits(64) or 1, trace_flags)
+        return Span(self, name, span_context, context, attributes)
+
+    @contextmanager
+    def start_as_current_span(self, name, context=None, attributes=None):
+        """
+        A context manager running its body in a new current span.  Exceptions
+        raised in the body are recorded and set the span's status to "ERROR".
+
+        :param name: The span's name
+        :type name: str
+        :param context: The parent's span context; defaults to the current span
+        :type context: SpanContext
+        :param attributes: The span's initial attributes
+        :type attributes: dict
+        """
+        span = self.start_span(name, context=context, attributes=attributes)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.record_exception(e)
+            span.set_status("ERROR", str(e))
+            raise
+        finally:
+            _current_span.reset(token)
+            span.end()
+
+    def _finish(self, span):
+        """
+        Keeps a span that just ended
+        """
+        with self._lock:
+            self._finished.append(span)
+        if self.on_end is not None:
+            self.on_end(span)
+
+    def finished_spans(self):
+        """
+        Returns the spans that have ended, oldest first
+
+        :rtype: list[Span]
+        """
+        with self._lock:
+            return list(self._finished)
+
+    def clear(self):
+        """
+        Discards the spans that have ended
+        """
+        with self._lock:
+            self._finished.clear()
+
+
+def get_current_span():
+    """
+    Returns the current span started by a :any:`Tracer`, or None
+    """
+    return _current_span.get()
+
+
+def operation_span(tracer, operation, base_url):
+    """
+    Returns a context manager for the client span of a request to an operation,
+    or :any:`NO_SPAN` if tracing is disabled
+    """
+    if tracer is None:
+        return NO_SPAN
+
+    method, path = operation.path[-1], operation.path[-2]
+    return tracer.start_as_current_span(
+        "{} {}".format(method.upper(), path),
+        attributes={
+            "openapi.operation_id": operation.operationId,
+            "http.request.method": method.upper(),
+            "http.route": path,
+            "server.url": base_url,
+        },
+    )
+
+
+def phase_span(tracer, name):
+    """
+    Returns a context manager for the span of a phase of a request, or
+    :any:`NO_SPAN` if tracing is disabled
+    """
+    if tracer is None:
+        return NO_SPAN
+    return tracer.start_as_current_span(name)
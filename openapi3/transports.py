@@ -0,0 +1,786 @@
+import asyncio
+import http.client
+import io
+import itertools
+import json
+import os
+import queue
+import ssl
+import sys
+import threading
+from concurrent.futures import Future
+from urllib.parse import unquote, urlsplit
+
+import requests
+import urllib3
+from requests.structures import CaseInsensitiveDict
+from requests.utils import DEFAULT_CA_BUNDLE_PATH, get_encoding_from_headers
+
+from .errors import TransportError
+
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+#: The errors raised when a server could not be reached.  These include errors
+#: raised by requests, as well as those raised by the other transports.
+CONNECTION_ERRORS = (TransportError, requests.exceptions.ConnectionError)
+
+#: The errors raised when a server could not be reached or didn't answer in
+#: time, which count against its health
+UNAVAILABLE_ERRORS = CONNECTION_ERRORS + (requests.exceptions.Timeout,)
+
+
+def _encode_body(body):
+    """
+    Returns the body of a prepared request in a form that can be written to a
+    socket.  requests leaves string bodies as strings, but neither urllib3 nor
+    http.client agree with it on how those should be encoded.
+    """
+    if isinstance(body, str):
+        return body.encode("utf-8")
+    return body
+
+
+def _is_replayable(body):
+    """
+    Returns True if a request body can be sent again, because it isn't a file or
+    iterator that was consumed by sending it
+    """
+    return body is None or isinstance(body, (str, bytes, bytearray, memoryview))
+
+
+def _iter_body(body, chunk_size=64 * 1024):
+    """
+    Yields the body of a prepared request as chunks of bytes, whether it's held
+    in memory, a file to upload, or an iterator of chunks
+    """
+    if body is None:
+        return
+    if _is_replayable(body):
+        yield _encode_body(body)
+    elif hasattr(body, "read"):
+        while True:
+            chunk = body.read(chunk_size)
+            if not chunk:
+                return
+            yield _encode_body(chunk)
+    else:
+        for chunk in body:
+            if chunk:
+                yield _encode_body(chunk)
+
+
+class IteratorReader(io.RawIOBase):
+    """
+    A readable file-like object over an iterator of byte chunks, used to stream
+    response bodies.  ``readinto`` copies straight from each chunk into the
+    caller's buffer.
+    """
+
+    def __init__(self, iterator, on_close=None):
+        """
+        :param iterator: The chunks to read
+        :type iterator: iterator[bytes]
+        :param on_close: Called once when this is closed
+        :type on_close: callable
+        """
+        self._iterator = iterator
+        self._pending = memoryview(b"")
+        self._on_close = on_close
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        while not self._pending:
+            chunk = next(self._iterator, None)
+            if chunk is None:
+                return 0
+            self._pending = memoryview(chunk).cast("B")
+
+        size = min(len(buffer), len(self._pending))
+        buffer[:size] = self._pending[:size]
+        self._pending = self._pending[size:]
+        return size
+
+    def close(self):
+        if not self.closed:
+            self._pending = memoryview(b"")
+            if self._on_close is not None:
+                self._on_close()
+        super().close()
+
+
+class TransportResponse:
+    """
+    The response returned by transports that do not go through requests.  This
+    exposes the subset of :any:`requests.Response` that this library (and
+    :any:`UnexpectedResponseError`) relies upon, so that callers can treat
+    responses the same no matter which transport produced them.
+
+    Streamed responses hold their body in ``raw``, a readable file-like object,
+    until ``content`` is first accessed.  They must be read to the end or closed
+    to release their connection.
+    """
+
+    __slots__ = ["status_code", "headers", "_content", "url", "reason", "raw", "_release"]
+
+    def __init__(self, status_code, headers, content=None, url=None, reason=None, raw=None, release=None):
+        """
+        :param status_code: The HTTP status code of the response
+        :type status_code: int
+        :param headers: The response headers
+        :type headers: dict, list[tuple[str, str]]
+        :param content: The body of the response, if it was read already
+        :type content: bytes
+        :param url: The URL that was requested
+        :type url: str
+        :param reason: The reason phrase sent with the status code
+        :type reason: str
+        :param raw: The body of the response, if it is being streamed
+        :type raw: file-like
+        :param release: Called once the response is closed, to close ``raw`` and
+                        release its connection.  If not given, ``raw`` is closed.
+        :type release: callable
+        """
+        self.status_code = status_code
+        self.headers = CaseInsensitiveDict(headers)
+        self._content = content
+        self.url = url
+        self.reason = reason
+        self.raw = raw
+        self._release = release
+
+    @property
+    def content(self):
+        """
+        The body of the response, read in full if it is being streamed
+        """
+        if self._content is None:
+            if self.raw is None:
+                return b""
+            try:
+                self._content = self.raw.read()
+            finally:
+                self.close()
+        return self._content
+
+    def iter_content(self, chunk_size=64 * 1024):
+        """
+        Yields the body of the response in chunks of up to ``chunk_size`` bytes,
+        closing the response once it's read (or the generator is closed)
+
+        :param chunk_size: The largest chunk to yield
+        :type chunk_size: int
+        """
+        if self._content is not None or self.raw is None:
+            content = self.content
+            for i in range(0, len(content), chunk_size):
+                yield content[i : i + chunk_size]
+            return
+
+        try:
+            while True:
+                chunk = self.raw.read(chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+        finally:
+            self.close()
+
+    def close(self):
+        """
+        Closes a streamed response, releasing its connection
+        """
+        release, self._release = self._release, None
+        if release is not None:
+            release()
+        elif self.raw is not None:
+            self.raw.close()
+
+    @property
+    def encoding(self):
+        """
+        The encoding declared in the Content-Type header, if any
+        """
+        return get_encoding_from_headers(self.headers)
+
+    @property
+    def text(self):
+        """
+        The content of the response, decoded as a string
+        """
+        return self.content.decode(self.encoding or "utf-8", errors="replace")
+
+    def json(self, **kwargs):
+        """
+        Decodes the body of the response as JSON
+        """
+        return json.loads(self.content, **kwargs)
+
+    def __repr__(self):
+        return "<TransportResponse [{}]>".format(self.status_code)
+
+
+class Transport:
+    """
+    A Transport sends prepared requests for :any:`Operation.request` and returns
+    the response received.  Subclasses must implement :any:`send`; the request
+    given is always a :any:`requests.PreparedRequest`, as that's what operations
+    build, but how it's put on the wire is entirely up to the transport.
+
+    Transports are selected per :any:`OpenAPI` instance with the ``transport``
+    argument, and must be safe to share between threads.  Transports that can't
+    stream responses may ignore ``stream``; it's only passed when True.
+    """
+
+    def send(self, request, verify=True, stream=False):
+        """
+        Sends the request and returns the response.
+
+        :param request: The request to send
+        :type request: requests.PreparedRequest
+        :param verify: Should we do an ssl verification on the request or not,
+                       In case str was provided, will use that as the CA.
+        :type verify: bool/str
+        :param stream: If True, return as soon as the response headers arrive,
+                       leaving the body to be read from the response's
+                       ``iter_content`` or ``raw``.
+        :type stream: bool
+
+        :returns: The response received.  This must look like a
+                  :any:`requests.Response`; see :any:`TransportResponse`
+        :rtype: requests.Response, TransportResponse
+        """
+        raise NotImplementedError("You must implement this method in subclasses!")
+
+    def close(self):
+        """
+        Releases any connections held by this transport
+        """
+
+
+class RequestsTransport(Transport):
+    """
+    Sends requests through a :any:`requests.Session`.  This is what operations
+    do when no transport is configured, and is the most compatible choice, as
+    it supports everything requests does (proxies from the environment, auth
+    handlers that react to responses, redirects and so on).
+    """
+
+    def __init__(self, session=None):
+        """
+        :param session: The session to send requests with.  If not given, one
+                        is created.
+        :type session: requests.Session
+        """
+        if session is None:
+            session = requests.Session()
+        self.session = session
+
+    def send(self, request, verify=True, stream=False):
+        """
+        Implementation of :any:`Transport.send`
+        """
+        return self.session.send(request, verify=verify, stream=stream)
+
+    def close(self):
+        """
+        Implementation of :any:`Transport.close`
+        """
+        self.session.close()
+
+
+class Urllib3Transport(Transport):
+    """
+    Sends requests directly through a :any:`urllib3.PoolManager`, skipping the
+    Session machinery in requests (adapters, hooks, cookie jars and redirect
+    handling).  Redirects are not followed and urllib3 will not retry requests.
+    """
+
+    def __init__(self, pool_manager=None, **pool_kwargs):
+        """
+        :param pool_manager: The pool manager to send requests through.  If not
+                             given, one is created with ``pool_kwargs``.
+        :type pool_manager: urllib3.PoolManager
+        :param pool_kwargs: Arguments for the created pool manager, for example
+                            ``maxsize`` or ``timeout``.
+        """
+        if pool_manager is None:
+            pool_manager = urllib3.PoolManager(**pool_kwargs)
+        self.pool_manager = pool_manager
+
+    @staticmethod
+    def _tls_kwargs(verify):
+        """
+        Returns the pool arguments needed to honor the ``verify`` argument
+        """
+        if verify is False:
+            return {"cert_reqs": "CERT_NONE"}
+        if isinstance(verify, str):
+            if os.path.isdir(verify):
+                return {"cert_reqs": "CERT_REQUIRED", "ca_cert_dir": verify}
+            return {"cert_reqs": "CERT_REQUIRED", "ca_certs": verify}
+        return {"cert_reqs": "CERT_REQUIRED", "ca_certs": DEFAULT_CA_BUNDLE_PATH}
+
+    def send(self, request, verify=True, stream=False):
+        """
+        Implementation of :any:`Transport.send`
+        """
+        pool_kwargs = None
+        if request.url.startswith("https:"):
+            pool_kwargs = self._tls_kwargs(verify)
+
+        try:
+            pool = self.pool_manager.connection_from_url(request.url, pool_kwargs=pool_kwargs)
+            r = pool.urlopen(
+                request.method,
+                request.path_url,
+                body=_encode_body(request.body),
+                headers=request.headers,
+                redirect=False,
+                retries=False,
+                assert_same_host=False,
+                preload_content=not stream,
+            )
+        except urllib3.exceptions.HTTPError as e:
+            raise TransportError("{} {} failed: {}".format(request.method, request.url, e)) from e
+
+        if not stream:
+            return TransportResponse(r.status, r.headers.items(), r.data, request.url, r.reason)
+
+        def release():
+            if not r.closed:
+                # the body wasn't read to the end, so the connection can't be reused
+                r.close()
+            r.release_conn()
+
+        return TransportResponse(r.status, r.headers.items(), None, request.url, r.reason, raw=r, release=release)
+
+    def close(self):
+        """
+        Implementation of :any:`Transport.close`
+        """
+        self.pool_manager.clear()
+
+
+class HTTPClientTransport(Transport):
+    """
+    Sends requests with :any:`http.client`, keeping connections alive between
+    calls.  This has the lowest overhead of the included transports, but does
+    not support proxies or decompress responses.
+    """
+
+    def __init__(self, timeout=None, max_idle=10):
+        """
+        :param timeout: The socket timeout, in seconds, for new connections
+        :type timeout: float
+        :param max_idle: The number of idle connections kept per host
+        :type max_idle: int
+        """
+        self.timeout = timeout
+        self.max_idle = max_idle
+
+        self._idle = {}
+        self._lock = threading.Lock()
+
+    def _ssl_context(self, verify):
+        """
+        Returns an SSLContext that honors the ``verify`` argument
+        """
+        if verify is False:
+            return ssl._create_unverified_context()  # pylint: disable=protected-access
+        if isinstance(verify, str):
+            if os.path.isdir(verify):
+                return ssl.create_default_context(capath=verify)
+            return ssl.create_default_context(cafile=verify)
+        return ssl.create_default_context(cafile=DEFAULT_CA_BUNDLE_PATH)
+
+    def _connect(self, key, verify):
+        """
+        Opens a new connection for the given key
+        """
+        scheme, host, port, _ = key
+        if scheme == "https":
+            return http.client.HTTPSConnection(host, port, timeout=self.timeout, context=self._ssl_context(verify))
+        return http.client.HTTPConnection(host, port, timeout=self.timeout)
+
+    def _acquire(self, key, verify):
+        """
+        Returns an idle connection for the given key, or a new one if there are
+        none, and whether the connection was reused.
+        """
+        with self._lock:
+            idle = self._idle.get(key)
+            if idle:
+                return idle.pop(), True
+
+        return self._connect(key, verify), False
+
+    def _release(self, key, conn):
+        """
+        Returns a connection to the idle pool, closing it if the pool is full
+        """
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            if len(idle) < self.max_idle:
+                idle.append(conn)
+                return
+        conn.close()
+
+    def send(self, request, verify=True, stream=False):
+        """
+        Implementation of :any:`Transport.send`
+        """
+        parts = urlsplit(request.url)
+        key = (parts.scheme, parts.hostname, parts.port, verify)
+        body = _encode_body(request.body)
+
+        # files and iterators are streamed by http.client, and must be chunked if
+        # their length isn't known
+        chunked = request.headers.get("Transfer-Encoding", "").lower() == "chunked"
+
+        conn, reused = self._acquire(key, verify)
+        while True:
+            try:
+                conn.request(
+                    request.method, request.path_url, body=body, headers=request.headers, encode_chunked=chunked
+                )
+                r = conn.getresponse()
+                if stream:
+                    break
+                content = r.read()
+                break
+            except (http.client.HTTPException, OSError) as e:
+                conn.close()
+                if reused and isinstance(e, (http.client.RemoteDisconnected, ConnectionError)) and _is_replayable(body):
+                    # the server closed this connection while it sat idle; try
+                    # again once on a fresh connection
+                    conn, reused = self._connect(key, verify), False
+                    continue
+                raise TransportError("{} {} failed: {}".format(request.method, request.url, e)) from e
+
+        if stream:
+
+            def release():
+                # http.client closes responses once they've been read to the end
+                if r.isclosed() and not r.will_close:
+                    self._release(key, conn)
+                else:
+                    r.close()
+                    conn.close()
+
+            return TransportResponse(r.status, r.getheaders(), None, request.url, r.reason, raw=r, release=release)
+
+        if r.will_close:
+            conn.close()
+        else:
+            self._release(key, conn)
+
+        return TransportResponse(r.status, r.getheaders(), content, request.url, r.reason)
+
+    def close(self):
+        """
+        Implementation of :any:`Transport.close`
+        """
+        with self._lock:
+            idle, self._idle = self._idle, {}
+
+        for conns in idle.values():
+            for conn in conns:
+                conn.close()
+
+
+class WSGITransport(Transport):
+    """
+    Calls a WSGI application in-process instead of sending requests over the
+    network.  No sockets are opened and requests are never serialized to HTTP;
+    the prepared request is translated into a WSGI environ directly.  This is
+    intended for tests and for measuring the overhead of the library itself.
+    """
+
+    def __init__(self, app, script_name=""):
+        """
+        :param app: The WSGI application to call
+        :type app: callable
+        :param script_name: The SCRIPT_NAME to call the application with
+        :type script_name: str
+        """
+        self.app = app
+        self.script_name = script_name
+
+    def _environ(self, request):
+        """
+        Builds the WSGI environ for a prepared request
+        """
+        parts = urlsplit(request.url)
+        body = request.body
+        if _is_replayable(body):
+            body = _encode_body(body) or b""
+            content_length = str(len(body)) if body else ""
+            wsgi_input = io.BytesIO(body)
+        else:
+            # uploads are read by the application as it goes; buffered, so that
+            # reads return as many bytes as were asked for
+            content_length = request.headers.get("Content-Length", "")
+            wsgi_input = body if hasattr(body, "read") else io.BufferedReader(IteratorReader(_iter_body(body)))
+
+        environ = {
+            "REQUEST_METHOD": request.method,
+            "SCRIPT_NAME": self.script_name,
+            # PEP 3333 "bytes-as-unicode" strings
+            "PATH_INFO": unquote(parts.path).encode("utf-8").decode("latin-1"),
+            "QUERY_STRING": parts.query,
+            "SERVER_NAME": parts.hostname or "localhost",
+            "SERVER_PORT": str(parts.port or DEFAULT_PORTS.get(parts.scheme, 80)),
+            "SERVER_PROTOCOL": "HTTP/1.1",
+            "REMOTE_ADDR": "127.0.0.1",
+            "CONTENT_LENGTH": content_length,
+            "wsgi.version": (1, 0),
+            "wsgi.url_scheme": parts.scheme,
+            "wsgi.input": wsgi_input,
+            "wsgi.input_terminated": True,
+            "wsgi.errors": sys.stderr,
+            "wsgi.multithread": True,
+            "wsgi.multiprocess": False,
+            "wsgi.run_once": False,
+        }
+
+        for k, v in request.headers.items():
+            k = k.upper().replace("-", "_")
+            if k == "CONTENT_TYPE":
+                environ[k] = v
+            elif k != "CONTENT_LENGTH":
+                environ["HTTP_" + k] = v
+        environ.setdefault("HTTP_HOST", parts.netloc)
+
+        return environ
+
+    def send(self, request, verify=True, stream=False):
+        """
+        Implementation of :any:`Transport.send`
+        """
+        response = {}
+        chunks = []
+
+        def start_response(status, headers, exc_info=None):
+            if exc_info and response:
+                raise exc_info[1].with_traceback(exc_info[2])
+            response["status"] = status
+            response["headers"] = headers
+            return chunks.append
+
+        result = self.app(self._environ(request), start_response)
+        close = getattr(result, "close", None)
+        try:
+            iterator = iter(result)
+            if stream:
+                # apps may not start the response until they're iterated
+                while "status" not in response:
+                    chunk = next(iterator, None)
+                    if chunk is None:
+                        break
+                    chunks.append(chunk)
+            else:
+                for chunk in iterator:
+                    if chunk:
+                        chunks.append(chunk)
+        except BaseException:
+            if close is not None:
+                close()
+            raise
+
+        status, _, reason = response["status"].partition(" ")
+        if stream:
+            raw = IteratorReader(itertools.chain(chunks, iterator), on_close=close)
+            return TransportResponse(int(status), response["headers"], None, request.url, reason, raw=raw)
+
+        if close is not None:
+            close()
+        return TransportResponse(int(status), response["headers"], b"".join(chunks), request.url, reason)
+
+
+class ASGITransport(Transport):
+    """
+    Calls an ASGI application in-process instead of sending requests over the
+    network.  As with :any:`WSGITransport`, no sockets are used and requests are
+    handed to the application as an ASGI scope directly.
+
+    The application runs on an event loop owned by this transport, in its own
+    thread, so that it can be called from synchronous code and from many threads
+    at once.  Lifespan events are not sent to the application.
+    """
+
+    def __init__(self, app, root_path="", client=("127.0.0.1", 0)):
+        """
+        :param app: The ASGI application to call
+        :type app: callable
+        :param root_path: The root_path to call the application with
+        :type root_path: str
+        :param client: The client address given to the application
+        :type client: tuple[str, int]
+        """
+        self.app = app
+        self.root_path = root_path
+        self.client = client
+
+        self._loop = None
+        self._lock = threading.Lock()
+
+    def _get_loop(self):
+        """
+        Returns the event loop the application runs on, starting it if needed
+        """
+        with self._lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name="ASGITransport", daemon=True).start()
+                self._loop = loop
+        return self._loop
+
+    def _scope(self, request):
+        """
+        Builds the ASGI scope for a prepared request
+        """
+        parts = urlsplit(request.url)
+        headers = [(k.lower().encode("latin-1"), v.encode("latin-1")) for k, v in request.headers.items()]
+        if "Host" not in request.headers:
+            headers.append((b"host", parts.netloc.encode("latin-1")))
+
+        return {
+            "type": "http",
+            "asgi": {"version": "3.0", "spec_version": "2.3"},
+            "http_version": "1.1",
+            "method": request.method,
+            "scheme": parts.scheme,
+            "path": unquote(parts.path),
+            "raw_path": parts.path.encode("latin-1"),
+            "query_string": parts.query.encode("latin-1"),
+            "root_path": self.root_path,
+            "headers": headers,
+            "server": (parts.hostname, parts.port or DEFAULT_PORTS.get(parts.scheme, 80)),
+            "client": self.client,
+        }
+
+    @staticmethod
+    def _receiver(request, response_complete):
+        """
+        Returns the ``receive`` callable for a request, which hands over the body
+        a chunk at a time and then waits for ``response_complete``
+        """
+        body = _iter_body(request.body)
+        pending = next(body, b"")
+        done = False
+
+        async def receive():
+            nonlocal pending, done
+            if not done:
+                chunk, pending = pending, next(body, None)
+                done = pending is None
+                return {"type": "http.request", "body": chunk, "more_body": not done}
+
+            # apps listening for a disconnect should only see one once they've
+            # finished responding
+            await response_complete.wait()
+            return {"type": "http.disconnect"}
+
+        return receive
+
+    async def _call(self, request):
+        """
+        Calls the application with the request, returning the response
+        """
+        response = {}
+        chunks = []
+        response_complete = asyncio.Event()
+        receive = self._receiver(request, response_complete)
+
+        async def send(message):
+            if message["type"] == "http.response.start":
+                response["status"] = message["status"]
+                response["headers"] = [(k.decode("latin-1"), v.decode("latin-1")) for k, v in message["headers"]]
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+                if not message.get("more_body", False):
+                    response_complete.set()
+
+        try:
+            await self.app(self._scope(request), receive, send)
+        finally:
+            response_complete.set()
+
+        return TransportResponse(response["status"], response["headers"], b"".join(chunks), request.url)
+
+    async def _stream(self, request, started, chunks):
+        """
+        Calls the application with the request, resolving ``started`` with the
+        status and headers once the response starts, and putting each chunk of
+        the body in the ``chunks`` queue as it's sent, followed by None.  Errors
+        raised after the response started are put in the queue as well.
+        """
+        response_complete = asyncio.Event()
+        receive = self._receiver(request, response_complete)
+
+        async def send(message):
+            if message["type"] == "http.response.start":
+                headers = [(k.decode("latin-1"), v.decode("latin-1")) for k, v in message["headers"]]
+                started.set_result((message["status"], headers))
+            elif message["type"] == "http.response.body":
+                if message.get("body"):
+                    chunks.put(message["body"])
+                if not message.get("more_body", False):
+                    response_complete.set()
+
+        try:
+            await self.app(self._scope(request), receive, send)
+        except BaseException as e:
+            if not started.done():
+                started.set_exception(e)
+            else:
+                chunks.put(e)
+            if isinstance(e, asyncio.CancelledError):
+                raise
+        finally:
+            response_complete.set()
+            chunks.put(None)
+            if not started.done():
+                started.set_exception(TransportError("{} returned without responding".format(self.app)))
+
+    @staticmethod
+    def _drain(chunks):
+        """
+        Yields the chunks put in the queue by :any:`_stream`
+        """
+        while True:
+            chunk = chunks.get()
+            if chunk is None:
+                return
+            if isinstance(chunk, BaseException):
+                raise TransportError("Application failed while streaming: {}".format(chunk)) from chunk
+            yield chunk
+
+    def send(self, request, verify=True, stream=False):
+        """
+        Implementation of :any:`Transport.send`.  Streamed responses are handed
+        over chunk by chunk as the application sends them; closing the response
+        early cancels the application.
+        """
+        if not stream:
+            return asyncio.run_coroutine_threadsafe(self._call(request), self._get_loop()).result()
+
+        started, chunks = Future(), queue.Queue()
+        future = asyncio.run_coroutine_threadsafe(self._stream(request, started, chunks), self._get_loop())
+        status, headers = started.result()
+
+        raw = IteratorReader(self._drain(chunks), on_close=future.cancel)
+        return TransportResponse(status, headers, None, request.url, raw=raw)
+
+    def close(self):
+        """
+        Implementation of :any:`Transport.close`; stops the event loop
+        """
+        with self._lock:
+            loop, self._loop = self._loop, None
+
+        if loop is not None:
+            loop.call_soon_threadsafe(loop.stop)
@@ -0,0 +1,416 @@
+import ipaddress
+import re
+import uuid
+from datetime import date, datetime
+
+from .errors import RequestValidationError
+from .forms import FORM_TYPES
+from .schemas import Model
+from .streaming import is_binary_body
+
+
+def _is_date(value):
+    try:
+        date.fromisoformat(value)
+    except ValueError:
+        return False
+    return True
+
+
+def _is_date_time(value):
+    # fromisoformat doesn't accept a Z suffix before Python 3.11
+    if value[-1:] in ("Z", "z"):
+        value = value[:-1] + "+00:00"
+    try:
+        datetime.fromisoformat(value)
+    except ValueError:
+        return False
+    return "T" in value or "t" in value or " " in value
+
+
+def _is_uuid(value):
+    try:
+        uuid.UUID(value)
+    except ValueError:
+        return False
+    return True
+
+
+def _is_ip(version):
+    def check(value):
+        try:
+            return ipaddress.ip_address(value).version == version
+        except ValueError:
+            return False
+
+    return check
+
+
+#: The string formats that are checked; other formats are accepted as is
+FORMATS = {
+    "date": _is_date,
+    "date-time": _is_date_time,
+    "uuid": _is_uuid,
+    "email": re.compile(r"^[^@\s]+@[^@\s]+$").match,
+    "ipv4": _is_ip(4),
+    "ipv6": _is_ip(6),
+}
+
+
+def _is_integer(value):
+    if isinstance(value, float):
+        return value.is_integer()
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def _is_binary(value):
+    # files may be given as file objects or (filename, content) tuples
+    return is_binary_body(value) or isinstance(value, (str, tuple))
+
+
+#: How each type is recognized
+TYPES = {
+    "string": lambda v: isinstance(v, str),
+    "integer": _is_integer,
+    "number": lambda v: isinstance(v, (int, float)) and not isinstance(v, bool),
+    "boolean": lambda v: isinstance(v, bool),
+    "array": lambda v: isinstance(v, (list, tuple)),
+    "object": lambda v: isinstance(v, (dict, Model)),
+}
+
+
+def format_path(path):
+    """
+    Formats the location of a value as ``data.items[0].name``
+
+    :param path: The keys and indexes leading to the value
+    :type path: tuple[str, int]
+
+    :rtype: str
+    """
+    parts = [str(path[0])] if path else []
+    for c in path[1:]:
+        parts.append("[{}]".format(c) if isinstance(c, int) else ".{}".format(c))
+    return "".join(parts)
+
+
+def _fail(path, message, *args):
+    raise RequestValidationError(message.format(*args), format_path(path))
+
+
+def _as_dict(value):
+    """
+    Returns the properties of an object, leaving out those of a model that
+    weren't set
+    """
+    if isinstance(value, Model):
+        return {k: v for k, v in value if v is not None}
+    return value
+
+
+class SchemaCompiler:
+    """
+    Compiles schemas into functions that validate a value against them, raising
+    a :any:`RequestValidationError` naming the first value that doesn't match.
+    Schemas are compiled from their raw definitions, so that every keyword is
+    checked, and each is compiled once no matter how often it's referenced,
+    including by itself.
+    """
+
+    def __init__(self, root, for_request=True):
+        """
+        :param root: The spec, to resolve references against
+        :type root: OpenAPI
+        :param for_request: If True, required properties that are readOnly are
+                            not required, as they're only sent in responses.
+                            Otherwise, values are validated as responses,
+                            where writeOnly properties are not required.
+        :type for_request: bool
+        """
+        self.root = root
+        self.for_request = for_request
+        self._compiled = {}
+
+    def _resolve(self, raw):
+        while isinstance(raw, dict) and "$ref" in raw:
+            raw = self.root.resolve_path(raw["$ref"].split("/")[1:]).raw_element
+        return raw
+
+    def compile(self, schema):
+        """
+        Returns a function validating values against a schema
+
+        :param schema: The schema, or its raw definition
+        :type schema: Schema, dict
+
+        :returns: A function taking the value and the path to it, as a tuple
+        :rtype: callable
+        """
+        raw = self._resolve(getattr(schema, "raw_element", schema))
+        key = id(raw)
+        validator = self._compiled.get(key)
+        if validator is not None:
+            return validator
+
+        # a schema that refers to itself validates through this until it's built
+        cell = []
+        self._compiled[key] = lambda value, path: cell[0](value, path)
+        validator = self._build(raw if isinstance(raw, dict) else {})
+        cell.append(validator)
+        self._compiled[key] = validator
+        return validator
+
+    def _build(self, raw):
+        checks = []
+        kind = raw.get("type")
+        nullable = raw.get("nullable", False) or kind is None
+
+        if kind is not None:
+            if kind == "string" and raw.get("format") in ("binary", "byte"):
+                is_type = _is_binary
+            else:
+                is_type = TYPES.get(kind, lambda v: True)
+
+            def check_type(value, path):
+                if not is_type(value):
+                    _fail(path, "expected {}, got {}", kind, type(value).__name__)
+
+            checks.append(check_type)
+
+        if "enum" in raw:
+            enum = raw["enum"]
+
+            def check_enum(value, path):
+                if value not in enum:
+                    _fail(path, "{!r} is not one of {}", value, ", ".join(repr(c) for c in enum))
+
+            checks.append(check_enum)
+
+        checks.extend(self._string_checks(raw))
+        checks.extend(self._number_checks(raw))
+        checks.extend(self._array_checks(raw))
+        checks.extend(self._object_checks(raw))
+        checks.extend(self._combinator_checks(raw))
+
+        def validate(value, path):
+            if value is None:
+                if nullable:
+                    return
+                _fail(path, "must not be null")
+            for check in checks:
+                check(value, path)
+
+        return validate
+
+    def _string_checks(self, raw):
+        min_length = raw.get("minLength")
+        max_length = raw.get("maxLength")
+        pattern = re.compile(raw["pattern"]) if "pattern" in raw else None
+        is_format = FORMATS.get(raw.get("format"))
+
+        if min_length is None and max_length is None and pattern is None and is_format is None:
+            return
+
+        def check_string(value, path):
+            if not isinstance(value, str):
+                return
+            if min_length is not None and len(value) < min_length:
+                _fail(path, "must be at least {} characters long", min_length)
+            if max_length is not None and len(value) > max_length:
+                _fail(path, "must be at most {} characters long", max_length)
+            if pattern is not None and not pattern.search(value):
+                _fail(path, "{!r} does not match {}", value, pattern.pattern)
+            if is_format is not None and not is_format(value):
+                _fail(path, "{!r} is not a valid {}", value, raw["format"])
+
+        yield check_string
+
+    def _number_checks(self, raw):
+        minimum = raw.get("minimum")
+        maximum = raw.get("maximum")
+        exclusive_minimum = raw.get("exclusiveMinimum", False)
+        exclusive_maximum = raw.get("exclusiveMaximum", False)
+        multiple_of = raw.get("multipleOf")
+
+        # OpenAPI 3.1 gives the exclusive bounds as numbers
+        if not isinstance(exclusive_minimum, bool):
+            minimum, exclusive_minimum = exclusive_minimum, True
+        if not isinstance(exclusive_maximum, bool):
+            maximum, exclusive_maximum = exclusive_maximum, True
+
+        if minimum is None and maximum is None and multiple_of is None:
+            return
+
+        def check_number(value, path):
+            if not TYPES["number"](value):
+                return
+            if minimum is not None and (value <= minimum if exclusive_minimum else value < minimum):
+                _fail(path, "must be {} {}", "greater than" if exclusive_minimum else "at least", minimum)
+            if maximum is not None and (value >= maximum if exclusive_maximum else value > maximum):
+                _fail(path, "must be {} {}", "less than" if exclusive_maximum else "at most", maximum)
+            if multiple_of is not None and abs(value / multiple_of - round(value / multiple_of)) > 1e-9:
+                _fail(path, "must be a multiple of {}", multiple_of)
+
+        yield check_number
+
+    def _array_checks(self, raw):
+        min_items = raw.get("minItems")
+        max_items = raw.get("maxItems")
+        unique = raw.get("uniqueItems", False)
+        items = self.compile(raw["items"]) if "items" in raw else None
+
+        if min_items is None and max_items is None and not unique and items is None:
+            return
+
+        def check_array(value, path):
+            if not isinstance(value, (list, tuple)):
+                return
+            if min_items is not None and len(value) < min_items:
+                _fail(path, "must have at least {} items", min_items)
+            if max_items is not None and len(value) > max_items:
+                _fail(path, "must have at most {} items", max_items)
+            if unique:
+                seen = []
+                for c in value:
+                    if c in seen:
+                        _fail(path, "items must be unique, but {!r} is repeated", c)
+                    seen.append(c)
+            if items is not None:
+                for i, c in enumerate(value):
+                    items(c, path + (i,))
+
+        yield check_array
+
+    def _object_checks(self, raw):
+        raw_properties = raw.get("properties") or {}
+        properties = {k: self.compile(v) for k, v in raw_properties.items()}
+        required = raw.get("required") or []
+        # readOnly properties are only required in responses, and writeOnly
+        # properties only in requests
+        skip = "readOnly" if self.for_request else "writeOnly"
+        required = [c for c in required if not self._resolve(raw_properties.get(c, {})).get(skip)]
+        additional = raw.get("additionalProperties", True)
+        if isinstance(additional, dict):
+            additional = self.compile(additional)
+        min_properties = raw.get("minProperties")
+        max_properties = raw.get("maxProperties")
+
+        if not (properties or required) and additional is True and min_properties is max_properties is None:
+            return
+
+        def check_object(value, path):
+            if not isinstance(value, (dict, Model)):
+                return
+            value = _as_dict(value)
+            for c in required:
+                if c not in value:
+                    _fail(path + (c,), "is required")
+            if min_properties is not None and len(value) < min_properties:
+                _fail(path, "must have at least {} properties", min_properties)
+            if max_properties is not None and len(value) > max_properties:
+                _fail(path, "must have at most {} properties", max_properties)
+            for k, v in value.items():
+                validator = properties.get(k)
+                if validator is not None:
+                    validator(v, path + (k,))
+                elif additional is False:
+                    _fail(path + (k,), "is not an allowed property")
+                elif additional is not True:
+                    additional(v, path + (k,))
+
+        yield check_object
+
+    def _combinator_checks(self, raw):
+        all_of = [self.compile(c) for c in raw.get("allOf") or []]
+        any_of = [self.compile(c) for c in raw.get("anyOf") or []]
+        one_of = [self.compile(c) for c in raw.get("oneOf") or []]
+        not_ = self.compile(raw["not"]) if "not" in raw else None
+
+        def matches(validator, value, path):
+            try:
+                validator(value, path)
+            except RequestValidationError:
+                return False
+            return True
+
+        if all_of:
+
+            def check_all_of(value, path):
+                for c in all_of:
+                    c(value, path)
+
+            yield check_all_of
+
+        if any_of:
+
+            def check_any_of(value, path):
+                if not any(matches(c, value, path) for c in any_of):
+                    _fail(path, "does not match any of the allowed schemas")
+
+            yield check_any_of
+
+        if one_of:
+
+            def check_one_of(value, path):
+                matched = sum(matches(c, value, path) for c in one_of)
+                if matched != 1:
+                    _fail(path, "must match exactly one schema, but matches {}", matched)
+
+            yield check_one_of
+
+        if not_ is not None:
+
+            def check_not(value, path):
+                if matches(not_, value, path):
+                    _fail(path, "must not match the schema it matches")
+
+            yield check_not
+
+
+class RequestValidator:
+    """
+    Validates the parameters and body of calls to an operation before they're
+    sent.  Operations compile one the first time a call is validated, and
+    reuse it for every call after that.
+    """
+
+    def __init__(self, operation):
+        """
+        :param operation: The operation to validate calls to
+        :type operation: Operation
+        """
+        compiler = SchemaCompiler(operation._root)
+
+        self._parameters = {}
+        for c in operation.parameters + operation._root.paths[operation.path[-2]].parameters:
+            if c.schema is not None and c.name not in self._parameters:
+                self._parameters[c.name] = compiler.compile(c.schema)
+
+        self._bodies = {}
+        if operation.requestBody is not None:
+            for name, media_type in operation.requestBody.content.items():
+                if media_type.schema is not None and (name == "application/json" or name in FORM_TYPES):
+                    self._bodies[name] = compiler.compile(media_type.schema)
+
+        # the body is validated against the media type it will be sent as
+        self._body = self._bodies.get("application/json") or next(iter(self._bodies.values()), None)
+
+    def validate(self, parameters, data):
+        """
+        Validates the arguments to a call
+
+        :param parameters: The parameters of the call
+        :type parameters: dict
+        :param data: The body of the call
+        :type data: any
+
+        :raises RequestValidationError: If a value doesn't match its schema
+        """
+        for name, value in (parameters or {}).items():
+            validator = self._parameters.get(name)
+            if validator is not None:
+                validator(value, ("parameters", name))
+
+        # uploads are sent as they are, so there's nothing to validate
+        if self._body is not None and data is not None and not is_binary_body(data):
+            self._body(data, ("data",))
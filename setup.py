@@ -23,6 +23,7 @@ setup(
     license="BSD 3-Clause License",
     install_requires=["PyYaml", "requests"],
     extras_require={
+        "fast": ["orjson"],
         "test": ["pytest", "pytest-asyncio==0.16", "uvloop==0.17.0", "hypercorn==0.14.3", "pydantic==1.10.2", "fastapi==0.76.0"],
     },
 )
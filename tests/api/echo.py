@@ -0,0 +1,126 @@
+"""
+A small server for the echo-api.yaml spec, built on the standard library so
+that tests of sending requests don't depend on an ASGI server.  The same API
+is available as a WSGI app for in-process tests.
+"""
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+
+ITEMS = [{"id": i, "name": "item {}".format(i), "tags": ["even" if i % 2 == 0 else "odd"]} for i in range(10)]
+FILES = {}
+
+
+def handle(method, path, body):
+    """
+    Answers a request to the echo API, returning the status code and the
+    response body; bytes are sent as they are, anything else as JSON.
+    """
+    parts = urlsplit(path)
+
+    if method == "POST":
+        return 201, json.loads(body)
+
+    if parts.path.startswith("/files/"):
+        name = parts.path.rsplit("/", 1)[1]
+        if method == "PUT":
+            FILES[name] = body
+            return 200, {"id": len(body), "name": name}
+        if name in FILES:
+            return 200, FILES[name]
+        return 404, {"message": "{} not found".format(name)}
+
+    if parts.path == "/items":
+        limit = int(parse_qs(parts.query).get("limit", [len(ITEMS)])[0])
+        return 200, ITEMS[:limit]
+    elif parts.path.startswith("/items/"):
+        item_id = int(parts.path.rsplit("/", 1)[1])
+        if 0 <= item_id < len(ITEMS):
+            return 200, ITEMS[item_id]
+        return 404, {"message": "{} not found".format(item_id)}
+
+    return 404, {"message": "no such path"}
+
+
+class EchoHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # write each response in a single segment; otherwise delayed ACKs stall
+    # every keep-alive request for tens of milliseconds
+    wbufsize = -1
+    disable_nagle_algorithm = True
+
+    def log_message(self, *args):
+        pass
+
+    def _read_body(self):
+        if self.headers.get("Transfer-Encoding", "").lower() != "chunked":
+            return self.rfile.read(int(self.headers.get("Content-Length", 0)))
+
+        chunks = []
+        while True:
+            size = int(self.rfile.readline().split(b";")[0], 16)
+            chunks.append(self.rfile.read(size))
+            self.rfile.readline()
+            if not size:
+                return b"".join(chunks)
+
+    def _handle(self):
+        body = self._read_body()
+        self.server.requests.append((self.command, self.path, dict(self.headers)))
+
+        status, response = handle(self.command, self.path, body)
+
+        raw, content_type = _encode(response)
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(raw)))
+        self.end_headers()
+        self.wfile.write(raw)
+
+    do_GET = do_POST = do_PUT = _handle
+
+
+def _encode(response):
+    """
+    Returns the body and content type to send a response with
+    """
+    if isinstance(response, bytes):
+        return response, "application/octet-stream"
+    return json.dumps(response).encode(), "application/json"
+
+
+def serve():
+    """
+    Starts the echo server on a free port in a background thread, returning the
+    server; its ``requests`` attribute records each request received.
+    """
+    server = ThreadingHTTPServer(("127.0.0.1", 0), EchoHandler)
+    server.daemon_threads = True
+    server.requests = []
+
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+
+def wsgi_app(environ, start_response):
+    """
+    The echo API as a WSGI application
+    """
+    path = environ["PATH_INFO"]
+    if environ["QUERY_STRING"]:
+        path += "?" + environ["QUERY_STRING"]
+    if environ.get("CONTENT_LENGTH") or not environ.get("wsgi.input_terminated"):
+        body = environ["wsgi.input"].read(int(environ.get("CONTENT_LENGTH") or 0))
+    else:
+        body = environ["wsgi.input"].read()
+
+    status, response = handle(environ["REQUEST_METHOD"], path, body)
+
+    raw, content_type = _encode(response)
+    start_response(
+        "{} Whatever".format(status),
+        [("Content-Type", content_type), ("Content-Length", str(len(raw)))],
+    )
+    return [raw]
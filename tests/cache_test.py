@@ -0,0 +1,116 @@
+"""
+Tests caching GET responses with openapi3.cache.ResponseCache
+"""
+import json
+
+import pytest
+
+from openapi3 import OpenAPI
+from openapi3.cache import ResponseCache
+from openapi3.transports import WSGITransport
+
+
+class CachingApp:
+    """
+    A WSGI app serving the echo-api.yaml items with configurable caching headers
+    """
+
+    def __init__(self, headers):
+        self.headers = headers
+        self.requests = []
+
+    def __call__(self, environ, start_response):
+        self.requests.append(environ)
+
+        if self.headers.get("ETag") and environ.get("HTTP_IF_NONE_MATCH") == self.headers["ETag"]:
+            start_response("304 Not Modified", list(self.headers.items()))
+            return []
+
+        item_id = int(environ["PATH_INFO"].rsplit("/", 1)[1])
+        body = json.dumps({"id": item_id, "name": "item {}".format(item_id)}).encode()
+        start_response("200 OK", [("Content-Type", "application/json")] + list(self.headers.items()))
+        return [body]
+
+
+def _client(echo_api, headers, cache):
+    app = CachingApp(headers)
+    return OpenAPI(echo_api, transport=WSGITransport(app), cache=cache), app
+
+
+def test_cache_max_age(echo_api):
+    """
+    Tests that fresh responses are answered from the cache without a request
+    """
+    cache = ResponseCache()
+    api, app = _client(echo_api, {"Cache-Control": "max-age=60"}, cache)
+
+    first = api.call_getItem(parameters={"id": 1})
+    second = api.call_getItem(parameters={"id": 1})
+    other = api.call_getItem(parameters={"id": 2})
+
+    assert first is second
+    assert other.id == 2
+    assert len(app.requests) == 2
+    assert cache.stats() == {"getItem": {"hits": 1, "misses": 2, "revalidated": 0}}
+
+
+def test_cache_revalidation(echo_api):
+    """
+    Tests that stale responses are revalidated with their ETag
+    """
+    cache = ResponseCache()
+    api, app = _client(echo_api, {"Cache-Control": "no-cache", "ETag": '"v1"'}, cache)
+
+    first = api.call_getItem(parameters={"id": 1})
+    second = api.call_getItem(parameters={"id": 1})
+
+    assert first is second
+    assert len(app.requests) == 2
+    assert "HTTP_IF_NONE_MATCH" not in app.requests[0]
+    assert app.requests[1]["HTTP_IF_NONE_MATCH"] == '"v1"'
+    assert cache.stats()["getItem"] == {"hits": 0, "misses": 2, "revalidated": 1}
+
+
+@pytest.mark.parametrize("headers", [{"Cache-Control": "no-store, max-age=60"}, {}, {"Vary": "*"}])
+def test_cache_not_stored(echo_api, headers):
+    """
+    Tests that responses are not cached if their headers don't allow it
+    """
+    cache = ResponseCache()
+    api, app = _client(echo_api, headers, cache)
+
+    api.call_getItem(parameters={"id": 1})
+    api.call_getItem(parameters={"id": 1})
+
+    assert len(app.requests) == 2
+    assert len(cache) == 0
+
+
+def test_cache_eviction(echo_api):
+    """
+    Tests that the least recently used entries are evicted
+    """
+    cache = ResponseCache(max_entries=2)
+    api, app = _client(echo_api, {"Cache-Control": "max-age=60"}, cache)
+
+    api.call_getItem(parameters={"id": 1})
+    api.call_getItem(parameters={"id": 2})
+    api.call_getItem(parameters={"id": 1})
+    api.call_getItem(parameters={"id": 3})
+    assert len(cache) == 2
+    assert len(app.requests) == 3
+
+    # 2 was least recently used, and so was evicted
+    api.call_getItem(parameters={"id": 1})
+    assert len(app.requests) == 3
+    api.call_getItem(parameters={"id": 2})
+    assert len(app.requests) == 4
+
+    # entries are also evicted when they don't fit in max_bytes
+    size = cache.size // 2
+    cache = ResponseCache(max_bytes=size * 2 + 1)
+    api, app = _client(echo_api, {"Cache-Control": "max-age=60"}, cache)
+    for i in range(1, 4):
+        api.call_getItem(parameters={"id": i})
+    assert len(cache) == 2
+    assert cache.size <= size * 2 + 1
@@ -0,0 +1,398 @@
+"""
+Tests the layers OpenAPI applies around calls to operations
+"""
+import copy
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+import pytest
+import requests
+
+from openapi3 import OpenAPI, TransportError, UnexpectedResponseError
+from openapi3.errors import CircuitOpenError
+from openapi3.hedging import HedgingPolicy
+from openapi3.retry import CircuitBreaker, RetryPolicy
+from openapi3.servers import ServerSelector, server_urls
+from openapi3.transports import WSGITransport
+
+
+class SlowApp:
+    """
+    A WSGI app serving the echo-api.yaml items, slowly
+    """
+
+    def __init__(self, delay=0.2):
+        self.delay = delay
+        self.requests = []
+        self.lock = threading.Lock()
+
+    def __call__(self, environ, start_response):
+        with self.lock:
+            self.requests.append(environ)
+        time.sleep(self.delay)
+
+        item_id = int(environ["PATH_INFO"].rsplit("/", 1)[1])
+        body = json.dumps({"id": item_id, "name": "item {}".format(item_id)}).encode()
+        start_response("200 OK", [("Content-Type", "application/json")])
+        return [body]
+
+
+def _call_concurrently(func, kwargs_list):
+    with ThreadPoolExecutor(len(kwargs_list)) as pool:
+        return list(pool.map(lambda kwargs: func(**kwargs), kwargs_list))
+
+
+def test_coalesce(echo_api):
+    """
+    Tests that identical concurrent calls share a single request
+    """
+    app = SlowApp()
+    api = OpenAPI(echo_api, transport=WSGITransport(app), coalesce=True)
+
+    results = _call_concurrently(api.call_getItem, [{"parameters": {"id": 1}}] * 8)
+    assert len(app.requests) == 1
+    assert all(c is results[0] for c in results)
+    assert api._single_flight.stats() == {"getItem": {"calls": 8, "coalesced": 7}}
+
+    # different parameters are different calls
+    results = _call_concurrently(api.call_getItem, [{"parameters": {"id": i % 2}} for i in range(8)])
+    assert len(app.requests) == 3
+    assert [c.id for c in results] == [i % 2 for i in range(8)]
+
+    # and calls that aren't concurrent aren't coalesced
+    api.call_getItem(parameters={"id": 1})
+    assert len(app.requests) == 4
+
+
+def test_coalesce_extension(echo_api):
+    """
+    Tests that operations can opt out of coalescing with x-coalesce
+    """
+    spec = copy.deepcopy(echo_api)
+    spec["paths"]["/items/{id}"]["get"]["x-coalesce"] = False
+
+    app = SlowApp()
+    api = OpenAPI(spec, transport=WSGITransport(app), coalesce=True)
+
+    _call_concurrently(api.call_getItem, [{"parameters": {"id": 1}}] * 4)
+    assert len(app.requests) == 4
+
+
+class FailingTransport(WSGITransport):
+    """
+    Calls a WSGI app in-process, except for requests to the given hosts, which
+    fail with ``error``
+    """
+
+    def __init__(self, app, down=(), error=TransportError):
+        super().__init__(app)
+        self.down = set(down)
+        self.error = error
+        self.hosts = []
+
+    def send(self, request, verify=True):
+        host = urlsplit(request.url).hostname
+        self.hosts.append(host)
+        if host in self.down:
+            raise self.error("{} is down".format(host))
+        return super().send(request, verify=verify)
+
+
+def test_server_urls(with_servers):
+    """
+    Tests that servers are found on the most specific level and expanded
+    """
+    api = OpenAPI(with_servers)
+
+    assert server_urls(api._operation_map["listItems"]) == [
+        "https://us-east.example.com/v1",
+        "https://backup.example.com/v1",
+    ]
+    assert server_urls(api._operation_map["listItems"], {"region": "eu-west", "version": "v2"})[0] == (
+        "https://eu-west.example.com/v2"
+    )
+    assert server_urls(api._operation_map["getItem"]) == [
+        "https://items-a.example.com",
+        "https://items-b.example.com",
+    ]
+    assert server_urls(api._operation_map["deleteItem"]) == ["https://admin.example.com"]
+
+    with pytest.raises(ValueError, match="not a valid value for server variable region"):
+        api.servers[0].expand_url({"region": "mars"})
+
+    # without a selector, calls go to the first server
+    assert api.call_listItems.base_url == "https://us-east.example.com/v1"
+    assert api.call_getItem.base_url == "https://items-a.example.com"
+
+
+def test_server_urls_cached(with_servers, monkeypatch):
+    """
+    Tests that an operation's servers are expanded once, not on every lookup
+    """
+    api = OpenAPI(with_servers)
+    expanded = []
+
+    def counting(operation, variables=None):
+        expanded.append(operation.operationId)
+        return server_urls(operation, variables)
+
+    monkeypatch.setattr("openapi3.openapi.server_urls", counting)
+    for _ in range(3):
+        assert api.call_getItem.server_urls == ["https://items-a.example.com", "https://items-b.example.com"]
+    assert api.call_listItems.base_url == "https://us-east.example.com/v1"
+    assert expanded == ["getItem", "listItems"]
+
+
+@pytest.mark.parametrize("error", [TransportError, requests.exceptions.ReadTimeout])
+def test_server_failover(with_servers, error):
+    """
+    Tests that calls fail over to the next server if one can't be reached or
+    times out, and that the failing server is avoided afterwards
+    """
+    transport = FailingTransport(SlowApp(delay=0), down=["items-a.example.com"], error=error)
+    selector = ServerSelector()
+    api = OpenAPI(with_servers, transport=transport, server_selector=selector)
+
+    assert api.call_getItem(parameters={"id": 1}).id == 1
+    assert transport.hosts == ["items-a.example.com", "items-b.example.com"]
+
+    assert api.call_getItem(parameters={"id": 2}).id == 2
+    assert transport.hosts[2:] == ["items-b.example.com"]
+
+    stats = selector.stats()
+    assert stats["https://items-a.example.com"]["errors"] == 1
+    assert stats["https://items-b.example.com"]["requests"] == 2
+
+    # if every server is down, the last error is raised
+    transport.down.add("items-b.example.com")
+    with pytest.raises(error):
+        api.call_getItem(parameters={"id": 3})
+
+
+def test_server_selection_by_latency(with_servers):
+    """
+    Tests that calls prefer the server with the lowest latency
+    """
+    selector = ServerSelector()
+    api = OpenAPI(with_servers, server_selector=selector)
+    operation = api._operation_map["getItem"]
+
+    # unused servers are tried first, in the order they were declared
+    assert selector.candidates(operation) == ["https://items-a.example.com", "https://items-b.example.com"]
+    selector.record("https://items-a.example.com", 0.5)
+    assert selector.candidates(operation)[0] == "https://items-b.example.com"
+    selector.record("https://items-b.example.com", 0.1)
+    assert selector.candidates(operation)[0] == "https://items-b.example.com"
+
+    # errors count against a server
+    for _ in range(5):
+        selector.record("https://items-b.example.com", 0.1, error=True)
+    assert selector.candidates(operation)[0] == "https://items-a.example.com"
+
+
+class DelayedTransport(WSGITransport):
+    """
+    Calls a WSGI app in-process, delaying requests to the given hosts
+    """
+
+    def __init__(self, app):
+        super().__init__(app)
+        self.delays = {}
+        self.hosts = []
+
+    def send(self, request, verify=True, **kwargs):
+        host = urlsplit(request.url).hostname
+        self.hosts.append(host)
+        time.sleep(self.delays.get(host, 0.001))
+        return super().send(request, verify=verify, **kwargs)
+
+
+def test_hedging(with_servers):
+    """
+    Tests that slow calls are hedged to the next server, within the budget
+    """
+    transport = DelayedTransport(SlowApp(delay=0))
+    hedging = HedgingPolicy(percentile=50, min_samples=5, max_hedge_rate=0.5, burst=1)
+    api = OpenAPI(with_servers, transport=transport, hedging=hedging)
+
+    for i in range(5):
+        api.call_getItem(parameters={"id": i})
+    assert set(transport.hosts) == {"items-a.example.com"}
+    assert hedging.delay(api._operation_map["getItem"]) is not None
+
+    # the first server slows down; streamed calls can only be read once, so
+    # they're never hedged
+    transport.delays["items-a.example.com"] = 0.3
+    sent = len(transport.hosts)
+    api.call_getItem(parameters={"id": 5}, stream=True)
+    assert transport.hosts[sent:] == ["items-a.example.com"]
+    assert hedging.stats()["getItem"]["calls"] == 5
+
+    # the hedged request to the second server wins
+    start = time.monotonic()
+    assert api.call_getItem(parameters={"id": 5}).id == 5
+    assert time.monotonic() - start < 0.3
+    assert transport.hosts[-2:] == ["items-a.example.com", "items-b.example.com"]
+
+    # the budget is spent, so the next slow call waits for the first server
+    start = time.monotonic()
+    assert api.call_getItem(parameters={"id": 6}).id == 6
+    assert time.monotonic() - start >= 0.3
+    assert transport.hosts[-1] == "items-a.example.com"
+
+    stats = hedging.stats()["getItem"]
+    assert stats["calls"] == 7
+    assert stats["hedged"] == 1
+    assert stats["hedges_won"] == 1
+
+    # unsafe operations are never hedged
+    assert not hedging.applies_to(api._operation_map["deleteItem"])
+    hedging.close()
+
+
+class FlakyApp:
+    """
+    A WSGI app serving the echo-api.yaml items, answering the first ``failures``
+    requests with the given undocumented status
+    """
+
+    def __init__(self, failures, status="503 Service Unavailable", headers=()):
+        self.failures = failures
+        self.status = status
+        self.headers = list(headers)
+        self.requests = []
+
+    def __call__(self, environ, start_response):
+        self.requests.append(environ)
+        if len(self.requests) <= self.failures:
+            start_response(self.status, self.headers)
+            return []
+
+        if environ["REQUEST_METHOD"] == "POST":
+            body = environ["wsgi.input"].read(int(environ["CONTENT_LENGTH"]))
+            start_response("201 Created", [("Content-Type", "application/json")])
+            return [body]
+
+        item_id = int(environ["PATH_INFO"].rsplit("/", 1)[1])
+        body = json.dumps({"id": item_id, "name": "item {}".format(item_id)}).encode()
+        start_response("200 OK", [("Content-Type", "application/json")])
+        return [body]
+
+
+def test_retry(echo_api):
+    """
+    Tests that idempotent calls are retried on retryable statuses, waiting as
+    long as Retry-After asks, and only as often as the policy allows
+    """
+    app = FlakyApp(2, headers=[("Retry-After", "0.1")])
+    retry = RetryPolicy(backoff=0.001)
+    api = OpenAPI(echo_api, transport=WSGITransport(app), retry=retry)
+
+    start = time.monotonic()
+    assert api.call_getItem(parameters={"id": 1}).id == 1
+    assert time.monotonic() - start >= 0.2
+    assert len(app.requests) == 3
+
+    # out of attempts
+    app = FlakyApp(3)
+    api = OpenAPI(echo_api, transport=WSGITransport(app), retry=retry)
+    with pytest.raises(UnexpectedResponseError):
+        api.call_getItem(parameters={"id": 1})
+    assert len(app.requests) == 3
+
+    # statuses that aren't retryable aren't retried
+    app = FlakyApp(1, status="500 Internal Server Error")
+    api = OpenAPI(echo_api, transport=WSGITransport(app), retry=retry)
+    with pytest.raises(UnexpectedResponseError):
+        api.call_getItem(parameters={"id": 1})
+    assert len(app.requests) == 1
+
+    assert retry.stats() == {"getItem": {"calls": 3, "retries": 4, "attempts_exhausted": 1, "budget_exhausted": 0}}
+
+
+def test_retry_extension_and_budget(echo_api):
+    """
+    Tests that POST operations are only retried if they opt in with x-retry,
+    and that retries stop once the budget is spent
+    """
+    app = FlakyApp(1)
+    retry = RetryPolicy(backoff=0.001, budget_burst=1)
+    api = OpenAPI(echo_api, transport=WSGITransport(app), retry=retry)
+
+    with pytest.raises(UnexpectedResponseError):
+        api.call_createItem(data={"id": 1, "name": "new"})
+    assert len(app.requests) == 1
+
+    spec = copy.deepcopy(echo_api)
+    spec["paths"]["/items"]["post"]["x-retry"] = True
+    app = FlakyApp(1)
+    api = OpenAPI(spec, transport=WSGITransport(app), retry=retry)
+    assert api.call_createItem(data={"id": 1, "name": "new"}).name == "new"
+    assert len(app.requests) == 2
+
+    # that spent the only retry saved up
+    app = FlakyApp(1)
+    api = OpenAPI(spec, transport=WSGITransport(app), retry=retry)
+    with pytest.raises(UnexpectedResponseError):
+        api.call_createItem(data={"id": 1, "name": "new"})
+    assert retry.stats()["createItem"]["budget_exhausted"] == 1
+
+
+def test_circuit_breaker(with_servers):
+    """
+    Tests that a server's circuit opens after repeated failures, that calls then
+    fail over without trying it, and that it closes once the server recovers
+    """
+    transport = FailingTransport(SlowApp(delay=0), down=["items-a.example.com"])
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.1)
+    api = OpenAPI(with_servers, transport=transport, circuit_breaker=breaker)
+
+    for _ in range(2):
+        with pytest.raises(TransportError):
+            api.call_getItem(parameters={"id": 1})
+    assert breaker.stats()["https://items-a.example.com"]["state"] == "open"
+
+    # the open circuit fails fast without sending anything
+    with pytest.raises(CircuitOpenError):
+        api.call_getItem(parameters={"id": 1})
+    assert len(transport.hosts) == 2
+
+    # with a selector, the call fails over to the next server instead
+    api = OpenAPI(with_servers, transport=transport, circuit_breaker=breaker, server_selector=ServerSelector())
+    assert api.call_getItem(parameters={"id": 1}).id == 1
+    assert transport.hosts[2:] == ["items-b.example.com"]
+
+    # once the timeout passes, a probe is let through, and closes the circuit
+    transport.down.clear()
+    time.sleep(0.1)
+    api = OpenAPI(with_servers, transport=transport, circuit_breaker=breaker)
+
+    # a call that fails before it's sent says nothing about the server, so
+    # the probe is released without closing or reopening the circuit
+    with pytest.raises(ValueError):
+        api.call_getItem(parameters={})
+    assert breaker.stats()["https://items-a.example.com"]["state"] == "half-open"
+    assert len(transport.hosts) == 3
+
+    assert api.call_getItem(parameters={"id": 2}).id == 2
+    assert breaker.stats()["https://items-a.example.com"] == {"state": "closed", "failures": 0, "times_opened": 1}
+
+
+def test_circuit_breaker_timeouts(with_servers):
+    """
+    Tests that servers that time out count as failures, whichever transport
+    raised the timeout
+    """
+    transport = FailingTransport(SlowApp(delay=0), down=["items-a.example.com"], error=requests.exceptions.ReadTimeout)
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10)
+    api = OpenAPI(with_servers, transport=transport, circuit_breaker=breaker)
+
+    for _ in range(2):
+        with pytest.raises(requests.exceptions.ReadTimeout):
+            api.call_getItem(parameters={"id": 1})
+    assert breaker.stats()["https://items-a.example.com"]["state"] == "open"
+    with pytest.raises(CircuitOpenError):
+        api.call_getItem(parameters={"id": 1})
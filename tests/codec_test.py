@@ -0,0 +1,105 @@
+"""
+Tests encoding and decoding JSON with openapi3.codec
+"""
+import copy
+
+import pytest
+
+from openapi3 import OpenAPI
+from openapi3.codec import CODECS, JSONCodec, get_codec, model_to_dict
+from openapi3.transports import WSGITransport
+
+from api import echo
+
+
+@pytest.mark.parametrize("codec_type", CODECS)
+def test_codec_models(echo_api, codec_type):
+    """
+    Tests that each available codec encodes models, including models nested in
+    other data, without going through dicts first
+    """
+    api = OpenAPI(echo_api)
+    item_type = api.components.schemas["Item"]
+    item = item_type.model({"id": 1, "name": "one"})
+
+    codec = codec_type()
+    assert codec.loads(codec.dumps(item)) == {"id": 1, "name": "one"}
+    assert codec.loads(codec.dumps([item, {"id": 2}])) == [{"id": 1, "name": "one", "tags": None}, {"id": 2}]
+    assert codec.loads(codec.dumps({"name": "ünïcode"}).decode("utf-8")) == {"name": "ünïcode"}
+
+    with pytest.raises(TypeError):
+        codec.dumps({"value": object()})
+
+
+@pytest.mark.parametrize("codec_type", CODECS)
+def test_codec_nested_models(echo_api, codec_type, monkeypatch):
+    """
+    Tests that models, and the models nested in them, are written straight to
+    JSON without being copied into dicts first
+    """
+    spec = copy.deepcopy(echo_api)
+    spec["components"]["schemas"]["Item"]["properties"]["parts"] = {
+        "type": "array",
+        "items": {"type": "object", "properties": {"name": {"type": "string"}, "size": {"type": "integer"}}},
+    }
+    spec["components"]["schemas"]["Item"]["properties"]["meta"] = {
+        "type": "object",
+        "properties": {"class": {"type": "number"}},
+    }
+    api = OpenAPI(spec)
+    item = api.components.schemas["Item"].model(
+        {"id": 1, "name": "one", "parts": [{"name": "a"}, {"size": 2}], "meta": {"class": 1.5}}
+    )
+
+    def no_copies(model):
+        raise AssertionError("models must not be copied to be encoded")
+
+    monkeypatch.setattr("openapi3.schemas.Model.__iter__", no_copies)
+    codec = codec_type()
+    expected = {
+        "id": 1,
+        "name": "one",
+        "parts": [{"name": "a", "size": None}, {"name": None, "size": 2}],
+        "meta": {"class": 1.5},
+    }
+    assert codec.loads(codec.dumps(item)) == expected
+    assert codec.loads(codec.dumps({"items": [item, 2.5, "ü"], 3: None})) == {
+        "items": [dict(expected, tags=None), 2.5, "ü"],
+        "3": None,
+    }
+
+
+@pytest.mark.parametrize("codec_type", CODECS)
+def test_codec_calls(echo_api, codec_type):
+    """
+    Tests that calls send bodies and decode responses with the configured codec
+    """
+    api = OpenAPI(echo_api, transport=WSGITransport(echo.wsgi_app), codec=codec_type.name)
+    assert api._codec.name == codec_type.name
+
+    item = api.call_getItem(parameters={"id": 3})
+    assert item.tags == ["odd"]
+
+    created = api.call_createItem(data=item)
+    assert dict(created) == dict(item)
+
+
+def test_get_codec():
+    """
+    Tests that the fastest codec is the default, and that missing codecs are
+    reported
+    """
+    assert type(get_codec()) is CODECS[0]
+    assert type(get_codec("json")) is JSONCodec
+
+    with pytest.raises(ValueError, match="not available"):
+        get_codec("simplejson")
+
+
+def test_model_to_dict(echo_api):
+    """
+    Tests that None properties are left out of encoded models
+    """
+    api = OpenAPI(echo_api)
+    item = api.components.schemas["Item"].model({"id": 1, "name": "one"})
+    assert model_to_dict(item) == {"id": 1, "name": "one"}
@@ -0,0 +1,118 @@
+"""
+Tests compressing request bodies with openapi3.compression
+"""
+import copy
+import json
+import zlib
+
+import pytest
+
+from openapi3 import OpenAPI
+from openapi3.compression import CompressedBody, RequestCompression
+from openapi3.metrics import Metrics
+from openapi3.transports import WSGITransport
+
+
+class DecompressingApp:
+    """
+    A WSGI app echoing JSON bodies, decompressing them first if need be
+    """
+
+    def __init__(self):
+        self.environ = None
+        self.received = None
+
+    def __call__(self, environ, start_response):
+        self.environ = environ
+        if environ.get("CONTENT_LENGTH"):
+            self.received = environ["wsgi.input"].read(int(environ["CONTENT_LENGTH"]))
+        else:
+            self.received = environ["wsgi.input"].read()
+
+        body = self.received
+        if environ.get("HTTP_CONTENT_ENCODING"):
+            # accepts both gzip and zlib headers
+            body = zlib.decompress(body, 32 + zlib.MAX_WBITS)
+
+        status = "201 Created"
+        if environ["PATH_INFO"].startswith("/files/"):
+            status = "200 OK"
+            body = json.dumps({"id": len(body), "name": "file"}).encode()
+
+        start_response(status, [("Content-Type", "application/json")])
+        return [body]
+
+
+@pytest.mark.parametrize("encoding", ["gzip", "deflate"])
+def test_compression(echo_api, encoding):
+    """
+    Tests that bodies above the threshold are compressed, and smaller ones
+    aren't
+    """
+    app = DecompressingApp()
+    api = OpenAPI(echo_api, transport=WSGITransport(app), compression=RequestCompression(encoding, min_size=100))
+
+    item = api.call_createItem(data={"id": 1, "name": "small"})
+    assert item.name == "small"
+    assert "HTTP_CONTENT_ENCODING" not in app.environ
+
+    name = "large " * 1000
+    item = api.call_createItem(data={"id": 2, "name": name})
+    assert item.name == name
+    assert app.environ["HTTP_CONTENT_ENCODING"] == encoding
+    assert len(app.received) < 100
+    assert app.received[:2] == (b"\x1f\x8b" if encoding == "gzip" else b"\x78\x9c")
+
+
+def test_compression_extension(echo_api):
+    """
+    Tests that operations opt in and out of compression with x-compress
+    """
+    spec = copy.deepcopy(echo_api)
+    spec["paths"]["/items"]["post"]["x-compress"] = "deflate"
+    spec["paths"]["/files/{name}"]["put"]["x-compress"] = False
+
+    app = DecompressingApp()
+    api = OpenAPI(spec, transport=WSGITransport(app))
+    api.call_createItem(data={"id": 2, "name": "large " * 1000})
+    assert app.environ["HTTP_CONTENT_ENCODING"] == "deflate"
+
+    api = OpenAPI(spec, transport=WSGITransport(app), compression="gzip")
+    assert api.call_uploadFile(parameters={"name": "f"}, data=b"x" * 10000).id == 10000
+    assert "HTTP_CONTENT_ENCODING" not in app.environ
+
+    spec["paths"]["/files/{name}"]["put"]["x-compress"] = True
+    api = OpenAPI(spec, transport=WSGITransport(app))
+    chunks = (b"x" * 1000 for _ in range(10))
+    assert api.call_uploadFile(parameters={"name": "f"}, data=chunks).id == 10000
+    assert app.environ["HTTP_CONTENT_ENCODING"] == "gzip"
+
+
+def test_compression_metrics(echo_api):
+    """
+    Tests that the size of bodies before and after compression, and the time
+    spent compressing them, are recorded
+    """
+    metrics = Metrics()
+    api = OpenAPI(echo_api, transport=WSGITransport(DecompressingApp()), compression="gzip", metrics=metrics)
+    api.call_createItem(data={"id": 2, "name": "large " * 1000})
+
+    snapshot = metrics.snapshot()["createItem"]
+    sent = json.dumps({"id": 2, "name": "large " * 1000}, separators=(",", ":"))
+    assert snapshot["bytes_out_uncompressed"] == len(sent)
+    assert 0 < snapshot["bytes_out"] < snapshot["bytes_out_uncompressed"] / 50
+    assert snapshot["time"]["compress"] > 0
+    assert "openapi3_request_uncompressed_bytes_total" in metrics.prometheus()
+
+
+def test_compressed_body():
+    """
+    Tests that bodies held in memory can be compressed again, and that sizes
+    are counted
+    """
+    body = CompressedBody(b"abc" * 100000)
+    first = b"".join(body)
+    assert b"".join(body) == first
+    assert zlib.decompress(first, 16 + zlib.MAX_WBITS) == b"abc" * 100000
+    assert body.uncompressed_bytes == 300000
+    assert body.compressed_bytes == len(first)
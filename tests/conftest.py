@@ -250,3 +250,19 @@ def with_deeply_nested_allof():
     Provides a spec with a $ref under a schema defined in an allOf
     """
     yield _get_parsed_yaml("deeply-nested-allOf.yaml")
+
+
+@pytest.fixture
+def echo_api():
+    """
+    Provides a small spec used to test sending requests to a local server
+    """
+    yield _get_parsed_yaml("echo-api.yaml")
+
+
+@pytest.fixture
+def with_servers():
+    """
+    Provides a spec with servers declared on the root, a path and an operation
+    """
+    yield _get_parsed_yaml("with-servers.yaml")
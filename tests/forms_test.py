@@ -0,0 +1,159 @@
+"""
+Tests sending form bodies with openapi3.forms
+"""
+import copy
+import json
+from email.parser import BytesParser
+from urllib.parse import parse_qs
+
+import pytest
+
+from openapi3 import OpenAPI
+from openapi3.forms import FormEncoder, MultipartBody
+from openapi3.transports import WSGITransport
+
+
+def _form_spec(echo_api, media_type, encoding=None):
+    spec = copy.deepcopy(echo_api)
+    schema = {
+        "type": "object",
+        "properties": {
+            "name": {"type": "string"},
+            "count": {"type": "integer"},
+            "tags": {"type": "array", "items": {"type": "string"}},
+            "meta": {"type": "object"},
+            "file": {"type": "string", "format": "binary"},
+        },
+    }
+    content = {"schema": schema}
+    if encoding is not None:
+        content["encoding"] = encoding
+    spec["paths"]["/forms"] = {
+        "post": {
+            "operationId": "sendForm",
+            "requestBody": {"content": {media_type: content}},
+            "responses": {
+                "200": {
+                    "description": "the form as received",
+                    "content": {"application/json": {"schema": {"type": "object"}}},
+                },
+            },
+        }
+    }
+    return spec
+
+
+class FormApp:
+    """
+    A WSGI app recording the form it receives
+    """
+
+    def __init__(self):
+        self.environ = None
+        self.body = None
+
+    def __call__(self, environ, start_response):
+        self.environ = environ
+        if environ.get("CONTENT_LENGTH"):
+            self.body = environ["wsgi.input"].read(int(environ["CONTENT_LENGTH"]))
+        else:
+            self.body = environ["wsgi.input"].read()
+        start_response("200 OK", [("Content-Type", "application/json")])
+        return [b"{}"]
+
+    def parts(self):
+        """
+        Returns the parts of the multipart form received, by name
+        """
+        message = BytesParser().parsebytes(
+            "Content-Type: {}\r\n\r\n".format(self.environ["CONTENT_TYPE"]).encode() + self.body
+        )
+        assert message.is_multipart()
+        return [(c.get_param("name", header="content-disposition"), c) for c in message.get_payload()]
+
+
+def test_urlencoded_form(echo_api):
+    """
+    Tests that urlencoded forms follow the encoding's style and explode
+    """
+    app = FormApp()
+    spec = _form_spec(
+        echo_api,
+        "application/x-www-form-urlencoded",
+        {"tags": {"explode": False}, "meta": {"style": "deepObject"}},
+    )
+    api = OpenAPI(spec, transport=WSGITransport(app))
+    api.call_sendForm(data={"name": "a b&c", "count": 3, "tags": ["x", "y"], "meta": {"k": "v"}, "file": None})
+
+    assert app.environ["CONTENT_TYPE"] == "application/x-www-form-urlencoded"
+    assert parse_qs(app.body.decode()) == {"name": ["a b&c"], "count": ["3"], "tags": ["x,y"], "meta[k]": ["v"]}
+
+    api.call_sendForm(data={"tags": ["x", "y"], "meta": {"k": "v"}, "other": True})
+    assert app.body == b"tags=x%2Cy&meta%5Bk%5D=v&other=true"
+
+
+def test_multipart_form(echo_api, tmp_path):
+    """
+    Tests that multipart forms are sent a part per field, with files streamed
+    from disk and their size known up front
+    """
+    content = bytes(range(256)) * 1000
+    path = tmp_path / "upload.bin"
+    path.write_bytes(content)
+
+    app = FormApp()
+    spec = _form_spec(echo_api, "multipart/form-data", {"name": {"contentType": "text/plain; charset=utf-8"}})
+    api = OpenAPI(spec, transport=WSGITransport(app))
+
+    with path.open("rb") as f:
+        data = {
+            "name": "ïtem",
+            "count": 3,
+            "tags": ["x", "y"],
+            "meta": {"k": "v"},
+            "file": f,
+            "extra": ("a.txt", b"b"),
+        }
+        api.call_sendForm(data=data)
+
+    assert app.environ["CONTENT_TYPE"].startswith("multipart/form-data; boundary=")
+    assert int(app.environ["CONTENT_LENGTH"]) == len(app.body)
+
+    parts = app.parts()
+    assert [c[0] for c in parts] == ["name", "count", "tags", "tags", "meta", "file", "extra"]
+    name, count, tag_x, tag_y, meta, upload, extra = [c[1] for c in parts]
+    assert name.get_content_type() == "text/plain"
+    assert name.get_payload(decode=True).decode() == "ïtem"
+    assert count.get_payload(decode=True) == b"3"
+    assert [tag_x.get_payload(), tag_y.get_payload()] == ["x", "y"]
+    assert meta.get_content_type() == "application/json"
+    assert json.loads(meta.get_payload()) == {"k": "v"}
+    assert upload.get_content_type() == "application/octet-stream"
+    assert upload.get_filename() == "upload.bin"
+    assert upload.get_payload(decode=True) == content
+    assert extra.get_filename() == "a.txt"
+    assert extra.get_payload(decode=True) == b"b"
+
+
+def test_multipart_body_replay(echo_api, tmp_path):
+    """
+    Tests that multipart bodies can be sent more than once, and that the
+    boundary and headers are only worked out once per operation
+    """
+    path = tmp_path / "upload.bin"
+    path.write_bytes(b"contents")
+
+    spec = _form_spec(echo_api, "multipart/form-data")
+    api = OpenAPI(spec)
+    operation = api._operation_map["sendForm"]
+    encoder = FormEncoder("multipart/form-data", operation.requestBody.content["multipart/form-data"])
+
+    with path.open("rb") as f:
+        body = encoder.encode({"file": f, "name": "n"}, api._codec)
+        assert isinstance(body, MultipartBody)
+        first = b"".join(body)
+        assert b"".join(body) == first
+        assert body.len == len(first)
+
+    body = encoder.encode({"file": iter([b"a"])}, api._codec)
+    assert b"".join(body).count(encoder.boundary.encode()) == 2
@@ -0,0 +1,116 @@
+"""
+Tests generating values matching schemas with Schema.generate
+"""
+import random
+import re
+
+import pytest
+
+from openapi3 import OpenAPI
+from openapi3.generation import SchemaGenerator
+from openapi3.validation import SchemaCompiler
+
+
+@pytest.mark.parametrize(
+    "schema",
+    [
+        {"type": "integer", "minimum": 3, "maximum": 7},
+        {"type": "integer", "minimum": 0, "maximum": 100, "exclusiveMinimum": True, "multipleOf": 5},
+        {"type": "number", "maximum": -1.5},
+        {"type": "string", "minLength": 2, "maxLength": 4},
+        {"type": "string", "pattern": r"^[A-Z]{2}-\d{3,5}(x|yz)?$"},
+        {"type": "string", "pattern": r"\w+@[^@\s]+\.(com|org)"},
+        {"type": "string", "enum": ["red", "green"]},
+        {"type": "string", "format": "uuid"},
+        {"type": "string", "format": "date"},
+        {"type": "boolean", "nullable": True},
+        {"type": "array", "items": {"type": "integer", "maximum": 3}, "minItems": 2, "uniqueItems": True},
+        {"type": "array", "items": {"$ref": "#/components/schemas/Item"}},
+        {
+            "allOf": [
+                {"$ref": "#/components/schemas/Item"},
+                {"required": ["code"], "properties": {"code": {"type": "integer"}}},
+            ]
+        },
+        {"oneOf": [{"type": "integer"}, {"$ref": "#/components/schemas/Error"}]},
+    ],
+)
+def test_generate(echo_api, schema):
+    """
+    Tests that generated values are valid for their schemas
+    """
+    api = OpenAPI(echo_api)
+    validate = SchemaCompiler(api).compile(schema)
+    generate = SchemaGenerator(api).compile(schema)
+
+    rng = random.Random(1)
+    for _ in range(200):
+        value = generate(rng)
+        validate(value, ("value",))
+        if "pattern" in schema:
+            assert re.search(schema["pattern"], value)
+
+
+@pytest.mark.parametrize(
+    "schema",
+    [
+        {"type": "string", "pattern": r"^[A-Z]{2}-\d+$", "maxLength": 5},
+        {"type": "string", "pattern": r"^[a-z]+$", "minLength": 6, "maxLength": 7},
+        {"type": "string", "pattern": r"^(ab|c)*$", "minLength": 3},
+    ],
+)
+def test_generate_pattern_length(echo_api, schema):
+    """
+    Tests that strings generated from patterns are within their schemas'
+    length limits too
+    """
+    api = OpenAPI(echo_api)
+    validate = SchemaCompiler(api).compile(schema)
+    generate = SchemaGenerator(api).compile(schema)
+
+    rng = random.Random(1)
+    for _ in range(2000):
+        validate(generate(rng), ("value",))
+
+
+def test_generate_schema(echo_api):
+    """
+    Tests Schema.generate, that it's repeatable given a seed, and that the
+    values it generates can be made into models
+    """
+    item = OpenAPI(echo_api).components.schemas["Item"]
+
+    values = item.generate(100, seed=7)
+    assert len(values) == 100
+    assert item.generate(100, seed=7) == values
+    assert item.generate(100, seed=8) != values
+
+    for value in values:
+        model = item.model(value)
+        assert (model.id, model.name) == (value["id"], value["name"])
+        assert model.tags == value.get("tags")
+
+    # optional properties are sometimes left out
+    assert any("tags" in c for c in values) and not all("tags" in c for c in values)
+
+
+def test_generate_recursive(echo_api):
+    """
+    Tests that schemas referring to themselves generate values nested to a
+    limited depth
+    """
+    node = {"type": "object", "required": ["name"], "properties": {"name": {"type": "string"}}}
+    node["properties"]["children"] = {"type": "array", "items": node}
+
+    api = OpenAPI(echo_api)
+    validate = SchemaCompiler(api).compile(node)
+    generate = SchemaGenerator(api).compile(node)
+
+    def depth(value):
+        return 1 + max((depth(c) for c in value.get("children", [])), default=0)
+
+    rng = random.Random(1)
+    values = [generate(rng) for _ in range(100)]
+    for value in values:
+        validate(value, ("value",))
+    assert max(depth(c) for c in values) == 4
@@ -0,0 +1,107 @@
+"""
+Tests load testing operations with openapi3.loadtest, against the mock server
+"""
+import copy
+import json
+import subprocess
+import sys
+
+import pytest
+
+from openapi3 import OpenAPI
+from openapi3.loadtest import LoadTest, override_servers, parse_duration
+from openapi3.mock import MockServer
+
+
+@pytest.fixture
+def mock_url(echo_api):
+    """
+    Provides the URL of a mock server for the echo API, failing half of the
+    calls to createItem
+    """
+    server = MockServer(OpenAPI(echo_api), per_operation={"createItem": {"error_rate": 0.5}}, seed=1)
+    yield server.start()
+    server.stop()
+
+
+def test_load_test(echo_api, mock_url):
+    """
+    Tests that calls are counted, timed and broken down by how they ended
+    """
+    spec = copy.deepcopy(echo_api)
+    spec["servers"] = [{"url": mock_url}]
+
+    result = LoadTest(OpenAPI(spec), "getItem", concurrency=4, duration=0.3, parameters={"id": 1}).run()
+    assert result["calls"] > 4
+    assert result["statuses"] == {200: result["calls"]}
+    assert result["errors"] == {}
+    assert result["throughput"] == pytest.approx(result["calls"] / result["duration"])
+    latency = result["latency"]
+    assert latency["min"] <= latency["p50"] <= latency["p90"] <= latency["p99"] <= latency["p999"] <= latency["max"]
+    assert result["cpu_per_call"] > 0
+
+    result = LoadTest(OpenAPI(spec), "createItem", concurrency=2, duration=0.3, data={"id": 1, "name": "x"}).run()
+    assert set(result["statuses"]) == {201, 500}
+    assert result["errors"] == {500: result["statuses"][500]}
+
+    # calls that fail without a response are counted by their exception
+    spec["servers"] = [{"url": "http://127.0.0.1:1"}]
+    result = LoadTest(OpenAPI(spec), "listItems", duration=0.1).run()
+    assert result["statuses"] == {}
+    assert list(result["errors"]) == ["ConnectionError"]
+
+
+@pytest.mark.parametrize("value,seconds", [("60s", 60), ("500ms", 0.5), ("2m", 120), ("1.5", 1.5)])
+def test_parse_duration(value, seconds):
+    """
+    Tests parsing durations given on the command line
+    """
+    assert parse_duration(value) == seconds
+
+
+def test_load_test_cli(mock_url):
+    """
+    Tests running a load test from the command line
+    """
+    output = subprocess.run(
+        [
+            sys.executable,
+            "-m",
+            "openapi3",
+            "loadtest",
+            "tests/fixtures/echo-api.yaml",
+            "--op",
+            "getItem",
+            "--params",
+            '{"id": 3}',
+            "--concurrency",
+            "2",
+            "--duration",
+            "200ms",
+            "--server",
+            mock_url,
+            "--transport",
+            "http.client",
+            "--json",
+        ],
+        check=True,
+        capture_output=True,
+    ).stdout
+    result = json.loads(output)
+    assert result["calls"] > 0
+    assert result["statuses"] == {"200": result["calls"]}
+
+
+def test_override_servers(echo_api, mock_url):
+    """
+    Tests that the server given on the command line replaces servers declared
+    on paths and operations too
+    """
+    spec = copy.deepcopy(echo_api)
+    spec["paths"]["/items"]["servers"] = [{"url": "http://127.0.0.1:1/path"}]
+    spec["paths"]["/items/{id}"]["get"]["servers"] = [{"url": "http://127.0.0.1:1/operation"}]
+    override_servers(spec, mock_url)
+
+    api = OpenAPI(spec)
+    assert len(api.call_listItems()) > 0
+    assert api.call_getItem(parameters={"id": 1}).id is not None
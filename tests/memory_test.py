@@ -0,0 +1,51 @@
+"""
+Tests reporting the memory held by a parsed spec with OpenAPI.memory_report
+"""
+import copy
+
+from openapi3 import OpenAPI
+
+
+def test_memory_report(petstore_expanded):
+    """
+    Tests that a spec's memory is broken down by type and by subtree
+    """
+    api = OpenAPI(petstore_expanded)
+    report = api.memory_report(top=3)
+
+    objects = report["objects"]
+    assert objects["Schema"]["count"] > len(api.components.schemas)
+    assert objects["ReferenceProxy"]["count"] == objects["Reference"]["count"] > 0
+    assert objects["Map"]["bytes"] > 0
+    assert report["raw_element"]["bytes"] > 0
+    assert report["models"] == {"count": 0, "bytes": 0}
+
+    # every object is counted once
+    counted = sum(c["bytes"] for c in objects.values()) + report["raw_element"]["bytes"]
+    assert counted == report["total"]
+
+    subtrees = report["subtrees"]
+    assert [c["pointer"] for c in subtrees] == ["#/paths", "#/paths/~1pets", "#/paths/~1pets/get"]
+    assert report["total"] > subtrees[0]["bytes"] > subtrees[1]["bytes"] > subtrees[2]["bytes"]
+
+    # generated model types are counted once they exist
+    api.components.schemas["Pet"].model({"name": "dog", "id": 1})
+    report = api.memory_report()
+    assert report["models"]["count"] == 1
+    assert report["total"] == counted + report["models"]["bytes"]
+
+
+def test_memory_report_grows(petstore_expanded):
+    """
+    Tests that larger specs report more memory
+    """
+    spec = copy.deepcopy(petstore_expanded)
+    for i in range(20):
+        spec["paths"]["/pets{}".format(i)] = copy.deepcopy(spec["paths"]["/pets"])
+        for operation in ("get", "post"):
+            spec["paths"]["/pets{}".format(i)][operation]["operationId"] += str(i)
+
+    small = OpenAPI(petstore_expanded).memory_report()
+    large = OpenAPI(spec).memory_report()
+    assert large["total"] > small["total"] * 5
+    assert large["objects"]["Operation"]["count"] == small["objects"]["Operation"]["count"] + 40
@@ -0,0 +1,106 @@
+"""
+Tests the hooks and metrics in openapi3.hooks and openapi3.metrics
+"""
+import copy
+
+import pytest
+
+from openapi3 import OpenAPI, UnexpectedResponseError
+from openapi3.cache import ResponseCache
+from openapi3.metrics import Metrics
+from openapi3.transports import WSGITransport
+
+from api import echo
+
+
+def test_hooks(echo_api):
+    """
+    Tests that hooks are called in order as calls progress, and when they fail
+    """
+    spec = copy.deepcopy(echo_api)
+    del spec["paths"]["/items/{id}"]["get"]["responses"]["404"]
+
+    api = OpenAPI(spec, transport=WSGITransport(echo.wsgi_app))
+    events = []
+
+    @api.on_request_start
+    def request_start(operation, request):
+        events.append(("request_start", operation.operationId, request.url))
+
+    api.on_response(lambda operation, request, response: events.append(("response", response.status_code)))
+    api.on_model_built(lambda operation, model: events.append(("model_built", model.id)))
+    api.on_error(lambda operation, request, error: events.append(("error", type(error))))
+
+    assert api.call_getItem(parameters={"id": 1}).id == 1
+    assert events == [
+        ("request_start", "getItem", "http://localhost/items/1"),
+        ("response", 200),
+        ("model_built", 1),
+    ]
+
+    events.clear()
+    with pytest.raises(UnexpectedResponseError):
+        api.call_getItem(parameters={"id": 100})
+    assert events == [
+        ("request_start", "getItem", "http://localhost/items/100"),
+        ("response", 404),
+        ("error", UnexpectedResponseError),
+    ]
+
+    with pytest.raises(ValueError, match="Unknown event"):
+        api._add_hook("request_end", print)
+
+
+def test_metrics(echo_api):
+    """
+    Tests that calls are counted, timed and sized per operation, and exported
+    """
+    metrics = Metrics(buckets=(0.5, 10))
+    api = OpenAPI(echo_api, transport=WSGITransport(echo.wsgi_app), metrics=metrics)
+
+    api.call_getItem(parameters={"id": 1})
+    api.call_getItem(parameters={"id": 100})
+    api.call_createItem(data={"id": 99, "name": "new"})
+
+    snapshot = metrics.snapshot()
+    get_item = snapshot["getItem"]
+    assert get_item["calls"] == 2
+    assert get_item["errors"] == 0
+    assert get_item["statuses"] == {200: 1, 404: 1}
+    assert get_item["latency"]["buckets"] == {0.5: 2, 10: 0, float("inf"): 0}
+    assert get_item["bytes_out"] == 0
+    assert get_item["bytes_in"] > 0
+    assert all(get_item["time"][c] > 0 for c in ("network", "decode", "model"))
+    assert get_item["latency"]["sum"] >= sum(get_item["time"].values())
+
+    assert snapshot["createItem"]["bytes_out"] == len(b'{"id":99,"name":"new"}')
+
+    text = metrics.prometheus()
+    assert 'openapi3_calls_total{operation="getItem"} 2' in text
+    assert 'openapi3_call_duration_seconds_bucket{operation="getItem",le="10.0"} 2' in text
+    assert 'openapi3_call_duration_seconds_bucket{operation="getItem",le="+Inf"} 2' in text
+    assert 'openapi3_responses_total{operation="getItem",status="404"} 1' in text
+    assert "# TYPE openapi3_call_duration_seconds histogram" in text
+
+    metrics.reset()
+    assert metrics.snapshot() == {}
+
+
+def test_metrics_cached(echo_api):
+    """
+    Tests that calls answered from the cache are counted, without a status
+    """
+
+    def app(environ, start_response):
+        start_response("200 OK", [("Content-Type", "application/json"), ("Cache-Control", "max-age=60")])
+        return [b'{"id": 1, "name": "cached"}']
+
+    metrics = Metrics()
+    api = OpenAPI(echo_api, transport=WSGITransport(app), cache=ResponseCache(), metrics=metrics)
+    api.call_getItem(parameters={"id": 1})
+    api.call_getItem(parameters={"id": 1})
+
+    get_item = metrics.snapshot()["getItem"]
+    assert get_item["calls"] == 2
+    assert get_item["cached"] == 1
+    assert get_item["statuses"] == {200: 1}
@@ -0,0 +1,261 @@
+"""
+Tests validating the requests an application receives, and its responses,
+with openapi3.middleware
+"""
+import asyncio
+import copy
+import io
+
+import pytest
+import requests
+
+from openapi3 import OpenAPI
+from openapi3.errors import UnexpectedResponseError
+from openapi3.middleware import ASGIValidationMiddleware, WSGIValidationMiddleware
+from openapi3.transports import ASGITransport, WSGITransport
+
+from api import echo
+from api.main import app
+
+
+def _send(transport, method, path, **kwargs):
+    return transport.send(requests.Request(method, "http://localhost" + path, **kwargs).prepare())
+
+
+@pytest.fixture
+def wsgi(echo_api):
+    """
+    Provides the echo API behind the validation middleware, and a client
+    calling it without validating its own requests
+    """
+    middleware = WSGIValidationMiddleware(echo.wsgi_app, OpenAPI(echo_api), response_sample_rate=1)
+    yield middleware, OpenAPI(echo_api, transport=WSGITransport(middleware))
+
+
+def test_wsgi_valid_requests(wsgi):
+    """
+    Tests that valid requests reach the application
+    """
+    middleware, api = wsgi
+    assert api.call_getItem(parameters={"id": 3}).name == "item 3"
+    assert len(api.call_listItems(parameters={"limit": 2})) == 2
+    assert api.call_createItem(data={"id": 11, "name": "new"}).name == "new"
+    assert middleware.stats()["getItem"] == {
+        "requests": 1,
+        "invalid_requests": 0,
+        "responses_validated": 1,
+        "invalid_responses": 0,
+    }
+
+
+@pytest.mark.parametrize(
+    "operation,kwargs,path",
+    [
+        ("getItem", {"parameters": {"id": "three"}}, "parameters.id"),
+        ("listItems", {"parameters": {"limit": "many"}}, "parameters.limit"),
+        ("createItem", {"data": {"id": 1}}, "data.name"),
+        ("createItem", {"data": {"id": "1", "name": "new"}}, "data.id"),
+        ("createItem", {"data": [1, 2]}, "data"),
+    ],
+)
+def test_wsgi_invalid_requests(wsgi, operation, kwargs, path):
+    """
+    Tests that invalid requests are answered with a 400 before they reach the
+    application
+    """
+    middleware, api = wsgi
+    with pytest.raises(UnexpectedResponseError) as e:
+        getattr(api, "call_" + operation)(**kwargs)
+    assert e.value.status_code == 400
+    assert e.value.response.json()["path"] == path
+    assert middleware.stats()[operation]["invalid_requests"] == 1
+
+
+def test_wsgi_request_details(echo_api):
+    """
+    Tests that bodies are handed on to the application, that requests to
+    unknown paths pass through, and that the operation and its parameters are
+    provided to the application
+    """
+    seen = {}
+
+    def app(environ, start_response):
+        seen["operation"] = environ.get("openapi3.operation")
+        seen["parameters"] = environ.get("openapi3.parameters")
+        return echo.wsgi_app(environ, start_response)
+
+    transport = WSGITransport(WSGIValidationMiddleware(app, OpenAPI(echo_api)))
+    api = OpenAPI(echo_api, transport=transport)
+
+    assert api.call_createItem(data={"id": 12, "name": "body"}).id == 12
+    assert seen["operation"].operationId == "createItem"
+
+    api.call_getItem(parameters={"id": 4})
+    assert seen["parameters"] == {"id": 4}
+
+    # binary uploads aren't read as JSON, and path parameters are decoded once
+    assert api.call_uploadFile(parameters={"name": "a%2Fb.bin"}, data=b"12345").id == 5
+    assert seen["parameters"] == {"name": "a%2Fb.bin"}
+
+    r = _send(transport, "POST", "/items", data=b"{", headers={"Content-Type": "application/json"})
+    assert r.status_code == 400
+    assert r.json() == {"message": "is not valid JSON", "path": "data"}
+
+    r = _send(transport, "POST", "/items", data=b"a=b", headers={"Content-Type": "text/plain"})
+    assert r.status_code == 400
+    assert r.json()["message"].startswith("unsupported Content-Type text/plain")
+
+    r = _send(transport, "POST", "/items")
+    assert r.status_code == 400
+    assert r.json()["message"] == "a request body is required"
+
+    r = _send(transport, "GET", "/unknown")
+    assert r.status_code == 404
+    assert seen["operation"] is None
+
+
+def test_uploads_not_buffered(echo_api):
+    """
+    Tests that bodies that aren't validated as JSON are handed to the
+    application without being read, and that a required body is still found
+    missing
+    """
+    seen = []
+
+    def wsgi_app(environ, start_response):
+        seen.append(environ["wsgi.input"])
+        start_response("200 OK", [("Content-Type", "application/json")])
+        return [b'{"id": 5, "name": "file"}']
+
+    middleware = WSGIValidationMiddleware(wsgi_app, OpenAPI(echo_api))
+    body = io.BytesIO(b"12345")
+    environ = {
+        "REQUEST_METHOD": "PUT",
+        "PATH_INFO": "/files/a.bin",
+        "CONTENT_TYPE": "application/octet-stream",
+        "CONTENT_LENGTH": "5",
+        "wsgi.input": body,
+    }
+    middleware(environ, lambda status, headers: None)
+    assert seen == [body]
+    assert body.tell() == 0
+
+    statuses = []
+    environ = dict(environ, CONTENT_LENGTH="0", **{"wsgi.input": io.BytesIO()})
+    middleware(environ, lambda status, headers: statuses.append(status))
+    assert statuses == ["400 Bad Request"]
+
+    received = []
+
+    async def asgi_app(scope, receive, send):
+        received.append(await receive())
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+
+    async def call(messages):
+        statuses = []
+
+        async def receive():
+            return messages.pop(0)
+
+        async def send(message):
+            if message["type"] == "http.response.start":
+                statuses.append(message["status"])
+
+        scope = {
+            "type": "http",
+            "method": "PUT",
+            "path": "/files/a.bin",
+            "headers": [(b"content-type", b"application/octet-stream")],
+        }
+        await ASGIValidationMiddleware(asgi_app, OpenAPI(echo_api))(scope, receive, send)
+        return statuses
+
+    # only the first message is received before the application is called
+    messages = [
+        {"type": "http.request", "body": b"123", "more_body": True},
+        {"type": "http.request", "body": b"45", "more_body": False},
+    ]
+    assert asyncio.run(call(messages)) == [200]
+    assert received == [{"type": "http.request", "body": b"123", "more_body": True}]
+    assert len(messages) == 1
+
+    assert asyncio.run(call([{"type": "http.request", "body": b"", "more_body": False}])) == [400]
+
+
+def test_response_validation(echo_api):
+    """
+    Tests that sampled responses are validated, and errors in them reported
+    without changing the response
+    """
+    errors = []
+
+    def app(environ, start_response):
+        if environ["PATH_INFO"] == "/items/1":
+            start_response("200 OK", [("Content-Type", "application/json")])
+            return [b'{"id": "one", ', b'"name": "item 1"}']
+        if environ["PATH_INFO"] == "/items/2":
+            start_response("500 Internal Server Error", [("Content-Type", "application/json")])
+            return [b"{}"]
+        return echo.wsgi_app(environ, start_response)
+
+    middleware = WSGIValidationMiddleware(
+        app, OpenAPI(echo_api), response_sample_rate=1, on_response_error=lambda op, e: errors.append(e)
+    )
+    transport = WSGITransport(middleware)
+
+    assert _send(transport, "GET", "/items/0").status_code == 200
+    assert errors == []
+
+    r = _send(transport, "GET", "/items/1")
+    assert r.json() == {"id": "one", "name": "item 1"}
+    assert [(c.path, c.message) for c in errors] == [("response.id", "expected integer, got str")]
+
+    _send(transport, "GET", "/items/2")
+    assert errors[-1].message.startswith("undocumented status 500")
+    assert middleware.stats()["getItem"]["invalid_responses"] == 2
+
+    # responses aren't validated unless they're sampled
+    middleware.response_sample_rate = 0
+    _send(transport, "GET", "/items/1")
+    assert len(errors) == 2
+    assert middleware.stats()["getItem"]["responses_validated"] == 3
+
+
+def test_asgi_middleware():
+    """
+    Tests validating requests to and responses from the FastAPI app in the api
+    package
+    """
+    spec = copy.deepcopy(app.openapi())
+    spec["servers"][0]["url"] = "http://testserver"
+
+    errors = []
+    middleware = ASGIValidationMiddleware(
+        app, OpenAPI(spec), response_sample_rate=1, on_response_error=lambda op, e: errors.append(e)
+    )
+    transport = ASGITransport(middleware)
+    api = OpenAPI(spec, transport=transport)
+
+    pet = api.call_createPet(data={"pet": {"name": "asgi-middleware", "tag": "cat"}})
+    assert api.call_getPet(parameters={"pet_id": pet.id}).id == pet.id
+
+    with pytest.raises(UnexpectedResponseError) as e:
+        api.call_getPet(parameters={"pet_id": "one"})
+    assert e.value.status_code == 400
+    assert e.value.response.json()["path"] == "parameters.pet_id"
+
+    with pytest.raises(UnexpectedResponseError) as e:
+        api.call_createPet(data={"pet": {"tag": "no name"}})
+    assert e.value.status_code == 400
+    assert e.value.response.json()["path"] == "data.pet.name"
+    assert errors == []
+
+    # the app answers -2 with an undocumented 204
+    with pytest.raises(UnexpectedResponseError):
+        api.call_getPet(parameters={"pet_id": -2})
+    assert errors[0].message.startswith("undocumented status 204")
+
+    api.call_deletePet(parameters={"pet_id": pet.id})
+    assert middleware.stats()["getPet"]["invalid_requests"] == 1
+    transport.close()
@@ -0,0 +1,190 @@
+"""
+Tests serving a spec with openapi3.mock
+"""
+import copy
+import socket
+import subprocess
+import sys
+import time
+
+import pytest
+
+from openapi3 import OpenAPI
+from openapi3.errors import UnexpectedResponseError
+from openapi3.mock import MockServer, example_value
+
+
+@pytest.fixture
+def mock_api(echo_api):
+    """
+    Provides the echo API served by a mock server with examples for some of
+    its operations, and a client calling it
+    """
+    spec = copy.deepcopy(echo_api)
+    content = spec["paths"]["/items/{id}"]["get"]["responses"]["200"]["content"]["application/json"]
+    content["examples"] = {
+        "first": {"value": {"id": 1, "name": "first"}},
+        "second": {"value": {"id": 2, "name": "second"}},
+    }
+    content = spec["paths"]["/files/{name}"]["get"]["responses"]["200"]["content"]["application/octet-stream"]
+    content["example"] = "file contents"
+
+    server = MockServer(OpenAPI(spec), per_operation={"createItem": {"latency": 0.2, "error_rate": 1}}, seed=1)
+    spec["servers"] = [{"url": server.start()}]
+    yield server, OpenAPI(spec)
+    server.stop()
+
+
+def test_mock_responses(mock_api):
+    """
+    Tests that operations are answered with their examples, or values
+    generated from their schemas
+    """
+    server, api = mock_api
+
+    items = api.call_listItems()
+    assert len(items) == 1
+    assert (items[0].id, items[0].name, items[0].tags) == (0, "string", ["string"])
+
+    # examples are cycled through
+    names = [api.call_getItem(parameters={"id": 1}).name for _ in range(3)]
+    assert names == ["second", "first", "second"]
+
+    assert api.call_downloadFile(parameters={"name": "x"}) == b"file contents"
+
+    # bodies are read and discarded, whether sent with a length or chunked
+    assert api.call_uploadFile(parameters={"name": "x"}, data=b"abc").id == 0
+    assert api.call_uploadFile(parameters={"name": "x"}, data=iter([b"a" * 10, b"b" * 100000])).id == 0
+
+    assert server.stats()["getItem"] == {"requests": 3, "errors": 0}
+
+
+def test_mock_latency_and_errors(mock_api):
+    """
+    Tests injecting latency and errors into an operation
+    """
+    server, api = mock_api
+
+    start = time.perf_counter()
+    with pytest.raises(UnexpectedResponseError) as e:
+        api.call_createItem(data={"id": 1, "name": "new"})
+    assert time.perf_counter() - start >= 0.2
+    assert e.value.status_code == 500
+    assert server.stats()["createItem"] == {"requests": 1, "errors": 1}
+
+    # other operations aren't affected
+    start = time.perf_counter()
+    api.call_listItems()
+    assert time.perf_counter() - start < 0.2
+
+
+def test_mock_connections(mock_api):
+    """
+    Tests pipelined requests, HEAD requests, unknown paths and closing
+    connections
+    """
+    server, api = mock_api
+    host, port = api.servers[0].url[len("http://") :].split(":")
+
+    with socket.create_connection((host, int(port))) as s:
+        s.sendall(
+            b"POST /items HTTP/1.1\r\nContent-Length: 2\r\n\r\n{}"
+            b"HEAD /items HTTP/1.1\r\n\r\n"
+            b"GET /nothing HTTP/1.1\r\nConnection: close\r\n\r\n"
+        )
+        received = b""
+        while True:
+            chunk = s.recv(65536)
+            if not chunk:
+                break
+            received += chunk
+
+    # the delayed response to the first request is still sent first
+    statuses = [c.split(b"\r\n", 1)[0] for c in received.split(b"HTTP/1.1 ")[1:]]
+    assert statuses == [b"500 Internal Server Error", b"200 OK", b"404 Not Found"]
+    assert b"Connection: close" in received
+
+
+@pytest.mark.parametrize(
+    "schema,value",
+    [
+        ({"type": "string", "format": "date-time"}, "2024-01-01T00:00:00Z"),
+        ({"type": "string", "minLength": 10}, "stringxxxx"),
+        ({"type": "string", "maxLength": 3}, "str"),
+        ({"type": "integer", "minimum": 5}, 5),
+        ({"type": "number", "minimum": 5, "exclusiveMinimum": True}, 6.0),
+        ({"type": "array", "items": {"type": "boolean"}, "minItems": 2}, [True, True]),
+        ({"type": "string", "enum": ["b", "a"]}, "b"),
+        ({"type": "integer", "example": 42}, 42),
+        (
+            {"allOf": [{"$ref": "#/components/schemas/Error"}, {"properties": {"code": {"type": "integer"}}}]},
+            {"message": "string", "code": 0},
+        ),
+        ({"oneOf": [{"type": "boolean"}, {"type": "string"}]}, True),
+    ],
+)
+def test_example_value(echo_api, schema, value):
+    """
+    Tests the values generated for schemas without examples
+    """
+    assert example_value(OpenAPI(echo_api), schema) == value
+
+
+def test_mock_cli(tmp_path):
+    """
+    Tests running the mock server from the command line
+    """
+    spec = tmp_path / "spec.yaml"
+    spec.write_text(
+        "openapi: 3.0.0\n"
+        "info: {title: Mock, version: 1.0.0}\n"
+        "paths:\n"
+        "  /ping:\n"
+        "    get:\n"
+        "      operationId: ping\n"
+        "      responses:\n"
+        "        '200':\n"
+        "          description: pong\n"
+        "          content: {application/json: {example: {pong: true}}}\n"
+    )
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+
+    process = subprocess.Popen(
+        [sys.executable, "-m", "openapi3", "mock", str(spec), "--port", str(port), "--latency", "ping=0.01"],
+        stderr=subprocess.PIPE,
+    )
+    try:
+        process.stderr.readline()
+        for _ in range(50):
+            try:
+                with socket.create_connection(("127.0.0.1", port)) as s:
+                    s.sendall(b"GET /ping HTTP/1.1\r\nConnection: close\r\n\r\n")
+                    response = s.makefile("rb").read()
+                break
+            except ConnectionRefusedError:
+                time.sleep(0.1)
+        assert response.endswith(b'{"pong":true}')
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def test_mock_samples(echo_api):
+    """
+    Tests answering operations without examples with generated samples
+    """
+    server = MockServer(OpenAPI(echo_api), samples=5, seed=3)
+    spec = dict(echo_api, servers=[{"url": server.start()}])
+    api = OpenAPI(spec)
+    try:
+        items = [api.call_getItem(parameters={"id": 1}) for _ in range(10)]
+    finally:
+        server.stop()
+
+    # the samples are valid, and cycled through
+    ids = [c.id for c in items]
+    assert all(isinstance(c.id, int) and isinstance(c.name, str) for c in items)
+    assert len(set(ids)) > 1
+    assert ids[:5] == ids[5:]
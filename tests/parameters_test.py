@@ -0,0 +1,180 @@
+"""
+Tests serializing and deserializing parameters with openapi3.parameters
+"""
+import copy
+
+import pytest
+
+from openapi3 import OpenAPI, SpecError
+from openapi3.parameters import ParameterCodec, parse_query
+from openapi3.transports import WSGITransport
+
+PRIMITIVE = "blue"
+ARRAY = ["blue", "black", "brown"]
+OBJECT = {"R": 100, "G": 200, "B": 150}
+
+# the examples from the style table in the OpenAPI specification
+PATH_EXAMPLES = [
+    ("simple", False, "blue", "blue,black,brown", "R,100,G,200,B,150"),
+    ("simple", True, "blue", "blue,black,brown", "R=100,G=200,B=150"),
+    ("label", False, ".blue", ".blue,black,brown", ".R,100,G,200,B,150"),
+    ("label", True, ".blue", ".blue.black.brown", ".R=100.G=200.B=150"),
+    ("matrix", False, ";color=blue", ";color=blue,black,brown", ";color=R,100,G,200,B,150"),
+    ("matrix", True, ";color=blue", ";color=blue;color=black;color=brown", ";R=100;G=200;B=150"),
+]
+
+QUERY_EXAMPLES = [
+    ("form", False, "color=blue", "color=blue,black,brown", "color=R,100,G,200,B,150"),
+    ("form", True, "color=blue", "color=blue&color=black&color=brown", "R=100&G=200&B=150"),
+    ("spaceDelimited", False, None, "color=blue%20black%20brown", "color=R%20100%20G%20200%20B%20150"),
+    ("pipeDelimited", False, None, "color=blue%7Cblack%7Cbrown", "color=R%7C100%7CG%7C200%7CB%7C150"),
+    ("deepObject", True, None, None, "color[R]=100&color[G]=200&color[B]=150"),
+]
+
+
+class _Schema:
+    """
+    Just enough of a Schema to deserialize against
+    """
+
+    def __init__(self, type, items=None, properties=None):
+        self.type = type
+        self.items = items
+        self.properties = properties
+
+
+SCHEMAS = [
+    (PRIMITIVE, _Schema("string")),
+    (ARRAY, _Schema("array", items=_Schema("string"))),
+    (OBJECT, _Schema("object", properties={c: _Schema("integer") for c in OBJECT})),
+]
+
+
+@pytest.mark.parametrize("style,explode,primitive,array,obj", PATH_EXAMPLES)
+def test_path_styles(style, explode, primitive, array, obj):
+    """
+    Tests that path parameters serialize as the spec's examples do, and
+    deserialize back to the same values
+    """
+    for (value, schema), expected in zip(SCHEMAS, (primitive, array, obj)):
+        codec = ParameterCodec("color", "path", style, explode, schema=schema)
+        assert codec.serialize(value) == expected
+        assert codec.deserialize(expected) == value
+
+
+@pytest.mark.parametrize("style,explode,primitive,array,obj", QUERY_EXAMPLES)
+def test_query_styles(style, explode, primitive, array, obj):
+    """
+    Tests that query parameters serialize as the spec's examples do, and
+    deserialize back to the same values
+    """
+    for (value, schema), expected in zip(SCHEMAS, (primitive, array, obj)):
+        if expected is None:
+            continue
+        codec = ParameterCodec("color", "query", style, explode, schema=schema)
+        assert "&".join("{}={}".format(k, v) for k, v in codec.serialize(value)) == expected
+        assert codec.deserialize(parse_query(expected)) == value
+
+
+def test_parameter_encoding():
+    """
+    Tests that values are percent encoded unless reserved characters are
+    allowed, and converted to their schema's types when deserialized
+    """
+    codec = ParameterCodec("q", "query")
+    assert codec.serialize("a b/c&d") == [("q", "a%20b%2Fc%26d")]
+    assert codec.serialize(True) == [("q", "true")]
+    assert codec.deserialize(parse_query("q=a+b%2Fc%26d")) == "a b/c&d"
+    assert codec.deserialize(parse_query("other=1")) is None
+
+    codec = ParameterCodec("q", "query", allow_reserved=True)
+    assert codec.serialize("a b/c&d") == [("q", "a%20b/c&d")]
+
+    codec = ParameterCodec("ids", "path", schema=_Schema("array", items=_Schema("integer")))
+    assert codec.serialize([1, 2, 3]) == "1,2,3"
+    assert codec.deserialize("1,2,3") == [1, 2, 3]
+    with pytest.raises(ValueError):
+        codec.deserialize("1,two")
+
+    codec = ParameterCodec("flag", "header", schema=_Schema("boolean"))
+    assert codec.deserialize("false") is False
+
+    # header and cookie values are sent as they are
+    codec = ParameterCodec("If-Match", "header")
+    assert codec.serialize('"a b"') == '"a b"'
+    assert codec.deserialize('"a%20b"') == '"a%20b"'
+    codec = ParameterCodec("session", "cookie")
+    assert codec.serialize("a/b+c") == [("session", "a/b+c")]
+    assert codec.deserialize([("session", "a/b+c")]) == "a/b+c"
+
+    with pytest.raises(ValueError):
+        ParameterCodec("color", "header", "form")
+
+
+def test_request_parameters(echo_api):
+    """
+    Tests that calls serialize each parameter by its style
+    """
+    spec = copy.deepcopy(echo_api)
+    spec["paths"]["/items"]["get"]["parameters"] += [
+        {"name": "tags", "in": "query", "schema": {"type": "array", "items": {"type": "string"}}},
+        {
+            "name": "ids",
+            "in": "query",
+            "style": "pipeDelimited",
+            "explode": False,
+            "schema": {"type": "array", "items": {"type": "integer"}},
+        },
+        {"name": "filter", "in": "query", "style": "deepObject", "explode": True, "schema": {"type": "object"}},
+        {"name": "X-Versions", "in": "header", "schema": {"type": "array", "items": {"type": "integer"}}},
+        {"name": "session", "in": "cookie", "schema": {"type": "string"}},
+    ]
+    spec["paths"]["/items/{id}"]["get"]["parameters"][0].update(
+        {"style": "matrix", "schema": {"type": "array", "items": {"type": "integer"}}}
+    )
+
+    environs = []
+
+    def app(environ, start_response):
+        environs.append(environ)
+        start_response("200 OK", [("Content-Type", "application/json")])
+        if environ["PATH_INFO"] == "/items":
+            return [b'[{"id": 1, "name": "one"}]']
+        return [b'{"id": 1, "name": "one"}']
+
+    api = OpenAPI(spec, transport=WSGITransport(app))
+    api.call_listItems(
+        parameters={
+            "limit": 10,
+            "tags": ["a b", "c"],
+            "ids": [1, 2],
+            "filter": {"name": "x", "size": 3},
+            "X-Versions": [1, 2],
+            "session": "s1",
+        }
+    )
+    environ = environs[-1]
+    assert environ["QUERY_STRING"] == "limit=10&tags=a%20b&tags=c&ids=1%7C2&filter%5Bname%5D=x&filter%5Bsize%5D=3"
+    assert environ["HTTP_X_VERSIONS"] == "1,2"
+    assert environ["HTTP_COOKIE"] == "session=s1"
+
+    operation = api._operation_map["listItems"]
+    query = parse_query(environ["QUERY_STRING"])
+    received = {c.name: c._codec.deserialize(query) for c in operation.parameters if c.in_ == "query"}
+    assert received["tags"] == ["a b", "c"]
+    assert received["ids"] == [1, 2]
+    assert received["filter"] == {"name": "x", "size": "3"}
+
+    api.call_getItem(parameters={"id": [1, 2]})
+    assert environs[-1]["PATH_INFO"] == "/items/;id=1,2"
+
+
+def test_invalid_style(echo_api):
+    """
+    Tests that parameters with a style their location doesn't allow are
+    rejected when the spec is parsed
+    """
+    spec = copy.deepcopy(echo_api)
+    spec["paths"]["/items"]["get"]["parameters"][0]["style"] = "matrix"
+    with pytest.raises(SpecError):
+        OpenAPI(spec)
@@ -1,6 +1,8 @@
 """
 Tests parsing specs
 """
+import copy
+
 import pytest
 
 from openapi3 import OpenAPI, SpecError, ReferenceResolutionError
@@ -176,3 +178,24 @@ def test_schema_default_types(with_all_default_types):
     assert schema.properties["str"].default == "test"
     assert schema.properties["bool"].default == True
     assert schema.properties["float"].default == 0.1
+
+
+@pytest.mark.parametrize(
+    "change,message",
+    [
+        ({"required": False}, "must be required since it is in the path"),
+        ({"style": "form"}, "Style form is not allowed for path parameters"),
+    ],
+)
+def test_invalid_parameter_validation_mode(echo_api, change, message):
+    """
+    Tests that invalid parameters are reported as errors in validation mode,
+    rather than failing to parse the rest of the spec
+    """
+    spec = copy.deepcopy(echo_api)
+    spec["paths"]["/items/{id}"]["get"]["parameters"][0].update(change)
+    spec = OpenAPI(spec, validate=True)
+
+    errors = spec.errors()
+    assert len(errors) == 1
+    assert message in errors[0].message
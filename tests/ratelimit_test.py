@@ -0,0 +1,125 @@
+"""
+Tests limiting the rate and concurrency of calls with openapi3.ratelimit
+"""
+import copy
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from openapi3 import OpenAPI, UnexpectedResponseError
+from openapi3.errors import BulkheadFullError, RateLimitError
+from openapi3.ratelimit import Bulkhead, RateLimiter
+from openapi3.transports import WSGITransport
+
+
+class LimitedApp:
+    """
+    A WSGI app serving the echo-api.yaml items, sending the given headers and
+    status with each response, and holding each request for ``delay`` seconds
+    """
+
+    def __init__(self, headers=(), status="200 OK", delay=0):
+        self.headers = list(headers)
+        self.status = status
+        self.delay = delay
+        self.times = []
+        self.lock = threading.Lock()
+
+    def __call__(self, environ, start_response):
+        with self.lock:
+            self.times.append(time.monotonic())
+        time.sleep(self.delay)
+
+        item_id = int(environ["PATH_INFO"].rsplit("/", 1)[1])
+        body = json.dumps({"id": item_id, "name": "item {}".format(item_id)}).encode()
+        start_response(self.status, [("Content-Type", "application/json")] + self.headers)
+        return [body]
+
+
+def test_rate_limit_extension(echo_api):
+    """
+    Tests that operations are limited to the rate declared with x-rate-limit,
+    and that the limit can be overridden per operation
+    """
+    spec = copy.deepcopy(echo_api)
+    spec["paths"]["/items/{id}"]["get"]["x-rate-limit"] = {"rate": 20, "burst": 1}
+
+    app = LimitedApp()
+    limiter = RateLimiter()
+    api = OpenAPI(spec, transport=WSGITransport(app), rate_limiter=limiter)
+
+    for i in range(5):
+        api.call_getItem(parameters={"id": i})
+    assert app.times[-1] - app.times[0] >= 0.19
+
+    stats = limiter.stats()
+    assert stats["operations"]["getItem"]["acquired"] == 5
+    assert stats["operations"]["getItem"]["throttled"] == 4
+    assert stats["global"] is None
+
+    # per_operation overrides the extension
+    app = LimitedApp()
+    api = OpenAPI(spec, transport=WSGITransport(app), rate_limiter=RateLimiter(per_operation={"getItem": 1000}))
+    for i in range(5):
+        api.call_getItem(parameters={"id": i})
+    assert app.times[-1] - app.times[0] < 0.19
+
+
+def test_rate_limit_headers(echo_api):
+    """
+    Tests that requests to a server pause when it says none remain, or asks
+    for a delay with Retry-After
+    """
+    app = LimitedApp(headers=[("RateLimit-Remaining", "0"), ("RateLimit-Reset", "0.2")])
+    limiter = RateLimiter(per_server=100)
+    api = OpenAPI(echo_api, transport=WSGITransport(app), rate_limiter=limiter)
+
+    api.call_getItem(parameters={"id": 1})
+    api.call_getItem(parameters={"id": 2})
+    assert app.times[1] - app.times[0] >= 0.19
+
+    app = LimitedApp(headers=[("Retry-After", "0.2")], status="429 Too Many Requests")
+    api = OpenAPI(echo_api, transport=WSGITransport(app), rate_limiter=RateLimiter(max_wait=0.05))
+
+    with pytest.raises(UnexpectedResponseError):
+        api.call_getItem(parameters={"id": 1})
+
+    # the next request would wait longer than allowed
+    with pytest.raises(RateLimitError):
+        api.call_getItem(parameters={"id": 1})
+    assert len(app.times) == 1
+
+
+def test_bulkhead(echo_api):
+    """
+    Tests that concurrent calls to an operation are limited, and that calls
+    beyond the limit fail once the timeout passes
+    """
+    spec = copy.deepcopy(echo_api)
+    spec["paths"]["/items/{id}"]["get"]["x-max-concurrency"] = 2
+
+    app = LimitedApp(delay=0.1)
+    bulkhead = Bulkhead(timeout=0.5)
+    api = OpenAPI(spec, transport=WSGITransport(app), bulkhead=bulkhead)
+
+    with ThreadPoolExecutor(6) as pool:
+        results = list(pool.map(lambda i: api.call_getItem(parameters={"id": i}), range(6)))
+    assert [c.id for c in results] == list(range(6))
+    assert bulkhead.stats()["getItem"] == {"limit": 2, "active": 0, "peak": 2, "rejected": 0}
+
+    bulkhead = Bulkhead(timeout=0)
+    api = OpenAPI(spec, transport=WSGITransport(app), bulkhead=bulkhead)
+
+    def call(i):
+        try:
+            return api.call_getItem(parameters={"id": i})
+        except BulkheadFullError as e:
+            return e
+
+    with ThreadPoolExecutor(4) as pool:
+        results = list(pool.map(call, range(4)))
+    assert sum(isinstance(c, BulkheadFullError) for c in results) == 2
+    assert bulkhead.stats()["getItem"]["rejected"] == 2
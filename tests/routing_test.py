@@ -0,0 +1,108 @@
+"""
+Tests matching requests to operations with OpenAPI.match
+"""
+import pytest
+
+from openapi3 import OpenAPI
+from openapi3.routing import Router
+
+
+def _operation(operation_id, *parameters):
+    return {
+        "operationId": operation_id,
+        "parameters": [{"name": c, "in": "path", "required": True, "schema": {"type": "string"}} for c in parameters],
+        "responses": {"200": {"description": "ok"}},
+    }
+
+
+SPEC = {
+    "openapi": "3.0.0",
+    "info": {"title": "Routing", "version": "1.0.0"},
+    "servers": [{"url": "https://api.example.com/v4"}],
+    "paths": {
+        "/": {"get": _operation("root")},
+        "/users": {"get": _operation("listUsers"), "post": _operation("createUser")},
+        "/users/me": {"get": _operation("getMe")},
+        "/users/{id}": {"get": _operation("getUser", "id"), "delete": _operation("deleteUser", "id")},
+        "/users/{userId}/posts/{postId}": {"get": _operation("getPost", "userId", "postId")},
+        "/users/{id}/posts/latest": {"get": _operation("getLatestPost", "id")},
+        "/files/{name}.{ext}": {"get": _operation("getFile", "name", "ext")},
+        "/files/{path}": {"get": _operation("getFilePath", "path")},
+    },
+}
+
+
+@pytest.mark.parametrize(
+    "method,path,operation_id,parameters",
+    [
+        ("GET", "/", "root", {}),
+        ("GET", "/users", "listUsers", {}),
+        ("post", "/users", "createUser", {}),
+        ("GET", "/users/me", "getMe", {}),
+        ("GET", "/users/42", "getUser", {"id": "42"}),
+        # the literal path has no DELETE, so the templated one matches
+        ("DELETE", "/users/me", "deleteUser", {"id": "me"}),
+        ("GET", "/users/42/posts/7", "getPost", {"userId": "42", "postId": "7"}),
+        ("GET", "/users/42/posts/latest", "getLatestPost", {"id": "42"}),
+        ("GET", "/users/a%2Fb", "getUser", {"id": "a/b"}),
+        ("GET", "/users/42?expand=posts", "getUser", {"id": "42"}),
+        ("GET", "/files/report.tar.gz", "getFile", {"name": "report", "ext": "tar.gz"}),
+        ("GET", "/files/README", "getFilePath", {"path": "README"}),
+        ("GET", "/v4/users/42", "getUser", {"id": "42"}),
+        ("GET", "/v4", "root", {}),
+    ],
+)
+def test_match(method, path, operation_id, parameters):
+    """
+    Tests that requests are matched to the operation they call, preferring
+    literal segments
+    """
+    api = OpenAPI(SPEC)
+    operation, values = api.match(method, path)
+    assert operation.operationId == operation_id
+    assert values == parameters
+
+
+@pytest.mark.parametrize(
+    "method,path",
+    [
+        ("PUT", "/users"),
+        ("GET", "/groups"),
+        ("GET", "/users/"),
+        ("GET", "/users/42/posts"),
+        ("GET", "/users/42/posts/7/comments"),
+        ("GET", "users"),
+        ("GET", "/v4x/users"),
+    ],
+)
+def test_no_match(method, path):
+    """
+    Tests that requests that don't call any operation aren't matched
+    """
+    assert OpenAPI(SPEC).match(method, path) is None
+
+
+def test_match_many_paths():
+    """
+    Tests matching against a spec with many paths sharing prefixes
+    """
+    spec = dict(SPEC, paths={})
+    for i in range(500):
+        spec["paths"]["/resources{}/{{id}}/items/{{itemId}}".format(i)] = {
+            "get": _operation("get{}".format(i), "id", "itemId")
+        }
+
+    api = OpenAPI(spec)
+    operation, values = api.match("GET", "/resources499/1/items/2")
+    assert operation.operationId == "get499"
+    assert values == {"id": "1", "itemId": "2"}
+
+
+def test_match_encoded():
+    """
+    Tests that path parameters may be left percent-encoded, to be deserialized
+    by their parameters
+    """
+    router = Router(OpenAPI(SPEC))
+    assert router.match("GET", "/users/a%2Fb", decode=False)[1] == {"id": "a%2Fb"}
+    assert router.match("GET", "/users/a%2Fb")[1] == {"id": "a/b"}
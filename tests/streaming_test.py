@@ -0,0 +1,254 @@
+"""
+Tests streaming JSON arrays from responses with openapi3.streaming
+"""
+import copy
+import gc
+import json
+
+import pytest
+
+from openapi3 import OpenAPI
+from openapi3.metrics import Metrics
+from openapi3.streaming import ResponseStream, copy_into, iter_json_array, iter_json_lines
+from openapi3.transports import ASGITransport, TransportResponse, WSGITransport
+
+DOCUMENT = [{"id": i, "name": "ïtem {}".format(i), "tags": ["a", "b"] * (i % 3)} for i in range(100)] + [
+    12345,
+    -1.5e10,
+    "string, with [brackets]",
+    [],
+    {},
+    None,
+    True,
+]
+
+
+def _chunks(raw, size):
+    return [raw[i : i + size] for i in range(0, len(raw), size)]
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 17, 1 << 20])
+def test_iter_json_array(size):
+    """
+    Tests that arrays are decoded item by item no matter how they're split into
+    chunks, including through multibyte characters and numbers
+    """
+    raw = json.dumps(DOCUMENT, ensure_ascii=False).encode("utf-8")
+    assert list(iter_json_array(_chunks(raw, size))) == DOCUMENT
+
+    wrapped = json.dumps({"total": 1, "meta": {"items": [0]}, "items": DOCUMENT, "next": None}).encode("utf-8")
+    assert list(iter_json_array(_chunks(wrapped, size), field="items")) == DOCUMENT
+
+    assert list(iter_json_array([b" [ ] "])) == []
+
+
+@pytest.mark.parametrize(
+    "raw,field",
+    [
+        (b'{"items": []}', None),
+        (b'[1, 2', None),
+        (b'[1 2]', None),
+        (b'{"other": []}', "items"),
+        (b'[]', "items"),
+    ],
+)
+def test_iter_json_array_invalid(raw, field):
+    """
+    Tests that documents that aren't arrays, or are cut off, raise errors
+    """
+    with pytest.raises(ValueError):
+        list(iter_json_array(_chunks(raw, 3), field=field))
+
+
+class StreamingApp:
+    """
+    A WSGI app sending the echo-api.yaml items one chunk at a time, recording
+    how many chunks were pulled and whether the response was closed
+    """
+
+    def __init__(self, count=100, wrapper=False):
+        self.count = count
+        self.wrapper = wrapper
+        self.sent = 0
+        self.closed = False
+
+    def __call__(self, environ, start_response):
+        start_response("200 OK", [("Content-Type", "application/json")])
+        return self
+
+    def __iter__(self):
+        yield b'{"items": [' if self.wrapper else b"["
+        for i in range(self.count):
+            self.sent += 1
+            yield (b"," if i else b"") + json.dumps({"id": i, "name": "item {}".format(i)}).encode()
+        yield b"]}" if self.wrapper else b"]"
+
+    def close(self):
+        self.closed = True
+
+
+def test_stream_response(echo_api):
+    """
+    Tests that streamed responses yield models as the body arrives, and that
+    closing the generator early closes the response
+    """
+    app = StreamingApp()
+    metrics = Metrics()
+    api = OpenAPI(echo_api, transport=WSGITransport(app), metrics=metrics)
+    item_type = api.components.schemas["Item"].get_type()
+
+    items = api.call_listItems(stream=True)
+    assert app.sent == 0
+
+    first = next(items)
+    assert type(first) == item_type
+    assert first.id == 0
+    assert app.sent < 5
+
+    items.close()
+    assert app.closed
+    assert app.sent < 5
+    assert metrics.snapshot()["listItems"]["calls"] == 1
+
+    app = StreamingApp()
+    api = OpenAPI(echo_api, transport=WSGITransport(app))
+    assert [c.id for c in api.call_listItems(stream=True)] == list(range(100))
+    assert app.closed
+
+    # a stream that's never iterated still releases its response, once it's
+    # closed or garbage collected
+    app = StreamingApp()
+    api = OpenAPI(echo_api, transport=WSGITransport(app))
+    with api.call_listItems(stream=True):
+        pass
+    assert app.closed and app.sent == 0
+
+    app = StreamingApp()
+    api = OpenAPI(echo_api, transport=WSGITransport(app))
+    items = api.call_listItems(stream=True)
+    del items
+    gc.collect()
+    assert app.closed and app.sent == 0
+
+    # without stream, the same call returns a list as usual
+    app = StreamingApp(count=3)
+    api = OpenAPI(echo_api, transport=WSGITransport(app))
+    assert [c.id for c in api.call_listItems()] == [0, 1, 2]
+
+
+def test_stream_wrapped_response(echo_api):
+    """
+    Tests that arrays inside wrapper objects are streamed from the field named
+    by x-stream-field, or by the stream argument
+    """
+    spec = copy.deepcopy(echo_api)
+    page = {
+        "type": "object",
+        "x-stream-field": "items",
+        "properties": {"items": {"type": "array", "items": {"$ref": "#/components/schemas/Item"}}},
+    }
+    spec["paths"]["/items"]["get"]["responses"]["200"]["content"]["application/json"]["schema"] = page
+
+    app = StreamingApp(wrapper=True)
+    api = OpenAPI(spec, transport=WSGITransport(app))
+    assert [c.id for c in api.call_listItems(stream=True)] == list(range(100))
+
+    del page["x-stream-field"]
+    api = OpenAPI(spec, transport=WSGITransport(StreamingApp(count=2, wrapper=True)))
+    assert [c.id for c in api.call_listItems(stream="items")] == [0, 1]
+
+    # without a field to stream, the response is read as usual
+    page = api.call_listItems(stream=True)
+    assert [c.id for c in page.items] == [0, 1]
+
+
+def test_response_stream_without_raw():
+    """
+    Tests that responses without a raw stream are read from their content
+    """
+    content = bytes(range(256)) * 10
+    stream = ResponseStream(TransportResponse(200, {}, content))
+    assert stream.read(100) == content[:100]
+    buffer = bytearray(len(content) - 100)
+    assert copy_into(stream, buffer) == len(buffer)
+    assert bytes(buffer) == content[100:]
+    assert stream.read() == b""
+    stream.close()
+
+
+def test_stream_asgi(echo_api):
+    """
+    Tests that the ASGI transport hands over chunks as the application sends
+    them
+    """
+
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"application/json")]})
+        for chunk in (b"[", b'{"id": 1, "name": "one"}', b",", b'{"id": 2, "name": "two"}', b"]"):
+            await send({"type": "http.response.body", "body": chunk, "more_body": True})
+        await send({"type": "http.response.body", "body": b""})
+
+    transport = ASGITransport(app)
+    api = OpenAPI(echo_api, transport=transport)
+    assert [c.name for c in api.call_listItems(stream=True)] == ["one", "two"]
+    transport.close()
+
+
+@pytest.mark.parametrize("size", [1, 5, 1 << 20])
+def test_iter_json_lines(size):
+    """
+    Tests that newline delimited documents are decoded line by line no matter
+    how they're split into chunks
+    """
+    raw = "\n".join(json.dumps(c, ensure_ascii=False) for c in DOCUMENT).encode("utf-8")
+    assert list(iter_json_lines(_chunks(raw, size))) == DOCUMENT
+    assert list(iter_json_lines(_chunks(raw + b"\r\n\n", size))) == DOCUMENT
+
+    with pytest.raises(ValueError):
+        list(iter_json_lines([b'{"id": 1}\n{"id":']))
+
+
+class JSONLinesApp(StreamingApp):
+    """
+    A WSGI app sending the echo-api.yaml items as newline delimited JSON
+    """
+
+    def __call__(self, environ, start_response):
+        start_response("200 OK", [("Content-Type", "application/x-ndjson")])
+        return self
+
+    def __iter__(self):
+        for i in range(self.count):
+            self.sent += 1
+            yield json.dumps({"id": i, "name": "item {}".format(i)}).encode() + b"\n"
+
+
+@pytest.mark.parametrize("item_schema", [False, True])
+def test_stream_json_lines(echo_api, item_schema):
+    """
+    Tests that newline delimited JSON responses are streamed a model per line,
+    whether the schema describes the lines or the whole document as an array
+    """
+    spec = copy.deepcopy(echo_api)
+    responses = spec["paths"]["/items"]["get"]["responses"]["200"]
+    schema = responses["content"].pop("application/json")["schema"]
+    if item_schema:
+        schema = schema["items"]
+    responses["content"]["application/x-ndjson"] = {"schema": schema}
+
+    app = JSONLinesApp()
+    api = OpenAPI(spec, transport=WSGITransport(app))
+    item_type = api.components.schemas["Item"].get_type()
+
+    items = api.call_listItems(stream=True)
+    first = next(items)
+    assert type(first) == item_type
+    assert app.sent < 5
+
+    items.close()
+    assert app.closed
+
+    app = JSONLinesApp(count=3)
+    api = OpenAPI(spec, transport=WSGITransport(app))
+    assert [c.id for c in api.call_listItems()] == [0, 1, 2]
+    assert app.closed
@@ -0,0 +1,97 @@
+"""
+Tests tracing calls with openapi3.tracing
+"""
+import copy
+
+import pytest
+
+from openapi3 import OpenAPI, UnexpectedResponseError
+from openapi3.tracing import Tracer, format_traceparent, parse_traceparent
+from openapi3.transports import WSGITransport
+
+from api import echo
+
+
+class RecordingApp:
+    """
+    Wraps the echo API's WSGI app, recording the traceparent of each request
+    """
+
+    def __init__(self):
+        self.traceparents = []
+
+    def __call__(self, environ, start_response):
+        self.traceparents.append(environ.get("HTTP_TRACEPARENT"))
+        return echo.wsgi_app(environ, start_response)
+
+
+def test_tracing(echo_api):
+    """
+    Tests that each phase of a request is traced under a client span, and that
+    the client span's context is sent to the server
+    """
+    app = RecordingApp()
+    tracer = Tracer()
+    api = OpenAPI(echo_api, transport=WSGITransport(app), tracer=tracer)
+
+    api.call_createItem(data={"id": 1, "name": "new"})
+
+    spans = tracer.finished_spans()
+    root = spans[-1]
+    assert root.name == "POST /items"
+    assert root.parent is None
+    assert root.attributes == {
+        "openapi.operation_id": "createItem",
+        "http.request.method": "POST",
+        "http.route": "/items",
+        "server.url": "http://localhost",
+        "http.response.status_code": 201,
+    }
+    assert [c.name for c in spans[:-1]] == ["body", "parameters", "send", "response", "model"]
+    assert all(c.parent is root.context for c in spans[:-1])
+    assert all(c.context.trace_id == root.context.trace_id for c in spans)
+
+    assert app.traceparents == [format_traceparent(root.context)]
+    remote = parse_traceparent(app.traceparents[0])
+    assert (remote.trace_id, remote.span_id, remote.is_remote) == (root.context.trace_id, root.context.span_id, True)
+
+
+def test_tracing_parent_and_errors(echo_api):
+    """
+    Tests that requests are traced as children of the current span, and that
+    failed requests are marked as errors
+    """
+    spec = copy.deepcopy(echo_api)
+    del spec["paths"]["/items/{id}"]["get"]["responses"]["404"]
+
+    tracer = Tracer()
+    api = OpenAPI(spec, transport=WSGITransport(echo.wsgi_app), tracer=tracer)
+
+    with tracer.start_as_current_span("outer") as outer:
+        with pytest.raises(UnexpectedResponseError):
+            api.call_getItem(parameters={"id": 100})
+
+    spans = {c.name: c for c in tracer.finished_spans()}
+    root = spans["GET /items/{id}"]
+    assert root.parent is outer.context
+    assert root.status == "ERROR"
+    assert root.events[0][2]["exception.type"] == "UnexpectedResponseError"
+    assert spans["response"].status == "ERROR"
+    assert spans["send"].status == "UNSET"
+    assert "model" not in spans
+
+
+@pytest.mark.parametrize(
+    "value",
+    [
+        None,
+        "garbage",
+        "00-00000000000000000000000000000000-b7ad6b7169203331-01",
+        "01-0af7651916cd43dd8448eb211c80319c-b7ad6b7169203331-01",
+    ],
+)
+def test_parse_invalid_traceparent(value):
+    """
+    Tests that invalid traceparent headers are ignored
+    """
+    assert parse_traceparent(value) is None
@@ -0,0 +1,253 @@
+"""
+Tests sending requests through the transports in openapi3.transports
+"""
+import copy
+
+import pytest
+
+from openapi3 import OpenAPI, TransportError
+from openapi3.transports import (
+    ASGITransport,
+    HTTPClientTransport,
+    RequestsTransport,
+    Urllib3Transport,
+    WSGITransport,
+)
+
+from api import echo
+from api.main import app
+
+
+@pytest.fixture(scope="module")
+def echo_server():
+    server = echo.serve()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def _echo_client(echo_api, echo_server, **kwargs):
+    api = OpenAPI(echo_api, **kwargs)
+    api.servers[0].url = "http://127.0.0.1:{}".format(echo_server.server_port)
+    return api
+
+
+@pytest.mark.parametrize("transport_type", [RequestsTransport, Urllib3Transport, HTTPClientTransport])
+def test_transport_calls(echo_api, echo_server, transport_type):
+    """
+    Tests that each transport sends parameters and bodies, and that responses
+    are parsed into models as usual
+    """
+    api = _echo_client(echo_api, echo_server, transport=transport_type())
+    item_type = api.components.schemas["Item"].get_type()
+
+    items = api.call_listItems(parameters={"limit": 3})
+    assert len(items) == 3
+    assert all(type(c) == item_type for c in items)
+
+    item = api.call_getItem(parameters={"id": 4})
+    assert type(item) == item_type
+    assert item.id == 4
+    assert item.tags == ["even"]
+
+    error = api.call_getItem(parameters={"id": 400})
+    assert type(error) == api.components.schemas["Error"].get_type()
+    assert error.message == "400 not found"
+
+    created = api.call_createItem(data={"id": 99, "name": "new"})
+    assert type(created) == item_type
+    assert created.name == "new"
+
+    method, path, headers = echo_server.requests[-1]
+    assert method == "POST"
+    assert path == "/items"
+    assert headers["Content-Type"] == "application/json"
+
+
+@pytest.mark.parametrize("transport_type", [RequestsTransport, Urllib3Transport, HTTPClientTransport])
+def test_transport_stream(echo_api, echo_server, transport_type):
+    """
+    Tests that each transport streams responses, and that connections are
+    usable afterwards whether the stream was read to the end or not
+    """
+    api = _echo_client(echo_api, echo_server, transport=transport_type())
+
+    assert [c.id for c in api.call_listItems(stream=True)] == list(range(10))
+
+    items = api.call_listItems(stream=True)
+    assert next(items).id == 0
+    items.close()
+
+    assert api.call_getItem(parameters={"id": 4}).id == 4
+
+
+def test_http_client_transport_reuses_connections(echo_api, echo_server):
+    """
+    Tests that the http.client transport keeps connections alive between calls
+    """
+    transport = HTTPClientTransport()
+    api = _echo_client(echo_api, echo_server, transport=transport)
+
+    for i in range(5):
+        api.call_getItem(parameters={"id": i})
+
+    idle = list(transport._idle.values())
+    assert len(idle) == 1
+    assert len(idle[0]) == 1
+
+    transport.close()
+    assert transport._idle == {}
+
+
+@pytest.mark.parametrize("transport_type", [Urllib3Transport, HTTPClientTransport])
+def test_transport_connection_error(echo_api, transport_type):
+    """
+    Tests that failing to connect raises a TransportError
+    """
+    api = OpenAPI(echo_api, transport=transport_type())
+    # nothing listens on port 9 (discard) on the loopback interface
+    api.servers[0].url = "http://127.0.0.1:9"
+
+    with pytest.raises(TransportError):
+        api.call_listItems()
+
+
+def test_wsgi_transport(echo_api):
+    """
+    Tests that the WSGI transport calls the application in-process
+    """
+    api = OpenAPI(echo_api, transport=WSGITransport(echo.wsgi_app))
+    item_type = api.components.schemas["Item"].get_type()
+
+    items = api.call_listItems(parameters={"limit": 2})
+    assert [c.id for c in items] == [0, 1]
+
+    error = api.call_getItem(parameters={"id": 400})
+    assert error.message == "400 not found"
+
+    created = api.call_createItem(data={"id": 99, "name": "new"})
+    assert type(created) == item_type
+    assert created.id == 99
+
+
+def test_asgi_transport():
+    """
+    Tests that the ASGI transport calls the application in-process, using the
+    FastAPI app from the api package
+    """
+    spec = copy.deepcopy(app.openapi())
+    spec["servers"][0]["url"] = "http://testserver"
+
+    transport = ASGITransport(app)
+    api = OpenAPI(spec, transport=transport)
+
+    pet = api.call_createPet(data={"pet": {"name": "asgi-transport"}})
+    assert type(pet) == api.components.schemas["Pet"].get_type()
+
+    r = api.call_getPet(parameters={"pet_id": pet.id})
+    assert r.id == pet.id
+
+    r = api.call_getPet(parameters={"pet_id": -1})
+    assert type(r) == api.components.schemas["Error"].get_type()
+
+    api.call_deletePet(parameters={"pet_id": pet.id})
+    transport.close()
+
+
+@pytest.mark.parametrize("transport_type", [RequestsTransport, Urllib3Transport, HTTPClientTransport, WSGITransport])
+def test_transport_files(echo_api, echo_server, tmp_path, transport_type):
+    """
+    Tests that each transport uploads bytes, files and iterators as they are,
+    and downloads into buffers, files and streams
+    """
+    if transport_type is WSGITransport:
+        api = OpenAPI(echo_api, transport=WSGITransport(echo.wsgi_app))
+    else:
+        api = _echo_client(echo_api, echo_server, transport=transport_type())
+    content = bytes(range(256)) * 1000
+
+    source = tmp_path / "upload"
+    source.write_bytes(content)
+    with source.open("rb") as f:
+        assert api.call_uploadFile(parameters={"name": "file"}, data=f).id == len(content)
+
+    chunks = (content[i : i + 4096] for i in range(0, len(content), 4096))
+    assert api.call_uploadFile(parameters={"name": "iterator"}, data=chunks).id == len(content)
+    assert api.call_uploadFile(parameters={"name": "bytes"}, data=memoryview(content)).id == len(content)
+
+    for name in ("file", "iterator", "bytes"):
+        assert api.call_downloadFile(parameters={"name": name}) == content
+
+    buffer = bytearray(len(content) + 10)
+    assert api.call_downloadFile(parameters={"name": "file"}, download=buffer) == len(content)
+    assert buffer[: len(content)] == content
+
+    target = tmp_path / "download"
+    with target.open("wb") as f:
+        assert api.call_downloadFile(parameters={"name": "file"}, download=f) == len(content)
+    assert target.read_bytes() == content
+
+    with pytest.raises(ValueError):
+        api.call_downloadFile(parameters={"name": "file"}, download=bytearray(10))
+
+    with api.call_downloadFile(parameters={"name": "file"}, stream=True) as body:
+        assert body.read(5) == content[:5]
+    with api.call_downloadFile(parameters={"name": "file"}, stream=True) as body:
+        assert body.read() == content
+
+    # the connection is still usable
+    assert api.call_getItem(parameters={"id": 4}).id == 4
+
+
+def test_asgi_transport_upload(echo_api):
+    """
+    Tests that the ASGI transport hands uploads to the application in chunks
+    """
+    received = []
+
+    async def app(scope, receive, send):
+        while True:
+            message = await receive()
+            received.append(message["body"])
+            if not message.get("more_body"):
+                break
+
+        body = '{{"id": {}, "name": "upload"}}'.format(sum(len(c) for c in received)).encode()
+        await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"application/json")]})
+        await send({"type": "http.response.body", "body": body})
+
+    transport = ASGITransport(app)
+    api = OpenAPI(echo_api, transport=transport)
+    result = api.call_uploadFile(parameters={"name": "upload"}, data=iter([b"abc", b"def", b"g"]))
+    assert result.id == 7
+    assert b"".join(received) == b"abcdefg"
+    assert len([c for c in received if c]) == 3
+    transport.close()
+
+
+@pytest.mark.parametrize(
+    "media_types,expected",
+    [
+        (["multipart/form-data", "image/png"], "image/png"),
+        (["application/x-www-form-urlencoded", "text/plain", "application/octet-stream"], "application/octet-stream"),
+    ],
+)
+def test_binary_upload_content_type(echo_api, media_types, expected):
+    """
+    Tests that binary uploads aren't labelled as forms, even when a form is
+    the first media type a request body lists
+    """
+    spec = copy.deepcopy(echo_api)
+    spec["paths"]["/files/{name}"]["put"]["requestBody"]["content"] = {
+        c: {"schema": {"type": "string", "format": "binary"}} for c in media_types
+    }
+    received = []
+
+    def app(environ, start_response):
+        received.append(environ["CONTENT_TYPE"])
+        start_response("200 OK", [("Content-Type", "application/json")])
+        return [b'{"id": 3, "name": "upload"}']
+
+    api = OpenAPI(spec, transport=WSGITransport(app))
+    assert api.call_uploadFile(parameters={"name": "upload"}, data=b"abc").id == 3
+    assert received == [expected]
@@ -0,0 +1,122 @@
+"""
+Tests validating calls before they're sent with openapi3.validation
+"""
+import copy
+
+import pytest
+
+from openapi3 import OpenAPI, RequestValidationError
+from openapi3.validation import SchemaCompiler
+from openapi3.transports import WSGITransport
+
+from api import echo
+
+
+def _spec(echo_api):
+    spec = copy.deepcopy(echo_api)
+    item = spec["components"]["schemas"]["Item"]
+    item["properties"]["id"].update({"minimum": 0, "readOnly": True})
+    item["properties"]["name"].update({"minLength": 1, "pattern": "^[a-z ]+$"})
+    item["properties"]["tags"]["items"]["enum"] = ["odd", "even"]
+    item["additionalProperties"] = False
+    spec["paths"]["/items"]["get"]["parameters"][0]["schema"].update({"minimum": 1, "maximum": 100})
+    return spec
+
+
+@pytest.mark.parametrize(
+    "data,path",
+    [
+        ({"id": 1, "name": 5}, "data.name"),
+        ({"id": 1, "name": ""}, "data.name"),
+        ({"id": 1, "name": "Capital"}, "data.name"),
+        ({"id": -1, "name": "ok"}, "data.id"),
+        ({"id": 1}, "data.name"),
+        ({"id": 1, "name": "ok", "tags": ["odd", "prime"]}, "data.tags[1]"),
+        ({"id": 1, "name": "ok", "colour": "red"}, "data.colour"),
+        ({"name": "ok", "tags": "odd"}, "data.tags"),
+        ([], "data"),
+    ],
+)
+def test_invalid_body(echo_api, data, path):
+    """
+    Tests that invalid bodies are rejected before they're sent, naming the
+    value at fault
+    """
+    api = OpenAPI(_spec(echo_api), transport=WSGITransport(echo.wsgi_app), validate_requests=True)
+    with pytest.raises(RequestValidationError) as e:
+        api.call_createItem(data=data)
+    assert e.value.path == path
+    assert str(e.value).startswith(path + ": ")
+
+
+def test_valid_calls(echo_api):
+    """
+    Tests that valid calls are sent, and that readOnly properties aren't
+    required in requests
+    """
+    api = OpenAPI(_spec(echo_api), transport=WSGITransport(echo.wsgi_app), validate_requests=True)
+    assert api.call_createItem(data={"name": "new"}).name == "new"
+    assert len(api.call_listItems(parameters={"limit": 2})) == 2
+
+    with pytest.raises(RequestValidationError) as e:
+        api.call_listItems(parameters={"limit": 0})
+    assert e.value.path == "parameters.limit"
+
+    with pytest.raises(RequestValidationError):
+        api.call_listItems(parameters={"limit": "2"})
+
+    # validation may be turned off per call, and is off by default
+    assert len(api.call_listItems(parameters={"limit": "2"}, validate=False)) == 2
+    api = OpenAPI(_spec(echo_api), transport=WSGITransport(echo.wsgi_app))
+    assert len(api.call_listItems(parameters={"limit": "2"})) == 2
+
+
+@pytest.mark.parametrize(
+    "schema,valid,invalid",
+    [
+        ({"type": "integer", "multipleOf": 3}, [3, 9, -6], [4, 3.5, True]),
+        ({"type": "number", "multipleOf": 0.1}, [0.3, 1, 2.2], [0.35]),
+        ({"type": "number", "minimum": 0, "exclusiveMinimum": True}, [0.1], [0, -1]),
+        ({"type": "string", "nullable": True, "maxLength": 3}, [None, "abc"], ["abcd", 1]),
+        ({"type": "string", "format": "date-time"}, ["2024-01-02T03:04:05Z"], ["2024-01-02", "yesterday"]),
+        ({"type": "string", "format": "uuid"}, ["9f1b5e8c-9a4b-4c1e-8f1a-2b3c4d5e6f70"], ["not-a-uuid"]),
+        (
+            {"type": "array", "items": {"type": "integer"}, "uniqueItems": True, "maxItems": 3},
+            [[1, 2]],
+            [[1, 1], [1, 2, 3, 4]],
+        ),
+        ({"oneOf": [{"type": "integer"}, {"type": "number"}]}, [1.5], [1, "a"]),
+        ({"anyOf": [{"type": "integer"}, {"type": "string"}]}, [1, "a"], [1.5]),
+        ({"not": {"type": "string"}}, [1, None], ["a"]),
+        (
+            {"type": "object", "additionalProperties": {"type": "integer"}, "minProperties": 1},
+            [{"a": 1}],
+            [{}, {"a": "b"}],
+        ),
+    ],
+)
+def test_schema_keywords(echo_api, schema, valid, invalid):
+    """
+    Tests the schema keywords the compiled validators check
+    """
+    validate = SchemaCompiler(OpenAPI(echo_api)).compile(schema)
+    for c in valid:
+        validate(c, ("value",))
+    for c in invalid:
+        with pytest.raises(RequestValidationError):
+            validate(c, ("value",))
+
+
+def test_recursive_schema(echo_api):
+    """
+    Tests that schemas referring to themselves are compiled once, and validate
+    values nested to any depth
+    """
+    node = {"type": "object", "required": ["name"], "properties": {"name": {"type": "string"}}}
+    node["properties"]["children"] = {"type": "array", "items": node}
+
+    validate = SchemaCompiler(OpenAPI(echo_api)).compile(node)
+    validate({"name": "a", "children": [{"name": "b", "children": [{"name": "c"}]}]}, ("data",))
+    with pytest.raises(RequestValidationError) as e:
+        validate({"name": "a", "children": [{"name": "b", "children": [{"name": 1}]}]}, ("data",))
+    assert e.value.path == "data.children[0].children[0].name"